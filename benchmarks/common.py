@@ -0,0 +1,52 @@
+"""
+Shared setup for the benchmark scripts.
+
+Importing this module points the app at a local SQLite database unless
+DATABASE_URL is already set, so it must be imported before the app. Per-client
+rate limiting is off too, every benchmark request comes from the same client.
+"""
+import os
+
+os.environ.setdefault("DATABASE_URL", "sqlite+aiosqlite:///./bench.sqlite3")
+os.environ.setdefault("RATE_LIMIT_PER_SECOND", "0")
+
+import httpx
+from sqlalchemy import event
+from sqlmodel import SQLModel
+
+from main import app
+from src.app.database.connectivity import engine, read_engine
+
+
+async def reset_database():
+    async with engine.begin() as conn:
+        await conn.run_sync(SQLModel.metadata.drop_all)
+        await conn.run_sync(SQLModel.metadata.create_all)
+
+
+def asgi_client() -> httpx.AsyncClient:
+    """
+    Client that calls the app in-process, without a network hop.
+    """
+    return httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench", timeout=None)
+
+
+def percentile(sorted_values: list, q: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, round(q / 100 * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+class QueryCounter:
+    """
+    Counts statements sent to the primary and replica engines.
+    """
+    def __init__(self):
+        self.count = 0
+        engines = {engine.sync_engine, read_engine.sync_engine}
+        for sync_engine in engines:
+            event.listen(sync_engine, "before_cursor_execute", self.on_execute)
+
+    def on_execute(self, conn, cursor, statement, parameters, context, executemany):
+        self.count += 1
@@ -0,0 +1,299 @@
+"""
+Load test for every API route.
+
+Seeds a database with realistic volumes, then drives each route with concurrent
+in-process async clients and reports p50/p95/p99 latency, requests per second
+and database queries per request as JSON, so runs can be compared across commits.
+
+    python -m benchmarks.endpoints --requests 500 --concurrency 32 --output bench.json
+    python -m benchmarks.endpoints --only "GET /inventory/" "POST /order/"
+
+Uses a local SQLite database unless DATABASE_URL is set (e.g. a local Postgres).
+"""
+import argparse
+import asyncio
+import json
+import platform
+import random
+import subprocess
+import sys
+import time
+from datetime import date, datetime, timedelta, timezone
+
+from sqlalchemy import insert
+
+from benchmarks.common import QueryCounter, asgi_client, percentile, reset_database
+from main import app
+from src.app.database.connectivity import engine, async_session
+from src.app.models.inventory import Inventory
+from src.app.models.notification import Notification
+from src.app.models.order import Order
+from src.app.models.user import User
+from src.app.utils import security
+from src.app.utils.analytics import rebuild_sales
+
+PASSWORD = "benchmark password"
+SEED_BATCH = 10000
+
+# Slow routes get fewer requests so a full run stays short
+REQUEST_CAPS = {
+    "POST /user/login": 100, "POST /user/signup": 100, "GET /inventory/export": 20, "GET /order/export": 20,
+    "GET /notification/stream": 100,
+}
+# A stream that sends nothing for this long counts as an error
+STREAM_TIMEOUT = 5
+
+
+class Dataset:
+    def __init__(self, users: int, items: int, orders: int, notifications: int):
+        self.users = users
+        self.items = items
+        self.orders = orders
+        self.notifications = notifications
+        # Rows that scenarios may delete, kept apart from everything the other scenarios use
+        self.deletable_items = list(range(items + 1, items + 1 + 2000))
+        self.deletable_users = list(range(users + 1, users + 1 + 2000))
+
+    def user_id(self) -> int:
+        return random.randint(1, self.users)
+
+    def item_id(self) -> int:
+        return random.randint(1, self.items)
+
+
+async def seed(data: Dataset):
+    await reset_database()
+    password_hash = security.hash_password_sync(PASSWORD)
+    start_date = date.today() - timedelta(days=365)
+
+    async def bulk(model, rows):
+        async with async_session() as session:
+            for i in range(0, len(rows), SEED_BATCH):
+                await session.execute(insert(model), rows[i:i + SEED_BATCH])
+            await session.commit()
+
+    await bulk(User, [
+        {"name": f"user {i}", "email": f"user{i}@example.com", "password": password_hash,
+         "role": "admin" if i % 100 == 0 else "user"}
+        for i in range(data.users + len(data.deletable_users))
+    ])
+    await bulk(Inventory, [
+        {"name": f"item {i}", "category": f"category {i % 40}", "quantity": 10 ** 6, "threshold": 10}
+        for i in range(data.items + len(data.deletable_items))
+    ])
+    await bulk(Order, [
+        {"user_id": data.user_id(), "inventory_id": data.item_id(), "quantity": random.randint(1, 5),
+         "order_date": start_date + timedelta(days=random.randint(0, 364))}
+        for _ in range(data.orders)
+    ])
+    await bulk(Notification, [
+        {"user_id": data.user_id(), "message": f"notification {i}", "status": random.choice(["unread", "read"])}
+        for i in range(data.notifications)
+    ])
+    await rebuild_sales()
+
+
+def scenarios(data: Dataset) -> dict:
+    """
+    Request factories per route, each returning (method, url, kwargs) for one request.
+    """
+    deletable_items = iter(data.deletable_items)
+    deletable_users = iter(data.deletable_users)
+    signups = iter(range(10 ** 9))
+    today = date.today().isoformat()
+    search_terms = ["it", "item", "item 1", "categ", "category 3", "iten", "catgory"]
+
+    def csv_body():
+        rows = "".join(f"import {random.random()},imported,{random.randint(1, 100)},5\n" for _ in range(100))
+        return "name,category,quantity,threshold\n" + rows
+
+    return {
+        "POST /inventory/": lambda: ("POST", "/inventory/", {"json": {
+            "name": "new item", "category": "new", "quantity": 100, "threshold": 5}}),
+        "POST /inventory/import": lambda: ("POST", "/inventory/import", {
+            "content": csv_body().encode(), "headers": {"content-type": "text/csv"}}),
+        "POST /inventory/adjust": lambda: ("POST", "/inventory/adjust", {"json": [
+            {"inventory_id": data.item_id(), "delta": random.randint(1, 10)} for _ in range(100)]}),
+        "GET /inventory/": lambda: ("GET", "/inventory/", {"params": {"cursor": random.randint(0, data.items - 100)}}),
+        "GET /inventory/low-stock": lambda: ("GET", "/inventory/low-stock", {}),
+        "GET /inventory/reorder-suggestions": lambda: ("GET", "/inventory/reorder-suggestions", {}),
+        "GET /inventory/search": lambda: ("GET", "/inventory/search", {"params": {"q": random.choice(search_terms)}}),
+        "GET /inventory/export": lambda: ("GET", "/inventory/export", {}),
+        "GET /inventory/{id}": lambda: ("GET", f"/inventory/{data.item_id()}", {}),
+        "POST /inventory/{id}/movements": lambda: ("POST", f"/inventory/{data.item_id()}/movements", {"json": {
+            "kind": "receipt", "delta": random.randint(1, 10)}}),
+        "GET /inventory/{id}/movements": lambda: ("GET", f"/inventory/{data.item_id()}/movements", {}),
+        "GET /inventory/{id}/stock": lambda: ("GET", f"/inventory/{data.item_id()}/stock", {"params": {
+            "as_of": (datetime.now(timezone.utc) - timedelta(minutes=random.randint(0, 60))).isoformat()}}),
+        "DELETE /inventory/{id}": lambda: ("DELETE", f"/inventory/{next(deletable_items)}", {}),
+        "POST /order/": lambda: ("POST", "/order/", {"json": {
+            "user_id": data.user_id(), "inventory_id": data.item_id(), "quantity": 1, "order_date": today}}),
+        "POST /order/batch": lambda: ("POST", "/order/batch", {"json": {
+            "user_id": data.user_id(), "order_date": today,
+            "items": [{"inventory_id": data.item_id(), "quantity": 1} for _ in range(20)]}}),
+        "GET /order/": lambda: ("GET", "/order/", {"params": {"cursor": random.randint(0, data.orders - 100)}}),
+        "GET /order/?expand": lambda: ("GET", "/order/", {"params": {
+            "cursor": random.randint(0, data.orders - 100), "expand": "inventory,user"}}),
+        "GET /order/?user_id": lambda: ("GET", "/order/", {"params": {"user_id": data.user_id()}}),
+        "GET /order/export": lambda: ("GET", "/order/export", {"params": {"date_from": today}}),
+        "POST /notification/": lambda: ("POST", "/notification/", {"json": {
+            "user_id": data.user_id(), "message": "benchmark", "status": "unread"}}),
+        "GET /notification/": lambda: ("GET", "/notification/", {"params": {"user_id": data.user_id()}}),
+        "PATCH /notification/{id}": lambda: ("PATCH", f"/notification/{random.randint(1, data.notifications)}", {"json": {
+            "status": random.choice(["read", "unread"])}}),
+        "POST /notification/read": lambda: ("POST", "/notification/read", {"json": {"user_id": data.user_id()}}),
+        # Time to the first replayed event of a reconnecting EventSource
+        "GET /notification/stream": lambda: ("STREAM", "/notification/stream", {
+            "params": {"user_id": data.user_id()}, "headers": {"last-event-id": "0"}}),
+        "POST /user/signup": lambda: ("POST", "/user/signup", {"json": {
+            "name": "new user", "email": f"signup{next(signups)}@example.com", "password": PASSWORD, "role": "user"}}),
+        "POST /user/login": lambda: ("POST", "/user/login", {"params": {
+            "email": f"user{random.randint(0, data.users - 1)}@example.com", "password": PASSWORD}}),
+        "GET /user/": lambda: ("GET", "/user/", {"params": {"cursor": random.randint(0, data.users - 100)}}),
+        "GET /user/{id}/orders": lambda: ("GET", f"/user/{data.user_id()}/orders", {}),
+        "DELETE /user/{id}": lambda: ("DELETE", f"/user/{next(deletable_users)}", {}),
+        "GET /analytics/sales/items": lambda: ("GET", "/analytics/sales/items", {"params": {"period": "week"}}),
+        "GET /analytics/sales/categories": lambda: ("GET", "/analytics/sales/categories", {}),
+    }
+
+
+async def first_event(path: str, params: dict, headers: dict) -> int:
+    """
+    Open a Server-Sent Events stream on the app and disconnect after its first event.
+    httpx's ASGI transport waits for the whole body, which never ends for a stream,
+    so this speaks ASGI directly. Returns the status code, 504 when no event came in time.
+    """
+    status, received, disconnected = 500, asyncio.Event(), asyncio.Event()
+
+    async def receive():
+        if not received.is_set():
+            received.set()
+            return {"type": "http.request", "body": b"", "more_body": False}
+        await disconnected.wait()
+        return {"type": "http.disconnect"}
+
+    got_event = asyncio.Event()
+
+    async def send(message):
+        nonlocal status
+        if message["type"] == "http.response.start":
+            status = message["status"]
+        elif message["type"] == "http.response.body" and b"event:" in message.get("body", b""):
+            got_event.set()
+
+    query = "&".join(f"{key}={value}" for key, value in params.items())
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET", "scheme": "http",
+        "path": path, "raw_path": path.encode(), "query_string": query.encode(), "root_path": "",
+        "headers": [(key.encode(), value.encode()) for key, value in headers.items()],
+        "client": ("127.0.0.1", 0), "server": ("bench", 80),
+    }
+    task = asyncio.create_task(app(scope, receive, send))
+    try:
+        await asyncio.wait_for(got_event.wait(), STREAM_TIMEOUT)
+    except TimeoutError:
+        status = 504
+    disconnected.set()
+    task.cancel()
+    try:
+        await task
+    except asyncio.CancelledError:
+        pass
+    return status
+
+
+async def drive(client, factory, requests: int, concurrency: int, counter: QueryCounter) -> dict:
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies, errors = [], 0
+
+    async def one():
+        nonlocal errors
+        method, url, kwargs = factory()
+        async with semaphore:
+            start = time.perf_counter()
+            if method == "STREAM":
+                status = await first_event(url, kwargs["params"], kwargs["headers"])
+            else:
+                status = (await client.request(method, url, **kwargs)).status_code
+            latencies.append(time.perf_counter() - start)
+        if status >= 400:
+            errors += 1
+
+    queries_before = counter.count
+    start = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(requests)))
+    elapsed = time.perf_counter() - start
+    latencies.sort()
+    return {
+        "requests": requests,
+        "errors": errors,
+        "rps": round(requests / elapsed, 2),
+        "p50_ms": round(percentile(latencies, 50) * 1000, 3),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 3),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 3),
+        "queries_per_request": round((counter.count - queries_before) / requests, 2),
+    }
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "HEAD"], text=True, stderr=subprocess.DEVNULL).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+async def run(args):
+    data = Dataset(args.users, args.items, args.orders, args.notifications)
+    print(f"Seeding {args.users} users, {args.items} items, {args.orders} orders, "
+          f"{args.notifications} notifications...", file=sys.stderr)
+    await seed(data)
+
+    counter = QueryCounter()
+    results = []
+    selected = scenarios(data)
+    if args.only:
+        selected = {name: factory for name, factory in selected.items() if name in args.only}
+
+    async with asgi_client() as client:
+        for name, factory in selected.items():
+            requests = min(args.requests, REQUEST_CAPS.get(name, args.requests))
+            result = await drive(client, factory, requests, args.concurrency, counter)
+            results.append({"route": name, **result})
+            print(f"{name:<32} {result['rps']:>9.1f} req/s  p50={result['p50_ms']:.1f}ms  "
+                  f"p95={result['p95_ms']:.1f}ms  p99={result['p99_ms']:.1f}ms  "
+                  f"queries/req={result['queries_per_request']}  errors={result['errors']}", file=sys.stderr)
+
+    report = {
+        "commit": git_commit(),
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "database": engine.dialect.name,
+        "python": platform.python_version(),
+        "dataset": {"users": args.users, "items": args.items, "orders": args.orders, "notifications": args.notifications},
+        "concurrency": args.concurrency,
+        "results": results,
+    }
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output + "\n")
+    else:
+        print(output)
+    await engine.dispose()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--items", type=int, default=5000)
+    parser.add_argument("--orders", type=int, default=50000)
+    parser.add_argument("--notifications", type=int, default=10000)
+    parser.add_argument("--requests", type=int, default=500, help="requests per route")
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--only", nargs="+", help="route names to run, as printed in the report")
+    parser.add_argument("--output", help="write the JSON report here instead of stdout")
+    args = parser.parse_args()
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
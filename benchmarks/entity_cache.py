@@ -0,0 +1,84 @@
+"""
+Latency of GET /inventory/{id} with and without the entity cache.
+
+    python -m benchmarks.entity_cache --items 1000 --requests 20000
+
+Uses a local SQLite database unless DATABASE_URL is set.
+"""
+import argparse
+import asyncio
+import random
+import statistics
+import time
+
+from sqlalchemy import insert
+
+from benchmarks.common import asgi_client, reset_database
+from src.app.database.connectivity import engine, async_session
+from src.app.models.inventory import Inventory
+from src.app.utils.cache import MemoryBackend, inventory_cache
+
+
+async def setup(items: int):
+    await reset_database()
+    async with async_session() as session:
+        await session.execute(insert(Inventory), [
+            {"name": f"item {i}", "category": f"category {i % 20}", "quantity": 100, "threshold": 10}
+            for i in range(items)
+        ])
+        await session.commit()
+
+
+async def measure(client, ids, concurrency: int) -> dict:
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+
+    async def fetch(inventory_id):
+        async with semaphore:
+            start = time.perf_counter()
+            response = await client.get(f"/inventory/{inventory_id}")
+            latencies.append(time.perf_counter() - start)
+            assert response.status_code == 200
+
+    start = time.perf_counter()
+    await asyncio.gather(*(fetch(i) for i in ids))
+    elapsed = time.perf_counter() - start
+    latencies.sort()
+    return {
+        "rps": len(ids) / elapsed,
+        "p50_ms": statistics.median(latencies) * 1000,
+        "p99_ms": latencies[int(len(latencies) * 0.99) - 1] * 1000,
+    }
+
+
+async def run(items: int, requests: int, hot: int, concurrency: int):
+    await setup(items)
+    # Skewed access: most lookups hit a small set of hot SKUs
+    ids = [random.randint(1, hot) if random.random() < 0.9 else random.randint(1, items) for _ in range(requests)]
+
+    async with asgi_client() as client:
+        # A zero TTL makes every lookup a miss
+        inventory_cache.backend = MemoryBackend(ttl=0)
+        uncached = await measure(client, ids, concurrency)
+        inventory_cache.backend = MemoryBackend()
+        inventory_cache.hits = inventory_cache.misses = 0
+        cached = await measure(client, ids, concurrency)
+
+    for label, result in (("uncached", uncached), ("cached", cached)):
+        print(f"{label:>8}: {result['rps']:.0f} req/s  p50={result['p50_ms']:.2f}ms  p99={result['p99_ms']:.2f}ms")
+    print(f"cache: {inventory_cache.stats()}")
+    await engine.dispose()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--items", type=int, default=1000)
+    parser.add_argument("--requests", type=int, default=20000)
+    parser.add_argument("--hot", type=int, default=50)
+    parser.add_argument("--concurrency", type=int, default=50)
+    args = parser.parse_args()
+    asyncio.run(run(args.items, args.requests, args.hot, args.concurrency))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+"""
+Latency of GET /inventory/search for prefix and misspelled queries, against a
+LIKE '%q%' query, which scans the whole table when few names match.
+
+    python -m benchmarks.inventory_search --items 500000 --queries 500
+
+Uses a local SQLite database unless DATABASE_URL is set.
+"""
+import argparse
+import asyncio
+import random
+import time
+
+from sqlalchemy import insert, select
+
+from benchmarks.common import asgi_client, percentile, reset_database
+from src.app.database.connectivity import engine, async_session
+from src.app.models.inventory import Inventory
+from src.app.utils.search import search_index
+
+WORDS = (
+    "apple banana cherry chocolate coffee cookie cracker cream butter cheese chicken "
+    "coconut garlic ginger honey lemon mango milk noodle olive orange pasta peanut "
+    "pepper potato rice salmon salt sauce soda spinach strawberry sugar tea tomato "
+    "tuna vanilla vinegar walnut water yogurt"
+).split()
+BRANDS = "acme fresco nordic golden sunny valley harvest prime urban royal".split()
+SIZES = "small medium large family 250g 500g 1kg 2l".split()
+CATEGORIES = "Bakery Beverages Dairy Frozen Pantry Produce Snacks Household".split()
+
+
+def item_name(rng: random.Random, i: int) -> str:
+    return f"{rng.choice(BRANDS)} {rng.choice(WORDS)} {rng.choice(WORDS)} {rng.choice(SIZES)} {i}"
+
+
+def misspell(rng: random.Random, word: str) -> str:
+    i = rng.randrange(1, len(word) - 1)
+    return word[:i] + word[i + 1:] if rng.random() < 0.5 else word[:i] + word[i + 1] + word[i] + word[i + 2:]
+
+
+async def setup(items: int):
+    await reset_database()
+    rng = random.Random(1)
+    async with async_session() as session:
+        for start in range(0, items, 50000):
+            await session.execute(insert(Inventory), [
+                {"name": item_name(rng, i), "category": rng.choice(CATEGORIES), "quantity": 100, "threshold": 10}
+                for i in range(start, min(items, start + 50000))
+            ])
+        await session.commit()
+
+
+async def measure(client, queries) -> dict:
+    latencies = []
+    results = 0
+    for q in queries:
+        start = time.perf_counter()
+        response = await client.get("/inventory/search", params={"q": q, "limit": 20})
+        latencies.append(time.perf_counter() - start)
+        assert response.status_code == 200, response.text
+        results += len(response.json())
+    latencies.sort()
+    return {
+        "p50_ms": percentile(latencies, 50) * 1000,
+        "p99_ms": percentile(latencies, 99) * 1000,
+        "results": results / len(queries),
+    }
+
+
+async def measure_scan(queries) -> dict:
+    latencies = []
+    async with async_session() as session:
+        for q in queries:
+            start = time.perf_counter()
+            await session.execute(select(Inventory).where(Inventory.name.ilike(f"%{q}%")).limit(20))
+            latencies.append(time.perf_counter() - start)
+    latencies.sort()
+    return {"p50_ms": percentile(latencies, 50) * 1000, "p99_ms": percentile(latencies, 99) * 1000, "results": 0}
+
+
+async def run(items: int, queries: int):
+    await setup(items)
+    rng = random.Random(2)
+    words = [rng.choice(WORDS + BRANDS) for _ in range(queries)]
+    prefix = [word[:rng.randint(2, len(word))] for word in words]
+    phrases = [f"{rng.choice(BRANDS)} {rng.choice(WORDS)[:3]}" for _ in range(queries)]
+    typos = [misspell(rng, word) for word in words]
+
+    async with asgi_client() as client:
+        start = time.perf_counter()
+        search_index.start()
+        # Answered by prefix_search while the index builds in the background
+        building = await measure(client, prefix[:max(1, queries // 10)])
+        await search_index.task
+        print(f"index build: {time.perf_counter() - start:.2f}s  {search_index.stats()}")
+        results = {
+            "building": building,
+            "prefix": await measure(client, prefix),
+            "two words": await measure(client, phrases),
+            "typo": await measure(client, typos),
+        }
+    results["LIKE typo"] = await measure_scan(typos[:max(1, queries // 10)])
+
+    for label, result in results.items():
+        print(f"{label:>10}: p50={result['p50_ms']:.2f}ms  p99={result['p99_ms']:.2f}ms  results/query={result['results']:.1f}")
+    await engine.dispose()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--items", type=int, default=500000)
+    parser.add_argument("--queries", type=int, default=500)
+    args = parser.parse_args()
+    asyncio.run(run(args.items, args.queries))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""
+Requests per second and memory allocated per request for GET /inventory with the
+standard response_model path versus the fast JSON path (FAST_JSON_LISTS).
+
+    python -m benchmarks.list_serialization --sizes 1000 10000 100000
+
+Uses a local SQLite database unless DATABASE_URL is set.
+"""
+import argparse
+import asyncio
+import os
+import time
+import tracemalloc
+
+# Allow single pages large enough for the biggest benchmark size
+os.environ.setdefault("MAX_PAGE_SIZE", "100000")
+
+from sqlalchemy import insert
+
+from benchmarks.common import asgi_client, reset_database
+from src.app.database.connectivity import engine, async_session
+from src.app.models.inventory import Inventory
+from src.app.utils import pagination
+
+
+async def setup(rows: int):
+    await reset_database()
+    async with async_session() as session:
+        for start in range(0, rows, 10000):
+            await session.execute(insert(Inventory), [
+                {"name": f"item {i}", "category": f"category {i % 50}", "quantity": i % 500, "threshold": 10}
+                for i in range(start, min(start + 10000, rows))
+            ])
+        await session.commit()
+
+
+async def measure(client, size: int, seconds: float) -> dict:
+    async def fetch():
+        response = await client.get("/inventory/", params={"limit": size})
+        assert response.status_code == 200 and len(response.json()) == size
+
+    # One traced request for the allocation figure, untraced requests for throughput
+    tracemalloc.start()
+    await fetch()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    requests, start = 0, time.perf_counter()
+    while time.perf_counter() - start < seconds:
+        await fetch()
+        requests += 1
+    elapsed = time.perf_counter() - start
+    return {"rps": requests / elapsed, "peak_mb": peak / 2 ** 20}
+
+
+async def run(sizes: list[int], seconds: float):
+    await setup(max(sizes))
+    async with asgi_client() as client:
+        print(f"{'rows':>8} {'path':>9} {'req/s':>9} {'peak MB':>9}")
+        for size in sizes:
+            for label, fast in (("standard", False), ("fast", True)):
+                pagination.FAST_JSON_LISTS = fast
+                result = await measure(client, size, seconds)
+                print(f"{size:>8} {label:>9} {result['rps']:>9.2f} {result['peak_mb']:>9.1f}")
+    await engine.dispose()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--seconds", type=float, default=5.0)
+    args = parser.parse_args()
+    asyncio.run(run(args.sizes, args.seconds))
+
+
+if __name__ == "__main__":
+    main()
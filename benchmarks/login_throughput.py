@@ -0,0 +1,100 @@
+"""
+Login throughput and event-loop responsiveness with password hashing in the worker pool
+versus inline on the event loop.
+
+    python -m benchmarks.login_throughput --users 50 --logins 400 --concurrency 32
+
+Uses a local SQLite database unless DATABASE_URL is set.
+"""
+import argparse
+import asyncio
+import time
+from importlib import import_module
+
+from sqlalchemy import insert
+
+from benchmarks.common import asgi_client, reset_database
+from src.app.database.connectivity import engine, async_session
+from src.app.models.user import User
+from src.app.utils import security
+
+# The routers package re-exports the APIRouter objects under the module names
+user_routes = import_module("src.app.routers.user")
+
+PASSWORD = "correct horse battery staple"
+
+
+async def setup(users: int):
+    await reset_database()
+    password_hash = security.hash_password_sync(PASSWORD)
+    async with async_session() as session:
+        await session.execute(insert(User), [
+            {"name": f"user {i}", "email": f"user{i}@example.com", "password": password_hash, "role": "user"}
+            for i in range(users)
+        ])
+        await session.commit()
+
+
+async def measure_loop_lag(stop: asyncio.Event, lags: list):
+    """
+    Wakes up every 10ms and records how late it was, i.e. how long the loop was blocked.
+    """
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(0.01)
+        lags.append(time.perf_counter() - start - 0.01)
+
+
+async def measure(client, users: int, logins: int, concurrency: int) -> dict:
+    semaphore = asyncio.Semaphore(concurrency)
+    stop, lags = asyncio.Event(), []
+    ticker = asyncio.create_task(measure_loop_lag(stop, lags))
+
+    async def login(i):
+        async with semaphore:
+            response = await client.post("/user/login", params={"email": f"user{i % users}@example.com", "password": PASSWORD})
+            assert response.status_code == 200, response.text
+
+    start = time.perf_counter()
+    await asyncio.gather(*(login(i) for i in range(logins)))
+    elapsed = time.perf_counter() - start
+    stop.set()
+    await ticker
+    lags.sort()
+    return {
+        "logins_per_second": logins / elapsed,
+        "loop_lag_p99_ms": lags[int(len(lags) * 0.99) - 1] * 1000 if lags else 0.0,
+        "loop_lag_max_ms": lags[-1] * 1000 if lags else 0.0,
+    }
+
+
+async def run(users: int, logins: int, concurrency: int):
+    await setup(users)
+    async with asgi_client() as client:
+        pooled = await measure(client, users, logins, concurrency)
+
+        async def verify_inline(password, stored):
+            return security.verify_password_sync(password, stored)
+
+        user_routes.verify_password = verify_inline
+        inline = await measure(client, users, logins, concurrency)
+        user_routes.verify_password = security.verify_password
+
+    print(f"worker threads: {security.hash_executor._max_workers}")
+    for label, result in (("pool", pooled), ("inline", inline)):
+        print(f"{label:>6}: {result['logins_per_second']:.1f} logins/s  "
+              f"loop lag p99={result['loop_lag_p99_ms']:.1f}ms max={result['loop_lag_max_ms']:.1f}ms")
+    await engine.dispose()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--users", type=int, default=50)
+    parser.add_argument("--logins", type=int, default=400)
+    parser.add_argument("--concurrency", type=int, default=32)
+    args = parser.parse_args()
+    asyncio.run(run(args.users, args.logins, args.concurrency))
+
+
+if __name__ == "__main__":
+    main()
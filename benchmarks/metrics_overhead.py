@@ -0,0 +1,80 @@
+"""
+Per-request overhead of the /metrics instrumentation (request middleware and
+SQL statement hooks), measured on GET / and GET /inventory/{id}.
+
+    python -m benchmarks.metrics_overhead --requests 5000
+
+Uses a local SQLite database unless DATABASE_URL is set.
+"""
+import argparse
+import asyncio
+import random
+import time
+
+from sqlalchemy import insert
+
+from benchmarks.common import asgi_client, percentile, reset_database
+from src.app.database.connectivity import engine, async_session
+from src.app.models.inventory import Inventory
+from src.app.utils import metrics
+from src.app.utils.cache import MemoryBackend, inventory_cache
+
+
+async def setup(items: int):
+    await reset_database()
+    async with async_session() as session:
+        await session.execute(insert(Inventory), [
+            {"name": f"item {i}", "category": f"category {i % 20}", "quantity": 100, "threshold": 10}
+            for i in range(items)
+        ])
+        await session.commit()
+
+
+async def measure(client, urls: list[str]) -> dict:
+    latencies = []
+    start = time.perf_counter()
+    for url in urls:
+        request_start = time.perf_counter()
+        response = await client.get(url)
+        latencies.append(time.perf_counter() - request_start)
+        assert response.status_code == 200
+    elapsed = time.perf_counter() - start
+    latencies.sort()
+    return {
+        "rps": len(urls) / elapsed,
+        "p50_us": percentile(latencies, 50) * 10 ** 6,
+        "p99_us": percentile(latencies, 99) * 10 ** 6,
+    }
+
+
+async def run(items: int, requests: int):
+    await setup(items)
+    # A zero TTL keeps the entity cache out of the way so every lookup runs a query
+    inventory_cache.backend = MemoryBackend(ttl=0)
+    routes = {
+        "GET /": ["/"] * requests,
+        "GET /inventory/{id}": [f"/inventory/{random.randint(1, items)}" for _ in range(requests)],
+    }
+
+    async with asgi_client() as client:
+        print(f"{'route':<20} {'metrics':>8} {'req/s':>9} {'p50 us':>9} {'p99 us':>9}")
+        for name, urls in routes.items():
+            # Warm up connections and route lookups before timing
+            await measure(client, urls[:100])
+            for label, enabled in (("off", False), ("on", True)):
+                metrics.METRICS_ENABLED = enabled
+                result = await measure(client, urls)
+                print(f"{name:<20} {label:>8} {result['rps']:>9.0f} {result['p50_us']:>9.0f} {result['p99_us']:>9.0f}")
+    await engine.dispose()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--items", type=int, default=1000)
+    parser.add_argument("--requests", type=int, default=5000)
+    args = parser.parse_args()
+    asyncio.run(run(args.items, args.requests))
+
+
+if __name__ == "__main__":
+    main()
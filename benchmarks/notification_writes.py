@@ -0,0 +1,103 @@
+"""
+Notification insert throughput: one transaction per notification (add, commit,
+refresh), compared with the write-behind buffer, both waiting for each write to
+be committed and queueing without waiting.
+
+    python -m benchmarks.notification_writes --notifications 5000 --concurrency 50
+
+Uses a local SQLite database unless DATABASE_URL is set.
+"""
+import argparse
+import asyncio
+import time
+
+from sqlalchemy import delete, func
+from sqlmodel import select
+
+from benchmarks.common import reset_database
+from src.app.database.connectivity import engine, async_session
+from src.app.models.notification import Notification
+from src.app.models.user import User
+from src.app.utils.writebehind import NotificationWriter
+
+
+async def setup() -> int:
+    await reset_database()
+    async with async_session() as session:
+        user = User(name="bench", email="bench@example.com", password="bench", role="admin")
+        session.add(user)
+        await session.commit()
+        return user.user_id
+
+
+async def count_and_clear() -> int:
+    async with async_session() as session:
+        count = (await session.execute(select(func.count()).select_from(Notification))).scalar_one()
+        await session.execute(delete(Notification))
+        await session.commit()
+    return count
+
+
+async def per_row(row: dict):
+    async with async_session() as session:
+        notification = Notification(**row)
+        session.add(notification)
+        await session.commit()
+        await session.refresh(notification)
+
+
+async def timed(name: str, notifications: int, concurrency: int, write):
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one(i: int):
+        async with semaphore:
+            await write(i)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(notifications)))
+    return name, time.perf_counter() - start
+
+
+async def run(args):
+    user_id = await setup()
+
+    def row(i: int) -> dict:
+        return {"user_id": user_id, "message": f"notification {i}", "status": "unread"}
+
+    results = [await timed("per-row transaction", args.notifications, args.concurrency, lambda i: per_row(row(i)))]
+    written = [await count_and_clear()]
+
+    writer = NotificationWriter()
+    writer.start()
+    results.append(await timed(
+        "write-behind, durable", args.notifications, args.concurrency, lambda i: writer.write([row(i)], durable=True),
+    ))
+    await writer.stop()
+    written.append(await count_and_clear())
+
+    # Queue everything, then time until the last row is committed
+    writer = NotificationWriter()
+    writer.start()
+    start = time.perf_counter()
+    for i in range(args.notifications):
+        await writer.write([row(i)])
+    await writer.stop()
+    results.append(("write-behind, queued", time.perf_counter() - start))
+    written.append(await count_and_clear())
+
+    print(f"notifications={args.notifications} concurrency={args.concurrency}")
+    for (name, elapsed), count in zip(results, written):
+        print(f"{name:24} {elapsed:8.2f}s {count / elapsed:10.0f} rows/s  ({count} written)")
+    await engine.dispose()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--notifications", type=int, default=5000)
+    parser.add_argument("--concurrency", type=int, default=50, help="writers waiting on a commit at once")
+    args = parser.parse_args()
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+"""
+Time to compute reorder suggestions for a large catalogue: loading stock and
+per-item sales totals from the daily rollup, and the vectorized computation,
+compared with a per-item Python loop over the same data.
+
+    python -m benchmarks.reorder_suggestions --skus 100000 --days 730 --density 0.05
+
+Uses a local SQLite database unless DATABASE_URL is set.
+"""
+import argparse
+import asyncio
+import math
+import random
+import sys
+import time
+from datetime import date, timedelta
+from statistics import NormalDist
+
+import numpy as np
+from sqlalchemy import insert
+
+from benchmarks.common import reset_database
+from src.app.database.connectivity import engine, async_session
+from src.app.models.inventory import Inventory
+from src.app.models.sales import ItemDailySales
+from src.app.utils.reorder import compute_suggestions, load_inputs
+from src.app.database.settings import REORDER_LEAD_DAYS, REORDER_REVIEW_DAYS, REORDER_SERVICE_LEVEL
+
+SEED_BATCH = 50000
+
+
+async def seed(skus: int, days: int, density: float):
+    await reset_database()
+    async with async_session() as session:
+        for start in range(0, skus, SEED_BATCH):
+            await session.execute(insert(Inventory), [
+                {"name": f"item {i}", "category": f"category {i % 200}", "quantity": random.randint(0, 500), "threshold": 10}
+                for i in range(start, min(start + SEED_BATCH, skus))
+            ])
+        await session.commit()
+
+    # Each item sells on roughly `density` of the days, popular items more often
+    rng = np.random.default_rng(1)
+    today = date.today()
+    rows = []
+    async with async_session() as session:
+        for inventory_id in range(1, skus + 1):
+            rate = min(1.0, density * rng.pareto(2.0) + density / 2)
+            sold_days = np.flatnonzero(rng.random(days) < rate)
+            units = rng.poisson(3, len(sold_days)) + 1
+            rows.extend(
+                {"inventory_id": inventory_id, "day": today - timedelta(days=int(d)), "units": int(u), "orders": 1}
+                for d, u in zip(sold_days, units)
+            )
+            if len(rows) >= SEED_BATCH:
+                await session.execute(insert(ItemDailySales), rows)
+                rows = []
+        if rows:
+            await session.execute(insert(ItemDailySales), rows)
+        await session.commit()
+
+
+def loop_suggestions(items, days: int) -> dict:
+    """
+    The same arithmetic one item at a time, for comparison.
+    """
+    z = NormalDist().inv_cdf(REORDER_SERVICE_LEVEL / 100)
+    suggestions = {}
+    for inventory_id, quantity, total, squares in zip(
+        items["inventory_id"].tolist(), items["quantity"].tolist(), items["total"].tolist(), items["squares"].tolist()
+    ):
+        mean = total / days
+        variance = max((squares - total * mean) / (days - 1), 0.0)
+        safety = z * math.sqrt(variance) * math.sqrt(REORDER_LEAD_DAYS)
+        target = mean * (REORDER_LEAD_DAYS + REORDER_REVIEW_DAYS) + safety
+        suggestions[inventory_id] = (math.ceil(mean * REORDER_LEAD_DAYS + safety), max(math.ceil(target - quantity), 0))
+    return suggestions
+
+
+async def run(args):
+    if not args.skip_seed:
+        print(f"Seeding {args.skus} items with {args.days} days of sales...", file=sys.stderr)
+        start = time.perf_counter()
+        await seed(args.skus, args.days, args.density)
+        print(f"seeded in {time.perf_counter() - start:.1f}s", file=sys.stderr)
+
+    start = time.perf_counter()
+    items = await load_inputs(args.days)
+    load_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    suggestions = compute_suggestions(items, args.days)
+    compute_seconds = time.perf_counter() - start
+
+    print(f"items: {len(items)}  needing reorder: {int(suggestions['needs_reorder'].sum())}")
+    print(f"load:       {load_seconds:8.3f}s")
+    print(f"vectorized: {compute_seconds:8.3f}s")
+    if args.compare_loop:
+        start = time.perf_counter()
+        loop_suggestions(items, args.days)
+        print(f"loop:       {time.perf_counter() - start:8.3f}s")
+    await engine.dispose()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--skus", type=int, default=100000)
+    parser.add_argument("--days", type=int, default=730, help="days of sales history, also the demand window")
+    parser.add_argument("--density", type=float, default=0.05, help="typical share of days an item sells on")
+    parser.add_argument("--skip-seed", action="store_true", help="reuse the data from the previous run")
+    parser.add_argument("--compare-loop", action="store_true", help="also time a per-item Python loop")
+    args = parser.parse_args()
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+"""
+Concurrency stress test for order placement.
+
+Fires many parallel POST /order requests at a single inventory item and checks
+that stock never goes negative and that exactly the available units were sold.
+
+    python -m benchmarks.stock_reservation --orders 2000 --stock 500
+
+Uses a local SQLite database unless DATABASE_URL is set.
+"""
+import argparse
+import asyncio
+import time
+
+from benchmarks.common import asgi_client, reset_database
+from src.app.database.connectivity import engine, async_session
+from src.app.models.inventory import Inventory
+from src.app.models.user import User
+
+
+async def setup(stock: int) -> tuple[int, int]:
+    await reset_database()
+    async with async_session() as session:
+        user = User(name="bench", email="bench@example.com", password="bench", role="user")
+        item = Inventory(name="hot item", category="bench", quantity=stock, threshold=0)
+        session.add_all([user, item])
+        await session.commit()
+        return user.user_id, item.inventory_id
+
+
+async def run(orders: int, stock: int, concurrency: int):
+    user_id, inventory_id = await setup(stock)
+    semaphore = asyncio.Semaphore(concurrency)
+    statuses = {}
+
+    async with asgi_client() as client:
+        async def place():
+            async with semaphore:
+                response = await client.post("/order/", json={
+                    "user_id": user_id,
+                    "inventory_id": inventory_id,
+                    "quantity": 1,
+                    "order_date": "2024-12-10",
+                })
+                statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+
+        start = time.perf_counter()
+        await asyncio.gather(*(place() for _ in range(orders)))
+        elapsed = time.perf_counter() - start
+
+    async with async_session() as session:
+        remaining = (await session.get(Inventory, inventory_id)).quantity
+
+    sold = statuses.get(201, 0)
+    print(f"orders={orders} concurrency={concurrency} elapsed={elapsed:.2f}s rate={orders / elapsed:.0f} req/s")
+    print(f"statuses={statuses} sold={sold} remaining={remaining}")
+    assert remaining >= 0, "stock went negative"
+    assert sold + remaining == stock, "sold units don't match the stock decrement"
+    assert sold == min(orders, stock), "orders were rejected while stock was available"
+    await engine.dispose()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--orders", type=int, default=2000)
+    parser.add_argument("--stock", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=100)
+    args = parser.parse_args()
+    asyncio.run(run(args.orders, args.stock, args.concurrency))
+
+
+if __name__ == "__main__":
+    main()
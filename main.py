@@ -1,24 +1,89 @@
 from fastapi import FastAPI
-from src.app.routers import inventory, order, notification, user
-from src.app.database.connectivity import engine
-from sqlmodel import SQLModel
+from fastapi.responses import PlainTextResponse
+from src.app.routers import inventory, order, notification, user, analytics
+from src.app.database.connectivity import engine, read_engine, pool_status
+from src.app.utils.admission import AdmissionMiddleware, admission
+from src.app.utils.alerts import low_stock_monitor
+from src.app.utils.archive import order_archiver
+from src.app.utils.cache import cache_stats
+from src.app.utils.ledger import stock_snapshotter
+from src.app.utils.metrics import MetricsMiddleware, render_metrics
+from src.app.utils.middleware import ReadReplicaMiddleware
+from src.app.utils.notify import notification_broker
+from src.app.utils.querywatch import QueryWatchMiddleware
+from src.app.utils.reorder import reorder_planner
+from src.app.utils.search import search_index
+from src.app.utils.writebehind import notification_writer
 
 app = FastAPI()
+app.add_middleware(ReadReplicaMiddleware)
+# Inside the metrics middleware so shed requests are still counted and timed
+app.add_middleware(AdmissionMiddleware)
+app.add_middleware(MetricsMiddleware)
+app.add_middleware(QueryWatchMiddleware)
 
 @app.on_event("startup")
 async def on_startup():
-    async with engine.begin() as conn:
-        await conn.run_sync(SQLModel.metadata.create_all)
+    notification_writer.start()
+    low_stock_monitor.start()
+    reorder_planner.start()
+    stock_snapshotter.start()
+    order_archiver.start()
+    notification_broker.start()
+    search_index.start()
+
+@app.on_event("shutdown")
+async def on_shutdown():
+    await low_stock_monitor.stop()
+    await reorder_planner.stop()
+    await stock_snapshotter.stop()
+    await order_archiver.stop()
+    # After the monitor, which hands its last alerts to the writer
+    await notification_writer.stop()
+    await notification_broker.stop()
+    await search_index.stop()
 
 app.include_router(inventory, prefix="/inventory", tags=["Inventory"])
 app.include_router(order, prefix="/order", tags=["Order"])
 app.include_router(notification, prefix="/notification", tags=["Notification"])
 app.include_router(user, prefix="/user", tags=["User"])
+app.include_router(analytics, prefix="/analytics", tags=["Analytics"])
 
 @app.get("/")
 def root():
     return {"message": "Mart Management System is running!"}
 
+@app.get("/db/pool")
+def db_pool():
+    """
+    Connection pool usage, checkout wait times and saturation, for tuning the pool settings.
+    """
+    status = {"primary": pool_status(engine)}
+    if read_engine is not engine:
+        status["replica"] = pool_status(read_engine)
+    return status
+
+@app.get("/metrics", response_class=PlainTextResponse)
+def metrics():
+    """
+    Request, database and connection pool metrics in the Prometheus text format.
+    """
+    return PlainTextResponse(render_metrics(), media_type="text/plain; version=0.0.4")
+
+@app.get("/admission/stats")
+def admission_statistics():
+    """
+    Admission control slots in use, queued requests, and requests admitted and shed.
+    """
+    return admission.stats()
+
+@app.get("/cache/stats")
+def cache_statistics():
+    """
+    Hit and miss counters of the entity caches.
+    """
+    return cache_stats()
+
 
 
 # from src.app.routers.main_routes import app
@@ -1,24 +1,101 @@
-import os
-from sqlalchemy.ext.asyncio import create_async_engine
-from dotenv import load_dotenv
+import time
+from contextvars import ContextVar
 
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy import make_url
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.orm import Session, sessionmaker
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+from src.app.database.settings import (
+    DATABASE_URL, DATABASE_READ_URL, DB_ECHO, DB_POOL_SIZE, DB_MAX_OVERFLOW, DB_POOL_TIMEOUT,
+    DB_POOL_RECYCLE, DB_POOL_PRE_PING, DB_STATEMENT_CACHE_SIZE,
+)
 
 
-env_path = os.path.join(os.getcwd(), "src/app/assets/.env")
+class TimedQueuePool(AsyncAdaptedQueuePool):
+    """
+    Queue pool that records how long callers wait to check out a connection.
+    """
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.wait_count = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+        self.timeouts = 0
 
-# Load the environment variables
-load_dotenv(env_path)
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        except Exception:
+            self.timeouts += 1
+            raise
+        finally:
+            waited = time.perf_counter() - start
+            self.wait_count += 1
+            self.wait_total += waited
+            self.wait_max = max(self.wait_max, waited)
 
-# Get the DATABASE_URL environment variable
-DATABASE_URL = os.getenv('DATABASE_URL')
 
-# print(env_path)
-# print(DATABASE_URL)
+def engine_options(url: str) -> dict:
+    options = {"echo": DB_ECHO, "pool_pre_ping": DB_POOL_PRE_PING}
+    url = make_url(url)
+    if url.get_backend_name() == "sqlite" and url.database in (None, "", ":memory:"):
+        # In-memory SQLite uses a single static connection
+        return options
+    options.update(
+        poolclass=TimedQueuePool,
+        pool_size=DB_POOL_SIZE,
+        max_overflow=DB_MAX_OVERFLOW,
+        pool_timeout=DB_POOL_TIMEOUT,
+        pool_recycle=DB_POOL_RECYCLE,
+    )
+    if url.get_driver_name() == "asyncpg":
+        options["connect_args"] = {"prepared_statement_cache_size": DB_STATEMENT_CACHE_SIZE}
+    return options
+
 
 # Create an engine for asynchronous communication with the database
-engine = create_async_engine(DATABASE_URL, echo=True)
+engine = create_async_engine(DATABASE_URL, **engine_options(DATABASE_URL))
+
+# Read-only engine for the replica, falls back to the primary
+read_engine = create_async_engine(DATABASE_READ_URL, **engine_options(DATABASE_READ_URL)) if DATABASE_READ_URL else engine
+
+# Set for the duration of read-only requests (see ReadReplicaMiddleware)
+read_only = ContextVar("read_only", default=False)
+
+
+class RoutingSession(Session):
+    """
+    Sends statements to the replica while a read-only request is in progress,
+    everything else (and anything flushed) goes to the primary.
+    """
+    def get_bind(self, mapper=None, clause=None, **kwargs):
+        if read_only.get() and not self._flushing:
+            return read_engine.sync_engine
+        return engine.sync_engine
+
 
 # Create an async session maker for handling database sessions
-async_session = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+async_session = sessionmaker(class_=AsyncSession, sync_session_class=RoutingSession, expire_on_commit=False)
+
+
+def pool_status(db_engine) -> dict:
+    pool = db_engine.pool
+    if not isinstance(pool, TimedQueuePool):
+        return {"pool": type(pool).__name__}
+    # A negative max_overflow means the pool can grow without limit
+    capacity = pool.size() + pool._max_overflow if pool._max_overflow >= 0 else 0
+    return {
+        "pool": type(pool).__name__,
+        "size": pool.size(),
+        "checked_in": pool.checkedin(),
+        "checked_out": pool.checkedout(),
+        "overflow": max(pool.overflow(), 0),
+        "saturation": pool.checkedout() / capacity if capacity > 0 else None,
+        "checkout_count": pool.wait_count,
+        "checkout_wait_avg": pool.wait_total / pool.wait_count if pool.wait_count else 0.0,
+        "checkout_wait_max": pool.wait_max,
+        "checkout_timeouts": pool.timeouts,
+    }
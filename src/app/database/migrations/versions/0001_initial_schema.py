@@ -0,0 +1,66 @@
+"""Initial schema, as previously created by SQLModel.metadata.create_all
+
+Databases created before migrations were introduced should be stamped with
+this revision (`alembic stamp 0001`) and then upgraded.
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+
+revision = "0001"
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "inventory",
+        sa.Column("inventory_id", sa.Integer(), nullable=False),
+        sa.Column("name", sqlmodel.AutoString(), nullable=False),
+        sa.Column("category", sqlmodel.AutoString(), nullable=False),
+        sa.Column("quantity", sa.Integer(), nullable=False),
+        sa.Column("threshold", sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint("inventory_id"),
+    )
+    op.create_table(
+        "user",
+        sa.Column("user_id", sa.Integer(), nullable=False),
+        sa.Column("name", sqlmodel.AutoString(), nullable=False),
+        sa.Column("email", sqlmodel.AutoString(), nullable=False),
+        sa.Column("password", sqlmodel.AutoString(), nullable=False),
+        sa.Column("role", sqlmodel.AutoString(), nullable=False),
+        sa.PrimaryKeyConstraint("user_id"),
+    )
+    op.create_table(
+        "notification",
+        sa.Column("notification_id", sa.Integer(), nullable=False),
+        sa.Column("user_id", sa.Integer(), nullable=False),
+        sa.Column("message", sqlmodel.AutoString(), nullable=False),
+        sa.Column("status", sqlmodel.AutoString(), nullable=False),
+        sa.ForeignKeyConstraint(["user_id"], ["user.user_id"]),
+        sa.PrimaryKeyConstraint("notification_id"),
+    )
+    op.create_table(
+        "order",
+        sa.Column("order_id", sa.Integer(), nullable=False),
+        sa.Column("user_id", sa.Integer(), nullable=False),
+        sa.Column("inventory_id", sa.Integer(), nullable=False),
+        sa.Column("quantity", sa.Integer(), nullable=False),
+        sa.Column("order_date", sqlmodel.AutoString(), nullable=False),
+        sa.ForeignKeyConstraint(["inventory_id"], ["inventory.inventory_id"]),
+        sa.ForeignKeyConstraint(["user_id"], ["user.user_id"]),
+        sa.PrimaryKeyConstraint("order_id"),
+    )
+
+
+def downgrade():
+    op.drop_table("order")
+    op.drop_table("notification")
+    op.drop_table("user")
+    op.drop_table("inventory")
@@ -0,0 +1,51 @@
+"""Secondary indexes, unique user email and a DATE order_date
+
+On Postgres the indexes are built with CREATE INDEX CONCURRENTLY so live
+tables stay writable while they build.
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+
+revision = "0002"
+down_revision = "0001"
+branch_labels = None
+depends_on = None
+
+INDEXES = [
+    ("ix_user_email", "user", ["email"], True),
+    ("ix_order_user_id", "order", ["user_id"], False),
+    ("ix_order_inventory_id", "order", ["inventory_id"], False),
+    ("ix_order_order_date", "order", ["order_date"], False),
+    ("ix_notification_user_id", "notification", ["user_id"], False),
+    ("ix_inventory_category", "inventory", ["category"], False),
+]
+
+
+def upgrade():
+    if op.get_bind().dialect.name == "postgresql":
+        op.alter_column(
+            "order", "order_date",
+            type_=sa.Date(), existing_type=sqlmodel.AutoString(), postgresql_using="order_date::date",
+        )
+        # CONCURRENTLY can't run inside a transaction
+        with op.get_context().autocommit_block():
+            for name, table, columns, unique in INDEXES:
+                op.create_index(name, table, columns, unique=unique, postgresql_concurrently=True, if_not_exists=True)
+    else:
+        with op.batch_alter_table("order") as batch:
+            batch.alter_column("order_date", type_=sa.Date(), existing_type=sqlmodel.AutoString())
+        for name, table, columns, unique in INDEXES:
+            op.create_index(name, table, columns, unique=unique)
+
+
+def downgrade():
+    for name, table, _, _ in INDEXES:
+        op.drop_index(name, table_name=table)
+    with op.batch_alter_table("order") as batch:
+        batch.alter_column("order_date", type_=sqlmodel.AutoString(), existing_type=sa.Date())
@@ -0,0 +1,31 @@
+"""Partial index for the low-stock query
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0003"
+down_revision = "0002"
+branch_labels = None
+depends_on = None
+
+LOW_STOCK_CONDITION = sa.text("quantity <= threshold")
+
+
+def upgrade():
+    if op.get_bind().dialect.name == "postgresql":
+        with op.get_context().autocommit_block():
+            op.create_index(
+                "ix_inventory_low_stock", "inventory", ["inventory_id"],
+                postgresql_where=LOW_STOCK_CONDITION, postgresql_concurrently=True, if_not_exists=True,
+            )
+    else:
+        op.create_index("ix_inventory_low_stock", "inventory", ["inventory_id"], sqlite_where=LOW_STOCK_CONDITION)
+
+
+def downgrade():
+    op.drop_index("ix_inventory_low_stock", table_name="inventory")
@@ -0,0 +1,47 @@
+"""Daily sales rollups per item and per category
+
+Existing orders are not copied here, fill the tables afterwards with
+`python -m src.app.utils.analytics`.
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+
+revision = "0004"
+down_revision = "0003"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "sales_item_daily",
+        sa.Column("inventory_id", sa.Integer(), nullable=False),
+        sa.Column("day", sa.Date(), nullable=False),
+        sa.Column("units", sa.Integer(), nullable=False),
+        sa.Column("orders", sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(["inventory_id"], ["inventory.inventory_id"]),
+        sa.PrimaryKeyConstraint("inventory_id", "day"),
+    )
+    op.create_index("ix_sales_item_daily_day", "sales_item_daily", ["day"])
+    op.create_table(
+        "sales_category_daily",
+        sa.Column("category", sqlmodel.AutoString(), nullable=False),
+        sa.Column("day", sa.Date(), nullable=False),
+        sa.Column("units", sa.Integer(), nullable=False),
+        sa.Column("orders", sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint("category", "day"),
+    )
+    op.create_index("ix_sales_category_daily_day", "sales_category_daily", ["day"])
+
+
+def downgrade():
+    op.drop_index("ix_sales_category_daily_day", table_name="sales_category_daily")
+    op.drop_table("sales_category_daily")
+    op.drop_index("ix_sales_item_daily_day", table_name="sales_item_daily")
+    op.drop_table("sales_item_daily")
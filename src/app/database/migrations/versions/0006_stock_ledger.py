@@ -0,0 +1,53 @@
+"""Append-only stock movement ledger and per-item snapshots
+
+Every existing item gets an opening movement for its current quantity.
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-18
+"""
+from datetime import datetime, timezone
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+
+revision = "0006"
+down_revision = "0005"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "stock_movement",
+        sa.Column("movement_id", sa.Integer(), nullable=False),
+        sa.Column("inventory_id", sa.Integer(), nullable=False),
+        sa.Column("delta", sa.Integer(), nullable=False),
+        sa.Column("kind", sqlmodel.AutoString(), nullable=False),
+        sa.Column("reference", sqlmodel.AutoString(), nullable=True),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint("movement_id"),
+    )
+    op.create_index("ix_stock_movement_created_at", "stock_movement", ["created_at"])
+    op.create_index("ix_stock_movement_item_time", "stock_movement", ["inventory_id", "created_at"])
+    op.create_table(
+        "stock_snapshot",
+        sa.Column("inventory_id", sa.Integer(), nullable=False),
+        sa.Column("as_of", sa.DateTime(), nullable=False),
+        sa.Column("quantity", sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint("inventory_id", "as_of"),
+    )
+    now = datetime.now(timezone.utc).replace(tzinfo=None)
+    op.execute(sa.text(
+        "INSERT INTO stock_movement (inventory_id, delta, kind, created_at) "
+        "SELECT inventory_id, quantity, 'opening', :now FROM inventory"
+    ).bindparams(sa.bindparam("now", now, type_=sa.DateTime())))
+
+
+def downgrade():
+    op.drop_table("stock_snapshot")
+    op.drop_index("ix_stock_movement_item_time", table_name="stock_movement")
+    op.drop_index("ix_stock_movement_created_at", table_name="stock_movement")
+    op.drop_table("stock_movement")
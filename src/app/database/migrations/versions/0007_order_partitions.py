@@ -0,0 +1,108 @@
+"""Monthly order partitions on Postgres and the order archive index
+
+On Postgres the order table is rebuilt as a table partitioned by month of
+order_date, with a partition for every month from the first order up to
+ORDER_PARTITIONS_AHEAD months from now and a default partition for the rest.
+Partitioned tables need the partition key in the primary key, so it becomes
+(order_id, order_date). Existing rows are copied, which locks the table for the
+duration of the migration. Other databases keep a plain order table.
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-18
+"""
+from datetime import date
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+from src.app.database.settings import ORDER_PARTITIONS_AHEAD
+
+
+revision = "0007"
+down_revision = "0006"
+branch_labels = None
+depends_on = None
+
+INDEXES = [
+    ("ix_order_user_id", "user_id"),
+    ("ix_order_inventory_id", "inventory_id"),
+    ("ix_order_order_date", "order_date"),
+]
+
+
+def add_months(month: date, months: int) -> date:
+    index = month.year * 12 + month.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def create_order_table(partitioned: bool):
+    key = "order_id, order_date" if partitioned else "order_id"
+    op.execute(f"""
+        CREATE TABLE "order" (
+            order_id integer NOT NULL DEFAULT nextval('order_order_id_seq'),
+            user_id integer NOT NULL REFERENCES "user" (user_id),
+            inventory_id integer NOT NULL REFERENCES inventory (inventory_id),
+            quantity integer NOT NULL,
+            order_date date NOT NULL,
+            PRIMARY KEY ({key})
+        ){" PARTITION BY RANGE (order_date)" if partitioned else ""}
+    """)
+
+
+def replace_order_table(partitioned: bool):
+    """
+    Swap the order table for a new one, partitioned or not, keeping the rows and the id sequence.
+    """
+    op.execute('ALTER TABLE "order" RENAME TO order_previous')
+    op.execute("ALTER TABLE order_previous RENAME CONSTRAINT order_pkey TO order_previous_pkey")
+    for name, _ in INDEXES:
+        op.execute(f"ALTER INDEX {name} RENAME TO {name}_previous")
+    create_order_table(partitioned)
+    # The sequence would be dropped with the old table otherwise
+    op.execute('ALTER SEQUENCE order_order_id_seq OWNED BY "order".order_id')
+
+    if partitioned:
+        first = op.get_bind().execute(sa.text("SELECT min(order_date) FROM order_previous")).scalar_one()
+        current = date.today().replace(day=1)
+        month = min(first.replace(day=1), current) if first else current
+        while month <= add_months(current, ORDER_PARTITIONS_AHEAD):
+            op.execute(
+                f"CREATE TABLE order_p{month:%Y_%m} PARTITION OF \"order\" "
+                f"FOR VALUES FROM ('{month}') TO ('{add_months(month, 1)}')"
+            )
+            month = add_months(month, 1)
+        op.execute('CREATE TABLE order_default PARTITION OF "order" DEFAULT')
+
+    op.execute(
+        'INSERT INTO "order" (order_id, user_id, inventory_id, quantity, order_date) '
+        "SELECT order_id, user_id, inventory_id, quantity, order_date FROM order_previous"
+    )
+    op.execute("DROP TABLE order_previous")
+    for name, column in INDEXES:
+        op.create_index(name, "order", [column])
+
+
+def upgrade():
+    op.create_table(
+        "order_archive",
+        sa.Column("archive_id", sa.Integer(), nullable=False),
+        sa.Column("month", sa.Date(), nullable=False),
+        sa.Column("path", sqlmodel.AutoString(), nullable=False),
+        sa.Column("format", sqlmodel.AutoString(), nullable=False),
+        sa.Column("rows", sa.Integer(), nullable=False),
+        sa.Column("archived_at", sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint("archive_id"),
+    )
+    op.create_index("ix_order_archive_month", "order_archive", ["month"])
+    if op.get_bind().dialect.name == "postgresql":
+        replace_order_table(partitioned=True)
+
+
+def downgrade():
+    # Archived orders stay in their files, restore them before downgrading if they are needed
+    if op.get_bind().dialect.name == "postgresql":
+        replace_order_table(partitioned=False)
+    op.drop_index("ix_order_archive_month", table_name="order_archive")
+    op.drop_table("order_archive")
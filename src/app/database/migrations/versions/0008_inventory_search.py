@@ -0,0 +1,42 @@
+"""Trigram indexes on inventory name and category for search
+
+On Postgres these are GIN indexes with pg_trgm's gin_trgm_ops, built
+concurrently so the inventory table stays writable. Other databases get plain
+indexes, search runs from an in-memory index there.
+
+Revision ID: 0008
+Revises: 0007
+Create Date: 2026-10-18
+"""
+from alembic import op
+
+
+revision = "0008"
+down_revision = "0007"
+branch_labels = None
+depends_on = None
+
+INDEXES = [
+    ("ix_inventory_name_trgm", "name"),
+    ("ix_inventory_category_trgm", "category"),
+]
+
+
+def upgrade():
+    if op.get_bind().dialect.name == "postgresql":
+        op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+        with op.get_context().autocommit_block():
+            for name, column in INDEXES:
+                op.create_index(
+                    name, "inventory", [column],
+                    postgresql_using="gin", postgresql_ops={column: "gin_trgm_ops"},
+                    postgresql_concurrently=True, if_not_exists=True,
+                )
+    else:
+        for name, column in INDEXES:
+            op.create_index(name, "inventory", [column])
+
+
+def downgrade():
+    for name, _ in INDEXES:
+        op.drop_index(name, table_name="inventory")
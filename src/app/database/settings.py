@@ -0,0 +1,174 @@
+import os
+from dotenv import load_dotenv
+
+
+env_path = os.path.join(os.getcwd(), "src/app/assets/.env")
+
+# Load the environment variables
+load_dotenv(env_path)
+
+
+def env_bool(name: str, default: bool) -> bool:
+    value = os.getenv(name)
+    if value is None:
+        return default
+    return value.strip().lower() in ("1", "true", "yes", "on")
+
+
+def env_int(name: str, default: int) -> int:
+    value = os.getenv(name)
+    return int(value) if value else default
+
+
+# Primary database, used for writes and for reads when no replica is configured
+DATABASE_URL = os.getenv('DATABASE_URL')
+
+# Optional read-only replica, GET requests are routed here
+DATABASE_READ_URL = os.getenv('DATABASE_READ_URL')
+
+# Log every SQL statement, off by default since it's expensive on the hot path
+DB_ECHO = env_bool('DB_ECHO', False)
+
+# Connection pool tuning
+DB_POOL_SIZE = env_int('DB_POOL_SIZE', 5)
+DB_MAX_OVERFLOW = env_int('DB_MAX_OVERFLOW', 10)
+DB_POOL_TIMEOUT = env_int('DB_POOL_TIMEOUT', 30)
+DB_POOL_RECYCLE = env_int('DB_POOL_RECYCLE', -1)
+DB_POOL_PRE_PING = env_bool('DB_POOL_PRE_PING', True)
+
+# asyncpg prepared statement cache, set to 0 behind pgbouncer in transaction mode
+DB_STATEMENT_CACHE_SIZE = env_int('DB_STATEMENT_CACHE_SIZE', 100)
+
+# Entity cache in front of Inventory and User lookups
+# "memory" keeps a per-process LRU, "redis" shares entries between workers through CACHE_URL
+CACHE_BACKEND = os.getenv('CACHE_BACKEND', 'memory')
+CACHE_URL = os.getenv('CACHE_URL')
+CACHE_TTL = env_int('CACHE_TTL', 30)
+CACHE_MAX_ENTRIES = env_int('CACHE_MAX_ENTRIES', 10000)
+
+# Cache-Control sent with ETag'd inventory reads. "no-cache" lets clients keep a copy
+# but revalidate it with If-None-Match every time, e.g. "private, max-age=5" skips that for 5s
+INVENTORY_CACHE_CONTROL = os.getenv('INVENTORY_CACHE_CONTROL', 'no-cache')
+INVENTORY_ITEM_CACHE_CONTROL = os.getenv('INVENTORY_ITEM_CACHE_CONTROL', 'no-cache')
+INVENTORY_EXPORT_CACHE_CONTROL = os.getenv('INVENTORY_EXPORT_CACHE_CONTROL', 'no-cache')
+# Worker processes serving the app, read from the variable uvicorn and gunicorn take their default from
+WEB_CONCURRENCY = env_int('WEB_CONCURRENCY', 1)
+# ETags come from the cache backend's version counters, which the memory backend keeps per process,
+# so they are only sent when every worker sees the same counters
+CONDITIONAL_REQUESTS = env_bool('CONDITIONAL_REQUESTS', CACHE_BACKEND == 'redis' or WEB_CONCURRENCY <= 1)
+
+# Low-stock alerts
+LOW_STOCK_QUEUE_SIZE = env_int('LOW_STOCK_QUEUE_SIZE', 10000)
+LOW_STOCK_BATCH_SIZE = env_int('LOW_STOCK_BATCH_SIZE', 500)
+# Seconds during which repeat alerts for the same item are suppressed
+LOW_STOCK_DEBOUNCE = env_int('LOW_STOCK_DEBOUNCE', 300)
+
+# Authentication
+# Tokens are signed with this key; set it explicitly when running more than one worker
+AUTH_SECRET_KEY = os.getenv('AUTH_SECRET_KEY')
+AUTH_TOKEN_TTL = env_int('AUTH_TOKEN_TTL', 3600)
+# Threads used to hash and verify passwords off the event loop
+PASSWORD_HASH_WORKERS = env_int('PASSWORD_HASH_WORKERS', os.cpu_count() or 1)
+# scrypt cost parameters, raising them rehashes passwords on the next login
+SCRYPT_N = env_int('SCRYPT_N', 2 ** 14)
+SCRYPT_R = env_int('SCRYPT_R', 8)
+SCRYPT_P = env_int('SCRYPT_P', 1)
+
+# List endpoints
+DEFAULT_PAGE_SIZE = env_int('DEFAULT_PAGE_SIZE', 100)
+MAX_PAGE_SIZE = env_int('MAX_PAGE_SIZE', 1000)
+# Serialize list pages straight from result rows (with orjson when installed),
+# skipping per-row Pydantic validation of trusted database output
+FAST_JSON_LISTS = env_bool('FAST_JSON_LISTS', False)
+
+# Request and database metrics served at /metrics
+METRICS_ENABLED = env_bool('METRICS_ENABLED', True)
+
+# Query watch, for development and staging: counts and times the SQL statements
+# of every request, reports repeated statements and slow queries with their call
+# sites, and checks routes against their declared query budgets
+QUERY_WATCH = env_bool('QUERY_WATCH', False)
+SLOW_QUERY_MS = env_int('SLOW_QUERY_MS', 100)
+# Identical statements repeated this many times in one request are reported as N+1
+REPEATED_QUERY_THRESHOLD = env_int('REPEATED_QUERY_THRESHOLD', 5)
+# Fail requests that go over their query budget instead of only logging them
+QUERY_BUDGET_STRICT = env_bool('QUERY_BUDGET_STRICT', False)
+
+# Reorder suggestions
+# Days of sales history used to estimate demand
+REORDER_HISTORY_DAYS = env_int('REORDER_HISTORY_DAYS', 90)
+# Days between placing a restock order and receiving it
+REORDER_LEAD_DAYS = env_int('REORDER_LEAD_DAYS', 7)
+# Days of demand a restock order should cover beyond the lead time
+REORDER_REVIEW_DAYS = env_int('REORDER_REVIEW_DAYS', 14)
+# Chance, in percent, of not running out during the lead time
+REORDER_SERVICE_LEVEL = env_int('REORDER_SERVICE_LEVEL', 95)
+# Seconds between background recomputations of the suggestions
+REORDER_REFRESH_SECONDS = env_int('REORDER_REFRESH_SECONDS', 3600)
+
+# Notification push
+# "memory" delivers to streams in this process, "redis" fans out between workers through NOTIFY_URL
+NOTIFY_BACKEND = os.getenv('NOTIFY_BACKEND', 'memory')
+NOTIFY_URL = os.getenv('NOTIFY_URL', CACHE_URL)
+# Events buffered per open stream, a client that falls further behind is disconnected and resumes on reconnect
+NOTIFY_QUEUE_SIZE = env_int('NOTIFY_QUEUE_SIZE', 100)
+# Seconds between keep-alive comments on idle streams
+NOTIFY_KEEPALIVE = env_int('NOTIFY_KEEPALIVE', 15)
+# Most missed notifications replayed when a stream resumes from Last-Event-ID
+NOTIFY_REPLAY_LIMIT = env_int('NOTIFY_REPLAY_LIMIT', 1000)
+# Write-behind buffer for notification inserts: rows per multi-row INSERT, milliseconds
+# the first queued row waits for more, and rows queued before writers have to wait
+NOTIFY_WRITE_BATCH_SIZE = env_int('NOTIFY_WRITE_BATCH_SIZE', 500)
+NOTIFY_WRITE_LINGER_MS = env_int('NOTIFY_WRITE_LINGER_MS', 20)
+NOTIFY_WRITE_QUEUE_SIZE = env_int('NOTIFY_WRITE_QUEUE_SIZE', 10000)
+
+# Inventory search
+# Lowest similarity, in percent, for a typo-tolerant match
+SEARCH_MIN_SIMILARITY = env_int('SEARCH_MIN_SIMILARITY', 40)
+SEARCH_MAX_RESULTS = env_int('SEARCH_MAX_RESULTS', 50)
+# Longest a search goes without the items other processes created, where search runs from memory
+SEARCH_SYNC_MS = env_int('SEARCH_SYNC_MS', 1000)
+
+# Order archival
+# Months of orders kept in the database, older months are moved to files in ORDER_ARCHIVE_DIR
+ORDER_RETENTION_MONTHS = env_int('ORDER_RETENTION_MONTHS', 12)
+ORDER_ARCHIVE_DIR = os.getenv('ORDER_ARCHIVE_DIR', 'archive/orders')
+# "csv.gz", or "parquet" which requires the pyarrow package
+ORDER_ARCHIVE_FORMAT = os.getenv('ORDER_ARCHIVE_FORMAT', 'csv.gz')
+# Seconds between archival runs
+ORDER_ARCHIVE_INTERVAL = env_int('ORDER_ARCHIVE_INTERVAL', 24 * 3600)
+# Archive from the background task, off by default since it deletes orders from the database.
+# Postgres only, where an advisory lock keeps runs in different workers from overlapping
+ORDER_ARCHIVE_ENABLED = env_bool('ORDER_ARCHIVE_ENABLED', False)
+# Monthly order partitions created ahead of time on Postgres
+ORDER_PARTITIONS_AHEAD = env_int('ORDER_PARTITIONS_AHEAD', 3)
+
+# Stock movement ledger
+# Seconds between per-item stock snapshots, which bound the movements an as-of query scans
+STOCK_SNAPSHOT_INTERVAL = env_int('STOCK_SNAPSHOT_INTERVAL', 3600)
+# Snapshots are taken this many seconds in the past, so transactions still open have committed
+STOCK_SNAPSHOT_SETTLE = env_int('STOCK_SNAPSHOT_SETTLE', 60)
+
+# Idempotency-Key support on create endpoints
+# Seconds a stored response is replayed for repeats of its key
+IDEMPOTENCY_TTL = env_int('IDEMPOTENCY_TTL', 24 * 3600)
+# Seconds between sweeps of expired keys
+IDEMPOTENCY_PURGE_INTERVAL = env_int('IDEMPOTENCY_PURGE_INTERVAL', 300)
+
+# Admission control, in front of every route
+ADMISSION_ENABLED = env_bool('ADMISSION_ENABLED', True)
+# Sustained requests per second and burst allowed per user (bearer token) or client IP, 0 disables
+RATE_LIMIT_PER_SECOND = env_int('RATE_LIMIT_PER_SECOND', 20)
+RATE_LIMIT_BURST = env_int('RATE_LIMIT_BURST', 40)
+# Also limit requests without a bearer token, per client IP. Off by default, the Streamlit GUI
+# and every client behind one proxy or NAT would share a single bucket
+RATE_LIMIT_ANONYMOUS = env_bool('RATE_LIMIT_ANONYMOUS', False)
+# Comma-separated addresses of reverse proxies trusted to name the client in X-Forwarded-For
+TRUSTED_PROXIES = {address.strip() for address in os.getenv('TRUSTED_PROXIES', '').split(',') if address.strip()}
+# Requests handled at once, sized to the connections the pool can hand out
+ADMISSION_CONCURRENCY = env_int('ADMISSION_CONCURRENCY', DB_POOL_SIZE + DB_MAX_OVERFLOW)
+# Slots that low-priority reads can't take, kept free for orders and other writes
+ADMISSION_RESERVED = env_int('ADMISSION_RESERVED', 2)
+# Requests waiting for a slot, and how long they wait before being shed
+ADMISSION_QUEUE_SIZE = env_int('ADMISSION_QUEUE_SIZE', 100)
+ADMISSION_QUEUE_TIMEOUT_MS = env_int('ADMISSION_QUEUE_TIMEOUT_MS', 2000)
@@ -0,0 +1,15 @@
+from sqlmodel import SQLModel, Field
+from datetime import datetime
+from typing import Optional
+
+class IdempotencyKey(SQLModel, table=True):
+    __tablename__ = "idempotency_key"
+
+    # Keys are scoped to the route they were sent to
+    route: str = Field(primary_key=True)
+    key: str = Field(primary_key=True)
+    request_hash: str
+    # Null while the first request with the key is still running
+    status_code: Optional[int] = None
+    response: Optional[str] = None
+    expires_at: datetime = Field(index=True)
@@ -1,9 +1,32 @@
+from sqlalchemy import DDL, Index, event, text
 from sqlmodel import SQLModel, Field
 from typing import Optional
 
+# Partial index over the (usually few) items at or below their threshold
+LOW_STOCK_CONDITION = text("quantity <= threshold")
+
 class Inventory(SQLModel, table=True):
+    __table_args__ = (
+        Index(
+            "ix_inventory_low_stock", "inventory_id",
+            postgresql_where=LOW_STOCK_CONDITION, sqlite_where=LOW_STOCK_CONDITION,
+        ),
+        # Trigram indexes behind /inventory/search on Postgres, plain indexes elsewhere
+        Index("ix_inventory_name_trgm", "name", postgresql_using="gin", postgresql_ops={"name": "gin_trgm_ops"}),
+        Index(
+            "ix_inventory_category_trgm", "category",
+            postgresql_using="gin", postgresql_ops={"category": "gin_trgm_ops"},
+        ),
+    )
+
     inventory_id: Optional[int] = Field(default=None, primary_key=True)
     name: str
-    category: str
+    category: str = Field(index=True)
     quantity: int
-    threshold: int
\ No newline at end of file
+    threshold: int
+
+# The trigram operator classes come from the pg_trgm extension
+event.listen(
+    Inventory.__table__, "before_create",
+    DDL("CREATE EXTENSION IF NOT EXISTS pg_trgm").execute_if(dialect="postgresql"),
+)
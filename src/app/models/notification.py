@@ -3,6 +3,6 @@ from typing import Optional
 
 class Notification(SQLModel, table=True):
     notification_id: Optional[int] = Field(default=None, primary_key=True)
-    user_id: int = Field(foreign_key="user.user_id")
+    user_id: int = Field(foreign_key="user.user_id", index=True)
     message: str
     status: str
\ No newline at end of file
@@ -1,9 +1,25 @@
 from sqlmodel import SQLModel, Field
+from datetime import date, datetime
 from typing import Optional
 
+# On Postgres the table is partitioned by month of order_date (migration 0007,
+# see utils/archive.py), its primary key there is (order_id, order_date)
 class Order(SQLModel, table=True):
     order_id: Optional[int] = Field(default=None, primary_key=True)
-    user_id: int = Field(foreign_key="user.user_id")
-    inventory_id: int = Field(foreign_key="inventory.inventory_id")
+    user_id: int = Field(foreign_key="user.user_id", index=True)
+    inventory_id: int = Field(foreign_key="inventory.inventory_id", index=True)
     quantity: int
-    order_date: str
\ No newline at end of file
+    order_date: date = Field(index=True)
+
+# One file of orders moved out of the order table, a month can have several
+# when orders dated in it arrive after it was archived
+class OrderArchive(SQLModel, table=True):
+    __tablename__ = "order_archive"
+
+    archive_id: Optional[int] = Field(default=None, primary_key=True)
+    # First day of the month the orders are dated in
+    month: date = Field(index=True)
+    path: str
+    format: str
+    rows: int
+    archived_at: datetime
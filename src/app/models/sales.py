@@ -0,0 +1,20 @@
+from sqlmodel import SQLModel, Field
+from datetime import date
+
+# Rollups of Order rows, kept up to date as orders are placed (see utils/analytics.py)
+
+class ItemDailySales(SQLModel, table=True):
+    __tablename__ = "sales_item_daily"
+
+    inventory_id: int = Field(foreign_key="inventory.inventory_id", primary_key=True)
+    day: date = Field(primary_key=True, index=True)
+    units: int = 0
+    orders: int = 0
+
+class CategoryDailySales(SQLModel, table=True):
+    __tablename__ = "sales_category_daily"
+
+    category: str = Field(primary_key=True)
+    day: date = Field(primary_key=True, index=True)
+    units: int = 0
+    orders: int = 0
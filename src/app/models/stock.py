@@ -0,0 +1,32 @@
+from sqlalchemy import Index
+from sqlmodel import SQLModel, Field
+from datetime import datetime
+from typing import Optional
+
+# Append-only history of every stock change (see utils/ledger.py). Rows are only ever
+# inserted, and there is no foreign key to inventory so the history outlives deleted items.
+
+class StockMovement(SQLModel, table=True):
+    __tablename__ = "stock_movement"
+    __table_args__ = (
+        # As-of queries scan one item's movements after its latest snapshot
+        Index("ix_stock_movement_item_time", "inventory_id", "created_at"),
+    )
+
+    movement_id: Optional[int] = Field(default=None, primary_key=True)
+    inventory_id: int
+    # Signed change in units
+    delta: int
+    # opening, receipt, sale or adjustment
+    kind: str
+    # What caused the change, e.g. "order:42"
+    reference: Optional[str] = None
+    created_at: datetime = Field(index=True)
+
+class StockSnapshot(SQLModel, table=True):
+    __tablename__ = "stock_snapshot"
+
+    inventory_id: int = Field(primary_key=True)
+    as_of: datetime = Field(primary_key=True)
+    # Sum of the item's movements created at or before as_of
+    quantity: int
@@ -5,6 +5,6 @@ from typing import Optional
 class User(SQLModel, table=True):
     user_id: Optional[int] = Field(default=None, primary_key=True)
     name: str
-    email: str
+    email: str = Field(unique=True, index=True)
     password: str
     role: str 
@@ -2,3 +2,4 @@ from .inventory import router as inventory
 from .order import router as order
 from .notification import router as notification
 from .user import router as user
+from .analytics import router as analytics
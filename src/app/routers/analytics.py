@@ -0,0 +1,55 @@
+from datetime import date
+from typing import Literal, Optional
+
+from fastapi import APIRouter
+
+from src.app.models.sales import ItemDailySales, CategoryDailySales
+from src.app.schemas.analytics import ItemSalesRead, CategorySalesRead, SalesRebuildResult
+from src.app.database.connectivity import async_session
+from src.app.utils.analytics import rebuild_sales, report_range, sales_report
+from src.app.utils.querywatch import query_budget
+
+router = APIRouter()
+
+@router.get("/sales/items", response_model=list[ItemSalesRead])
+@query_budget(1)
+async def read_item_sales(
+    period: Literal["day", "week"] = "day",
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
+    inventory_id: Optional[int] = None,
+):
+    """
+    Units sold per item and day or week, read from the item rollup.
+    Defaults to the last 30 days.
+    """
+    date_from, date_to = report_range(date_from, date_to)
+    async with async_session() as session:
+        return await sales_report(
+            session, ItemDailySales.__table__, "inventory_id", period, date_from, date_to, inventory_id
+        )
+
+@router.get("/sales/categories", response_model=list[CategorySalesRead])
+@query_budget(1)
+async def read_category_sales(
+    period: Literal["day", "week"] = "day",
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
+    category: Optional[str] = None,
+):
+    """
+    Units sold per category and day or week, read from the category rollup.
+    Defaults to the last 30 days.
+    """
+    date_from, date_to = report_range(date_from, date_to)
+    async with async_session() as session:
+        return await sales_report(
+            session, CategoryDailySales.__table__, "category", period, date_from, date_to, category
+        )
+
+@router.post("/sales/rebuild", response_model=SalesRebuildResult) # dependencies=[Depends(require_admin)]
+async def rebuild_sales_rollups(date_from: Optional[date] = None, date_to: Optional[date] = None):
+    """
+    Recompute the rollups from the raw orders, by default over the whole order history.
+    """
+    return await rebuild_sales(date_from, date_to)
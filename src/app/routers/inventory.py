@@ -1,48 +1,302 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlmodel import select
+import time
+from datetime import datetime, timezone
+from typing import Literal, Optional
+
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Request, Response
 from sqlmodel.ext.asyncio.session import AsyncSession
 
 from src.app.models.inventory import Inventory
-from src.app.schemas.inventory import InventoryCreate, InventoryRead
+from src.app.models.stock import StockMovement
+from src.app.schemas.inventory import (
+    InventoryCreate, InventoryRead, InventorySearchResult, InventoryImportResult, InventoryAdjustment, InventoryAdjustResult,
+    ReorderSuggestionRead, StockMovementCreate, StockMovementRead, StockLevelRead,
+)
 from src.app.database.connectivity import async_session
+from src.app.database.settings import (
+    INVENTORY_CACHE_CONTROL, INVENTORY_ITEM_CACHE_CONTROL, INVENTORY_EXPORT_CACHE_CONTROL, MAX_PAGE_SIZE, SEARCH_MAX_RESULTS,
+)
 from src.app.utils.auth import require_admin
+from src.app.utils.alerts import low_stock_monitor
+from src.app.utils.cache import get_cached_inventory, inventory_cache
+from src.app.utils.conditional import conditional
+from src.app.utils.bulk import (
+    ADJUST_BATCH_SIZE, MAX_REPORTED_ERRORS, UploadError, iter_records, iter_validated_batches, write_batch,
+)
+from src.app.utils.export import export_response, iter_export
+from src.app.utils.idempotency import idempotent
+from src.app.utils.ledger import record_movements, stock_as_of, utcnow
+from src.app.utils.stock import apply_stock_deltas, create_item, explain_stock_failures
+from src.app.utils.pagination import DEFAULT_PAGE_SIZE, fetch_page, page_response, parse_fields
+from src.app.utils.querywatch import query_budget
+from src.app.utils.reorder import reorder_planner
+from src.app.utils.search import search_index, search_inventory
 
 router = APIRouter()
 
 @router.post("/", response_model=InventoryRead, status_code=201)
-async def create_inventory(item: InventoryCreate):
+@query_budget(5)
+async def create_inventory(item: InventoryCreate, idempotency_key: Optional[str] = Header(None)):
     """
     Create a new inventory item.
     Only accessible by admin users.
+    Repeats with the same `Idempotency-Key` header get the first response back.
+    """
+    async def create():
+        return await create_item(item.dict())
+
+    return await idempotent("POST /inventory/", idempotency_key, item, InventoryRead, 201, create)
+
+@router.post("/import", response_model=InventoryImportResult)
+async def import_inventory(request: Request):
+    """
+    Bulk load inventory items from a CSV (with header) or NDJSON request body.
+    The body is streamed and written in batches, using COPY on Postgres.
+    Invalid rows are reported without aborting the load.
+    Each batch commits together with the opening stock movements of the items it inserted.
+    If the body stops being readable (e.g. invalid UTF-8) the batches before are kept,
+    and `stopped_at_row` and `stop_reason` say where and why the load stopped.
     """
+    committing = []
+
+    async def record_opening_stock(session, inserted_rows):
+        await record_movements(session, "opening", [(inventory_id, row["quantity"], None) for inventory_id, row in inserted_rows])
+        # Replaced rather than extended, a rejected batch is retried with the rows that went in
+        committing[:] = inserted_rows
+
+    start = time.perf_counter()
+    inserted, failed, errors = 0, 0, []
+    stopped_at_row, stop_reason = None, None
+    try:
+        records = iter_records(request.stream(), request.headers.get("content-type", ""))
+        async with async_session() as session:
+            async for rows, row_errors in iter_validated_batches(records, InventoryCreate):
+                committing.clear()
+                db_errors = await write_batch(session, Inventory, rows, record_opening_stock) if rows else []
+                # Searchable right away, not only after the next sync
+                for inventory_id, row in committing:
+                    search_index.add(inventory_id, row["name"], row["category"])
+                inserted += len(rows) - len(db_errors)
+                row_errors += db_errors
+                failed += len(row_errors)
+                errors.extend(row_errors[:MAX_REPORTED_ERRORS - len(errors)])
+    except UploadError as e:
+        stopped_at_row, stop_reason = e.row, e.detail
+    except ValueError as e:
+        raise HTTPException(status_code=415, detail=str(e))
+    if inserted:
+        await inventory_cache.invalidate()
+    elapsed = time.perf_counter() - start
+    return {
+        "inserted": inserted,
+        "failed": failed,
+        "errors": errors,
+        "elapsed_seconds": elapsed,
+        "rows_per_second": inserted / elapsed if elapsed else 0.0,
+        "stopped_at_row": stopped_at_row,
+        "stop_reason": stop_reason,
+    }
+
+@router.post("/adjust", response_model=InventoryAdjustResult)
+async def adjust_inventory(adjustments: list[InventoryAdjustment]):
+    """
+    Apply many stock quantity deltas in one set-based UPDATE per batch.
+    Adjustments for missing items or that would make stock negative are reported and skipped.
+    Applied changes are recorded as `adjustment` movements.
+    """
+    start = time.perf_counter()
+    deltas = {}
+    for adjustment in adjustments:
+        deltas[adjustment.inventory_id] = deltas.get(adjustment.inventory_id, 0) + adjustment.delta
+    ids = list(deltas)
+    applied, failures = {}, {}
     async with async_session() as session:
-        db_item = Inventory(**item.dict())
-        session.add(db_item)
+        for i in range(0, len(ids), ADJUST_BATCH_SIZE):
+            batch = {inventory_id: deltas[inventory_id] for inventory_id in ids[i:i + ADJUST_BATCH_SIZE]}
+            stock = await apply_stock_deltas(session, batch)
+            if len(stock) < len(batch):
+                failures.update(await explain_stock_failures(session, batch.keys() - stock.keys()))
+            await record_movements(session, "adjustment", [(inventory_id, batch[inventory_id], None) for inventory_id in stock])
+            applied.update(stock)
         await session.commit()
-        await session.refresh(db_item)
-        return db_item
+    await inventory_cache.invalidate(*applied)
+    for inventory_id, stock in applied.items():
+        low_stock_monitor.check(inventory_id, stock, deltas[inventory_id])
+    # Errors point at the first adjustment row for each failed item
+    first_row = {}
+    for row, adjustment in enumerate(adjustments, start=1):
+        first_row.setdefault(adjustment.inventory_id, row)
+    errors = [{"row": first_row[inventory_id], "detail": detail} for inventory_id, detail in failures.items()]
+    elapsed = time.perf_counter() - start
+    return {
+        "updated": len(applied),
+        "failed": len(errors),
+        "errors": sorted(errors, key=lambda e: e["row"])[:MAX_REPORTED_ERRORS],
+        "elapsed_seconds": elapsed,
+        "rows_per_second": len(adjustments) / elapsed if elapsed else 0.0,
+    }
 
-@router.get("/", response_model=list[InventoryRead])
-async def read_inventory():
+@router.get("/", response_model=list[InventoryRead], dependencies=[Depends(conditional(inventory_cache, INVENTORY_CACHE_CONTROL))])
+@query_budget(1)
+async def read_inventory(
+    response: Response,
+    cursor: Optional[int] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    category: Optional[str] = None,
+    name: Optional[str] = None,
+    fields: Optional[str] = None,
+):
     """
-    Retrieve all inventory items.
+    Retrieve inventory items one page at a time.
+    Pass the `X-Next-Cursor` response header back as `cursor` to get the next page.
+    Send the `ETag` back in `If-None-Match` to get 304 when nothing changed.
     """
+    selected = parse_fields(fields, InventoryRead)
+    filters = []
+    if category is not None:
+        filters.append(Inventory.category == category)
+    if name is not None:
+        filters.append(Inventory.name == name)
     async with async_session() as session:
-        result = await session.execute(select(Inventory))
-        return result.scalars().all()
+        rows, next_cursor = await fetch_page(session, Inventory, Inventory.inventory_id, filters, cursor, limit, selected)
+        return page_response(response, rows, next_cursor, selected)
 
-@router.get("/{inventory_id}", response_model=InventoryRead)
+@router.get("/low-stock", response_model=list[InventoryRead], dependencies=[Depends(conditional(inventory_cache, INVENTORY_CACHE_CONTROL))])
+@query_budget(1)
+async def read_low_stock(
+    response: Response,
+    cursor: Optional[int] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    category: Optional[str] = None,
+):
+    """
+    Items at or below their restock threshold, served from a partial index.
+    """
+    filters = [Inventory.quantity <= Inventory.threshold]
+    if category is not None:
+        filters.append(Inventory.category == category)
+    async with async_session() as session:
+        rows, next_cursor = await fetch_page(session, Inventory, Inventory.inventory_id, filters, cursor, limit)
+        return page_response(response, rows, next_cursor)
+
+@router.get("/reorder-suggestions", response_model=list[ReorderSuggestionRead])
+async def read_reorder_suggestions(
+    response: Response,
+    cursor: Optional[int] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    include_all: bool = False,
+    category: Optional[str] = None,
+):
+    """
+    Suggested reorder points and quantities from each item's recent demand.
+    Served from a table recomputed in the background every REORDER_REFRESH_SECONDS,
+    whose age is in the `X-Computed-At` header. Only items at or below their
+    suggested reorder point are listed unless `include_all` is set.
+    """
+    await reorder_planner.get()
+    rows, next_cursor = reorder_planner.page(cursor, limit, not include_all, category)
+    response.headers["X-Computed-At"] = reorder_planner.computed_at.isoformat()
+    return page_response(response, rows, next_cursor)
+
+@router.get("/search", response_model=list[InventorySearchResult])
+@query_budget(2)
+async def search_inventory_items(
+    q: str = Query(..., min_length=1),
+    limit: int = Query(20, ge=1, le=SEARCH_MAX_RESULTS),
+    category: Optional[str] = None,
+):
+    """
+    Items whose name or category matches `q`, best match first, for typeahead.
+    Words of the query match as prefixes, and from three letters on also with typos.
+    Uses pg_trgm indexes on Postgres and an in-memory index elsewhere.
+    """
+    async with async_session() as session:
+        rows = await search_inventory(session, q, limit, category)
+    return [{**InventoryRead.model_validate(item, from_attributes=True).model_dump(), "score": score} for item, score in rows]
+
+@router.get("/export", dependencies=[Depends(conditional(inventory_cache, INVENTORY_EXPORT_CACHE_CONTROL))])
+async def export_inventory(
+    response: Response,
+    format: Literal["csv", "ndjson"] = "csv",
+    compress: bool = False,
+    category: Optional[str] = None,
+):
+    """
+    Stream every inventory item as CSV or NDJSON, optionally gzipped.
+    """
+    filters = [Inventory.category == category] if category is not None else []
+    columns = [getattr(Inventory, f) for f in InventoryRead.model_fields]
+    chunks = iter_export(columns, filters, Inventory.inventory_id, format)
+    streaming = export_response(chunks, "inventory", format, compress)
+    streaming.headers.update(response.headers)
+    return streaming
+
+@router.get(
+    "/{inventory_id}", response_model=InventoryRead,
+    dependencies=[Depends(conditional(inventory_cache, INVENTORY_ITEM_CACHE_CONTROL, "inventory_id"))],
+)
+@query_budget(1)
 async def get_inventory_by_id(inventory_id: int):
     """
     Retrieve a single inventory item by its ID.
     """
+    db_item = await get_cached_inventory(inventory_id)
+    if not db_item:
+        raise HTTPException(status_code=404, detail="Inventory item not found.")
+    return db_item
+
+@router.post("/{inventory_id}/movements", response_model=StockMovementRead, status_code=201)
+@query_budget(3)
+async def create_stock_movement(inventory_id: int, movement: StockMovementCreate):
+    """
+    Record a goods receipt or a stock adjustment (e.g. shrinkage found by a count)
+    and apply it to the item's quantity. Stock can't go below zero.
+    """
+    if movement.kind == "receipt" and movement.delta <= 0:
+        raise HTTPException(status_code=400, detail="A receipt must add stock.")
     async with async_session() as session:
-        db_item = await session.get(Inventory, inventory_id)
-        if not db_item:
-            raise HTTPException(status_code=404, detail="Inventory item not found.")
-        return db_item
+        stock = (await apply_stock_deltas(session, {inventory_id: movement.delta})).get(inventory_id)
+        if stock is None:
+            raise HTTPException(status_code=400, detail=(await explain_stock_failures(session, [inventory_id]))[inventory_id])
+        db_movement = StockMovement(**movement.dict(), inventory_id=inventory_id, created_at=utcnow())
+        session.add(db_movement)
+        await session.commit()
+    await inventory_cache.invalidate(inventory_id)
+    low_stock_monitor.check(inventory_id, stock, movement.delta)
+    return db_movement
+
+@router.get("/{inventory_id}/movements", response_model=list[StockMovementRead])
+@query_budget(1)
+async def read_stock_movements(
+    inventory_id: int,
+    response: Response,
+    cursor: Optional[int] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    kind: Optional[str] = None,
+):
+    """
+    An item's stock movements, oldest first, one page at a time.
+    """
+    filters = [StockMovement.inventory_id == inventory_id]
+    if kind is not None:
+        filters.append(StockMovement.kind == kind)
+    async with async_session() as session:
+        rows, next_cursor = await fetch_page(session, StockMovement, StockMovement.movement_id, filters, cursor, limit)
+        return page_response(response, rows, next_cursor)
+
+@router.get("/{inventory_id}/stock", response_model=StockLevelRead)
+@query_budget(2)
+async def read_stock_level(inventory_id: int, as_of: Optional[datetime] = None):
+    """
+    The item's quantity according to the movement ledger, now or at `as_of` (UTC),
+    computed from the latest snapshot before then and the movements since.
+    """
+    if as_of is not None and as_of.tzinfo is not None:
+        as_of = as_of.astimezone(timezone.utc).replace(tzinfo=None)
+    async with async_session() as session:
+        return await stock_as_of(session, inventory_id, as_of or utcnow())
 
 @router.delete("/{inventory_id}", response_model=InventoryRead) # dependencies=[Depends(require_admin)]
+@query_budget(2)
 async def delete_inventory(inventory_id: int):
     """
     Delete an inventory item by its ID.
@@ -54,4 +308,6 @@ async def delete_inventory(inventory_id: int):
             raise HTTPException(status_code=404, detail="Inventory item not found.")
         await session.delete(db_item)
         await session.commit()
+        search_index.remove(inventory_id)
+        await inventory_cache.invalidate(inventory_id)
         return db_item
@@ -1,5 +1,7 @@
-from fastapi import FastAPI, Depends, HTTPException
-from sqlmodel import SQLModel, select
+from datetime import date
+from typing import Optional
+
+from fastapi import FastAPI, Depends, HTTPException, Query, Response
 from sqlmodel.ext.asyncio.session import AsyncSession
 from sqlmodel import Session
 from sqlalchemy.exc import IntegrityError
@@ -16,14 +18,28 @@ from src.app.schemas.notification import NotificationCreate, NotificationRead
 from src.app.models.user import User
 from src.app.schemas.user import UserCreate, UserRead
 
-from src.app.database.connectivity import async_session, engine
+from src.app.database.connectivity import async_session
+from src.app.database.settings import MAX_PAGE_SIZE
+from src.app.utils.alerts import low_stock_monitor
+from src.app.utils.analytics import record_sales
+from src.app.utils.ledger import record_movements
+from src.app.utils.notify import publish_notifications
+from src.app.utils.security import hash_password
+from src.app.utils.cache import get_cached_inventory, get_cached_user, inventory_cache, user_cache
+from src.app.utils.stock import create_item, reserve_stock, run_with_retry
+from src.app.utils.pagination import DEFAULT_PAGE_SIZE, fetch_page, page_response, parse_fields
+from src.app.utils.querywatch import QueryWatchMiddleware, query_budget
 
 app = FastAPI()
+app.add_middleware(QueryWatchMiddleware)
 
 @app.on_event("startup")
 async def on_startup():
-    async with engine.begin() as conn:
-        await conn.run_sync(SQLModel.metadata.create_all)
+    low_stock_monitor.start()
+
+@app.on_event("shutdown")
+async def on_shutdown():
+    await low_stock_monitor.stop()
 
 @app.get("/")
 def root():
@@ -31,66 +47,93 @@ def root():
 
 @app.post("/inventory", response_model=InventoryRead, status_code=201)
 async def create_inventory(item: InventoryCreate):
-    async with async_session() as session:
-        try:
-            db_item = Inventory(**item.dict())
-            session.add(db_item)
-            await session.commit()
-            await session.refresh(db_item)
-            return db_item
-        except IntegrityError as e:
-            await session.rollback()
-            raise HTTPException(status_code=400, detail="Inventory creation failed: Integrity error.")
+    try:
+        return await create_item(item.dict())
+    except IntegrityError as e:
+        raise HTTPException(status_code=400, detail="Inventory creation failed: Integrity error.")
 
 @app.get("/inventory", response_model=list[InventoryRead])
-async def read_inventory():
+async def read_inventory(
+    response: Response,
+    cursor: Optional[int] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    category: Optional[str] = None,
+    name: Optional[str] = None,
+    fields: Optional[str] = None,
+):
+    selected = parse_fields(fields, InventoryRead)
+    filters = []
+    if category is not None:
+        filters.append(Inventory.category == category)
+    if name is not None:
+        filters.append(Inventory.name == name)
     async with async_session() as session:
-        result = await session.execute(select(Inventory))
-        inventory_items = result.scalars().all()
+        inventory_items, next_cursor = await fetch_page(session, Inventory, Inventory.inventory_id, filters, cursor, limit, selected)
         if not inventory_items:
             raise HTTPException(status_code=404, detail="No inventory items found.")
-        return inventory_items
+        return page_response(response, inventory_items, next_cursor, selected)
 
 @app.get("/inventory/{inventory_id}", response_model=InventoryRead)
 async def get_inventory_by_id(inventory_id: int):
-    async with async_session() as session:
-        db_item = await session.get(Inventory, inventory_id)
-        if not db_item:
-            raise HTTPException(status_code=404, detail="Inventory item not found.")
-        return db_item
+    db_item = await get_cached_inventory(inventory_id)
+    if not db_item:
+        raise HTTPException(status_code=404, detail="Inventory item not found.")
+    return db_item
 
 @app.post("/order", response_model=OrderRead, status_code=201)
+@query_budget(7)
 async def create_order(order: OrderCreate):
-    async with async_session() as session:
-        try:
-            # Ensure user and inventory exist
-            user = await session.get(User, order.user_id)
-            inventory = await session.get(Inventory, order.inventory_id)
-            if not user:
-                raise HTTPException(status_code=404, detail="User not found.")
-            if not inventory:
-                raise HTTPException(status_code=404, detail="Inventory item not found.")
-            if inventory.quantity < order.quantity:
-                raise HTTPException(status_code=400, detail="Insufficient inventory quantity.")
-            # Create order and update inventory
-            db_order = Order(**order.dict())
-            inventory.quantity -= order.quantity
-            session.add(db_order)
-            await session.commit()
-            await session.refresh(db_order)
-            return db_order
-        except IntegrityError as e:
-            await session.rollback()
-            raise HTTPException(status_code=400, detail="Order creation failed: Integrity error.")
+    async def place():
+        async with async_session() as session:
+            try:
+                # Ensure user exists
+                user = await get_cached_user(order.user_id, session)
+                if not user:
+                    raise HTTPException(status_code=404, detail="User not found.")
+                # Decrement inventory with a conditional update, then create the order
+                stock = await reserve_stock(session, order.inventory_id, order.quantity)
+                db_order = Order(**order.dict())
+                session.add(db_order)
+                await session.flush()
+                await record_movements(session, "sale", [(order.inventory_id, -order.quantity, f"order:{db_order.order_id}")])
+                await record_sales(session, [(order.inventory_id, stock.category, order.order_date, order.quantity)])
+                await session.commit()
+                await inventory_cache.invalidate(order.inventory_id)
+                low_stock_monitor.check(order.inventory_id, stock, -order.quantity)
+                await session.refresh(db_order)
+                return db_order
+            except IntegrityError as e:
+                await session.rollback()
+                raise HTTPException(status_code=400, detail="Order creation failed: Integrity error.")
+
+    return await run_with_retry(place)
 
 @app.get("/order", response_model=list[OrderRead])
-async def read_orders():
+async def read_orders(
+    response: Response,
+    cursor: Optional[int] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    user_id: Optional[int] = None,
+    inventory_id: Optional[int] = None,
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
+    fields: Optional[str] = None,
+):
+    selected = parse_fields(fields, OrderRead)
+    filters = []
+    if user_id is not None:
+        filters.append(Order.user_id == user_id)
+    if inventory_id is not None:
+        filters.append(Order.inventory_id == inventory_id)
+    if date_from is not None:
+        filters.append(Order.order_date >= date_from)
+    if date_to is not None:
+        filters.append(Order.order_date <= date_to)
     async with async_session() as session:
-        result = await session.execute(select(Order))
-        orders = result.scalars().all()
+        orders, next_cursor = await fetch_page(session, Order, Order.order_id, filters, cursor, limit, selected)
         if not orders:
             raise HTTPException(status_code=404, detail="No orders found.")
-        return orders
+        return page_response(response, orders, next_cursor, selected)
 
 @app.get("/order/{order_id}", response_model=OrderRead)
 async def get_order_by_id(order_id: int):
@@ -105,26 +148,39 @@ async def create_notification(notification: NotificationCreate):
     async with async_session() as session:
         try:
             # Ensure user exists
-            user = await session.get(User, notification.user_id)
+            user = await get_cached_user(notification.user_id, session)
             if not user:
                 raise HTTPException(status_code=404, detail="User not found.")
             db_notification = Notification(**notification.dict())
             session.add(db_notification)
             await session.commit()
             await session.refresh(db_notification)
+            await publish_notifications("created", [db_notification])
             return db_notification
         except IntegrityError as e:
             await session.rollback()
             raise HTTPException(status_code=400, detail="Notification creation failed: Integrity error.")
 
 @app.get("/notification", response_model=list[NotificationRead])
-async def read_notifications():
+async def read_notifications(
+    response: Response,
+    cursor: Optional[int] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    user_id: Optional[int] = None,
+    status: Optional[str] = None,
+    fields: Optional[str] = None,
+):
+    selected = parse_fields(fields, NotificationRead)
+    filters = []
+    if user_id is not None:
+        filters.append(Notification.user_id == user_id)
+    if status is not None:
+        filters.append(Notification.status == status)
     async with async_session() as session:
-        result = await session.execute(select(Notification))
-        notifications = result.scalars().all()
+        notifications, next_cursor = await fetch_page(session, Notification, Notification.notification_id, filters, cursor, limit, selected)
         if not notifications:
             raise HTTPException(status_code=404, detail="No notifications found.")
-        return notifications
+        return page_response(response, notifications, next_cursor, selected)
 
 @app.get("/notification/{notification_id}", response_model=NotificationRead)
 async def get_notification_by_id(notification_id: int):
@@ -139,6 +195,7 @@ async def create_user(user: UserCreate):
     async with async_session() as session:
         try:
             db_user = User(**user.dict())
+            db_user.password = await hash_password(user.password)
             session.add(db_user)
             await session.commit()
             await session.refresh(db_user)
@@ -148,21 +205,29 @@ async def create_user(user: UserCreate):
             raise HTTPException(status_code=400, detail="User creation failed: Integrity error.")
 
 @app.get("/user", response_model=list[UserRead])
-async def read_users():
+async def read_users(
+    response: Response,
+    cursor: Optional[int] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    role: Optional[str] = None,
+    fields: Optional[str] = None,
+):
+    selected = parse_fields(fields, UserRead)
+    filters = []
+    if role is not None:
+        filters.append(User.role == role)
     async with async_session() as session:
-        result = await session.execute(select(User))
-        users = result.scalars().all()
+        users, next_cursor = await fetch_page(session, User, User.user_id, filters, cursor, limit, selected)
         if not users:
             raise HTTPException(status_code=404, detail="No users found.")
-        return users
+        return page_response(response, users, next_cursor, selected)
 
 @app.get("/user/{user_id}", response_model=UserRead)
 async def get_user_by_id(user_id: int):
-    async with async_session() as session:
-        db_user = await session.get(User, user_id)
-        if not db_user:
-            raise HTTPException(status_code=404, detail="User not found.")
-        return db_user
+    db_user = await get_cached_user(user_id)
+    if not db_user:
+        raise HTTPException(status_code=404, detail="User not found.")
+    return db_user
 
 @app.put("/user/{user_id}", response_model=UserRead)
 async def update_user(user_id: int, user: UserCreate):
@@ -172,8 +237,10 @@ async def update_user(user_id: int, user: UserCreate):
             raise HTTPException(status_code=404, detail="User not found.")
         for key, value in user.dict().items():
             setattr(db_user, key, value)
+        db_user.password = await hash_password(user.password)
         session.add(db_user)
         await session.commit()
+        await user_cache.invalidate(user_id)
         await session.refresh(db_user)
         return db_user
 
@@ -185,4 +252,5 @@ async def delete_user(user_id: int):
             raise HTTPException(status_code=404, detail="User not found.")
         await session.delete(db_user)
         await session.commit()
+        await user_cache.invalidate(user_id)
         return {'message': 'user deleted!'}
\ No newline at end of file
@@ -1,24 +1,130 @@
-from fastapi import APIRouter, HTTPException
-from sqlmodel import select
+from typing import Optional
+
+from fastapi import APIRouter, Header, HTTPException, Query, Response
+from fastapi.responses import StreamingResponse
+from sqlalchemy import update
+from sqlalchemy.exc import IntegrityError
 from sqlmodel.ext.asyncio.session import AsyncSession
 
 from src.app.models.notification import Notification
-from src.app.schemas.notification import NotificationCreate, NotificationRead
+from src.app.schemas.notification import NotificationCreate, NotificationRead, NotificationUpdate, NotificationMarkRead
 from src.app.database.connectivity import async_session
+from src.app.database.settings import MAX_PAGE_SIZE
+from src.app.utils.cache import get_cached_user
+from src.app.utils.idempotency import idempotent
+from src.app.utils.notify import event_stream, notification_broker, publish_notifications
+from src.app.utils.pagination import DEFAULT_PAGE_SIZE, fetch_page, page_response, parse_fields
+from src.app.utils.querywatch import query_budget
+from src.app.utils.writebehind import notification_writer
 
 router = APIRouter()
 
 @router.post("/", response_model=NotificationRead, status_code=201)
-async def create_notification(notification: NotificationCreate):
+@query_budget(5)
+async def create_notification(notification: NotificationCreate, idempotency_key: Optional[str] = Header(None)):
+    """
+    Create a notification and push it to the user's open streams.
+    Concurrent creations are committed together in one multi-row insert.
+    Repeats with the same `Idempotency-Key` header get the first response back.
+    """
+    async def create():
+        async with async_session() as session:
+            if not await get_cached_user(notification.user_id, session):
+                raise HTTPException(status_code=404, detail="User not found.")
+        try:
+            created = await notification_writer.write([notification.dict()], durable=True)
+        except IntegrityError:
+            raise HTTPException(status_code=400, detail="Notification creation failed: Integrity error.")
+        return created[0]
+
+    return await idempotent("POST /notification/", idempotency_key, notification, NotificationRead, 201, create)
+
+@router.get("/", response_model=list[NotificationRead])
+@query_budget(1)
+async def read_notifications(
+    response: Response,
+    cursor: Optional[int] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    user_id: Optional[int] = None,
+    status: Optional[str] = None,
+    fields: Optional[str] = None,
+):
+    selected = parse_fields(fields, NotificationRead)
+    filters = []
+    if user_id is not None:
+        filters.append(Notification.user_id == user_id)
+    if status is not None:
+        filters.append(Notification.status == status)
     async with async_session() as session:
-        db_notification = Notification(**notification.dict())
-        session.add(db_notification)
+        rows, next_cursor = await fetch_page(session, Notification, Notification.notification_id, filters, cursor, limit, selected)
+        return page_response(response, rows, next_cursor, selected)
+
+@router.get("/stream")
+@query_budget(1)
+async def stream_notifications(user_id: int, last_event_id: Optional[int] = Header(None)):
+    """
+    Server-Sent Events stream of a user's new notifications and status changes,
+    instead of polling GET /notification. Browsers' EventSource reconnects with
+    `Last-Event-ID` and the notifications missed in between are replayed.
+    """
+    return StreamingResponse(
+        event_stream(user_id, last_event_id),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+@router.get("/stream/stats")
+def stream_statistics():
+    """
+    Open streams, and events published and dropped, in this worker.
+    """
+    return notification_broker.stats()
+
+@router.get("/writer/stats")
+def writer_statistics():
+    """
+    Notifications queued for the write-behind buffer, written, and lost to failed inserts.
+    """
+    return notification_writer.stats()
+
+@router.patch("/{notification_id}", response_model=NotificationRead)
+@query_budget(1)
+async def update_notification(notification_id: int, changes: NotificationUpdate):
+    """
+    Change a notification's status, e.g. mark it read, and push the change to the user's streams.
+    """
+    async with async_session() as session:
+        result = await session.execute(
+            update(Notification)
+            .where(Notification.notification_id == notification_id)
+            .values(status=changes.status)
+            .returning(Notification)
+        )
+        db_notification = result.scalar_one_or_none()
+        if db_notification is None:
+            raise HTTPException(status_code=404, detail="Notification not found.")
         await session.commit()
-        await session.refresh(db_notification)
-        return db_notification
+    await publish_notifications("updated", [db_notification])
+    return db_notification
 
-@router.get("/", response_model=list[NotificationRead])
-async def read_notifications():
+@router.post("/read", response_model=list[NotificationRead])
+@query_budget(1)
+async def mark_notifications_read(request: NotificationMarkRead):
+    """
+    Mark a user's unread notifications (all, or the given ones) read in one statement.
+    Returns the notifications that changed.
+    """
+    statement = (
+        update(Notification)
+        .where(Notification.user_id == request.user_id, Notification.status == "unread")
+        .values(status="read")
+        .returning(Notification)
+    )
+    if request.notification_ids is not None:
+        statement = statement.where(Notification.notification_id.in_(request.notification_ids))
     async with async_session() as session:
-        result = await session.execute(select(Notification))
-        return result.scalars().all()
+        result = await session.execute(statement)
+        changed = result.scalars().all()
+        await session.commit()
+    await publish_notifications("updated", changed)
+    return changed
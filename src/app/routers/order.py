@@ -1,24 +1,163 @@
-from fastapi import APIRouter, HTTPException
-from sqlmodel import select
-from sqlmodel.ext.asyncio.session import AsyncSession
+from datetime import date
+from typing import Literal, Optional
+
+from fastapi import APIRouter, Header, HTTPException, Query, Response
+from sqlalchemy import insert
+from sqlalchemy.exc import IntegrityError
 
 from src.app.models.order import Order
-from src.app.schemas.order import OrderCreate, OrderRead
+from src.app.schemas.order import OrderCreate, OrderRead, OrderBatchCreate, OrderBatchRead, OrderDetailRead
 from src.app.database.connectivity import async_session
+from src.app.database.settings import MAX_PAGE_SIZE
+from src.app.utils.cache import get_cached_user, inventory_cache
+from src.app.utils.alerts import low_stock_monitor
+from src.app.utils.archive import iter_archived_orders
+from src.app.utils.analytics import record_sales
+from src.app.utils.export import export_response, iter_export
+from src.app.utils.idempotency import idempotent
+from src.app.utils.ledger import record_movements
+from src.app.utils.stock import apply_stock_deltas, explain_stock_failures, reserve_stock, run_with_retry
+from src.app.utils.orders import order_details_query, parse_expand
+from src.app.utils.pagination import DEFAULT_PAGE_SIZE, fetch_page, page_response, parse_fields
+from src.app.utils.querywatch import query_budget
 
 router = APIRouter()
 
 @router.post("/", response_model=OrderRead, status_code=201)
-async def create_order(order: OrderCreate):
-    async with async_session() as session:
-        db_order = Order(**order.dict())
-        session.add(db_order)
-        await session.commit()
-        await session.refresh(db_order)
-        return db_order
-
-@router.get("/", response_model=list[OrderRead])
-async def read_orders():
+@query_budget(10)
+async def create_order(order: OrderCreate, idempotency_key: Optional[str] = Header(None)):
+    """
+    Place an order, decrementing stock and recording the sale in the movement ledger.
+    Repeats with the same `Idempotency-Key` header get the first response back
+    instead of placing the order again.
+    """
+    async def place():
+        async with async_session() as session:
+            try:
+                if not await get_cached_user(order.user_id, session):
+                    raise HTTPException(status_code=404, detail="User not found.")
+                # Stock is decremented atomically in the same transaction as the order insert
+                stock = await reserve_stock(session, order.inventory_id, order.quantity)
+                db_order = Order(**order.dict())
+                session.add(db_order)
+                await session.flush()
+                await record_movements(session, "sale", [(order.inventory_id, -order.quantity, f"order:{db_order.order_id}")])
+                await record_sales(session, [(order.inventory_id, stock.category, order.order_date, order.quantity)])
+                await session.commit()
+                await inventory_cache.invalidate(order.inventory_id)
+                low_stock_monitor.check(order.inventory_id, stock, -order.quantity)
+                await session.refresh(db_order)
+                return db_order
+            except IntegrityError:
+                await session.rollback()
+                raise HTTPException(status_code=400, detail="Order creation failed: Integrity error.")
+
+    return await idempotent("POST /order/", idempotency_key, order, OrderRead, 201, lambda: run_with_retry(place))
+
+@router.post("/batch", response_model=OrderBatchRead, status_code=201)
+@query_budget(6)
+async def create_order_batch(batch: OrderBatchCreate):
+    """
+    Place a basket of orders in a single transaction.
+    Stock for every line is decremented by one set-based UPDATE and the orders
+    are inserted with one multi-row INSERT ... RETURNING.
+    """
+    deltas = {}
+    for line in batch.items:
+        deltas[line.inventory_id] = deltas.get(line.inventory_id, 0) - line.quantity
+
+    async def place():
+        async with async_session() as session:
+            try:
+                if not await get_cached_user(batch.user_id, session):
+                    raise HTTPException(status_code=404, detail="User not found.")
+                reserved = await apply_stock_deltas(session, deltas)
+                failures = await explain_stock_failures(session, deltas.keys() - reserved) if len(reserved) < len(deltas) else {}
+                errors = [{"inventory_id": inventory_id, "detail": detail} for inventory_id, detail in failures.items()]
+                if errors and (batch.mode == "all_or_nothing" or not reserved):
+                    await session.rollback()
+                    raise HTTPException(status_code=400, detail=errors)
+
+                lines = [
+                    {"user_id": batch.user_id, "inventory_id": line.inventory_id, "quantity": line.quantity, "order_date": batch.order_date}
+                    for line in batch.items if line.inventory_id in reserved
+                ]
+                result = await session.scalars(insert(Order).returning(Order), lines)
+                orders = result.all()
+                await record_movements(session, "sale", [
+                    (db_order.inventory_id, -db_order.quantity, f"order:{db_order.order_id}") for db_order in orders
+                ])
+                await record_sales(session, [
+                    (line["inventory_id"], reserved[line["inventory_id"]].category, line["order_date"], line["quantity"])
+                    for line in lines
+                ])
+                await session.commit()
+                await inventory_cache.invalidate(*reserved)
+                for inventory_id, stock in reserved.items():
+                    low_stock_monitor.check(inventory_id, stock, deltas[inventory_id])
+                return {"orders": orders, "errors": errors}
+            except IntegrityError:
+                await session.rollback()
+                raise HTTPException(status_code=400, detail="Order creation failed: Integrity error.")
+
+    return await run_with_retry(place)
+
+@router.get("/", response_model=list[OrderDetailRead], response_model_exclude_none=True)
+@query_budget(1)
+async def read_orders(
+    response: Response,
+    cursor: Optional[int] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    user_id: Optional[int] = None,
+    inventory_id: Optional[int] = None,
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
+    fields: Optional[str] = None,
+    expand: Optional[str] = None,
+):
+    """
+    Retrieve orders one page at a time.
+    Only orders still in the database are listed, archived months are in the export.
+    `expand=inventory,user` adds the item and user names, joined in the same query.
+    """
+    expanded = parse_expand(expand)
+    selected = parse_fields(fields, OrderDetailRead if expanded else OrderRead)
+    filters = []
+    if user_id is not None:
+        filters.append(Order.user_id == user_id)
+    if inventory_id is not None:
+        filters.append(Order.inventory_id == inventory_id)
+    if date_from is not None:
+        filters.append(Order.order_date >= date_from)
+    if date_to is not None:
+        filters.append(Order.order_date <= date_to)
     async with async_session() as session:
-        result = await session.execute(select(Order))
-        return result.scalars().all()
+        query = order_details_query(expanded) if expanded else None
+        rows, next_cursor = await fetch_page(session, Order, Order.order_id, filters, cursor, limit, selected, query)
+        return page_response(response, rows, next_cursor, selected)
+
+@router.get("/export")
+async def export_orders(
+    format: Literal["csv", "ndjson"] = "csv",
+    compress: bool = False,
+    user_id: Optional[int] = None,
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
+    include_archived: bool = True,
+):
+    """
+    Stream orders as CSV or NDJSON, optionally gzipped, without loading them all in memory.
+    Orders archived out of the database are read back from their files and come first,
+    only the archives of the months in the date range are opened.
+    """
+    filters = []
+    if user_id is not None:
+        filters.append(Order.user_id == user_id)
+    if date_from is not None:
+        filters.append(Order.order_date >= date_from)
+    if date_to is not None:
+        filters.append(Order.order_date <= date_to)
+    columns = [getattr(Order, f) for f in OrderRead.model_fields]
+    archived = iter_archived_orders(date_from, date_to, user_id) if include_archived else None
+    chunks = iter_export(columns, filters, Order.order_id, format, archived)
+    return export_response(chunks, "orders", format, compress)
@@ -1,42 +1,111 @@
-from fastapi import APIRouter, HTTPException, Depends
+from typing import Optional
+
+from fastapi import APIRouter, HTTPException, Depends, Query, Response
 from sqlmodel import select
+from sqlalchemy import update
+from sqlalchemy.exc import IntegrityError
 # from sqlmodel.ext.asyncio.session import AsyncSession
 from src.app.models.user import User
+from src.app.models.order import Order
+from src.app.schemas.order import OrderDetailRead
 from src.app.schemas.user import UserCreate, UserRead
 from src.app.database.connectivity import async_session
+from src.app.database.settings import MAX_PAGE_SIZE
 from src.app.utils.auth import require_admin
+from src.app.utils.cache import get_cached_user, user_cache
+from src.app.utils.security import create_token, hash_password, needs_rehash, verify_password
+from src.app.utils.orders import order_details_query
+from src.app.utils.pagination import DEFAULT_PAGE_SIZE, fetch_page, page_response, parse_fields
+from src.app.utils.querywatch import query_budget
 
 router = APIRouter()
 
 @router.post("/signup", response_model=UserRead, status_code=201)
+@query_budget(2)
 async def signup(user: UserCreate):
     async with async_session() as session:
-        existing_user = await session.execute(select(User).where(User.email == user.email))
-        if existing_user.scalar_one_or_none():
-            raise HTTPException(status_code=400, detail="Email already registered")
+        # The unique index on email rejects duplicates, no need to look the email up first
         new_user = User(**user.dict())
+        new_user.password = await hash_password(user.password)
         session.add(new_user)
-        await session.commit()
+        try:
+            await session.commit()
+        except IntegrityError:
+            await session.rollback()
+            raise HTTPException(status_code=400, detail="Email already registered")
         await session.refresh(new_user)
         return new_user
 
 @router.post("/login")
+@query_budget(2)
 async def login(email: str, password: str):
+    """
+    Verify the password off the event loop and issue a signed access token.
+    Passwords stored with outdated parameters (or in plain text) are rehashed.
+    """
     async with async_session() as session:
-        user = await session.execute(select(User).where(User.email == email, User.password == password))
+        user = await session.execute(select(User).where(User.email == email))
         user = user.scalar_one_or_none()
-        if not user:
-            raise HTTPException(status_code=401, detail="Invalid credentials")
-        return {"user_id": user.user_id, "role": user.role, "name": user.name}
+    # The connection is released before the slow hash runs. Unknown emails are hashed too,
+    # so response times don't tell which emails have accounts
+    if not await verify_password(password, user.password if user else None):
+        raise HTTPException(status_code=401, detail="Invalid credentials")
+    if needs_rehash(user.password):
+        new_hash = await hash_password(password)
+        async with async_session() as session:
+            await session.execute(
+                update(User).where(User.user_id == user.user_id, User.password == user.password).values(password=new_hash)
+            )
+            await session.commit()
+    return {
+        "user_id": user.user_id,
+        "role": user.role,
+        "name": user.name,
+        "access_token": create_token(user.user_id, user.role, user.name),
+        "token_type": "bearer",
+    }
 
 
 @router.get("/", response_model=list[UserRead])
-async def read_users():
+@query_budget(1)
+async def read_users(
+    response: Response,
+    cursor: Optional[int] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    role: Optional[str] = None,
+    fields: Optional[str] = None,
+):
+    selected = parse_fields(fields, UserRead)
+    filters = []
+    if role is not None:
+        filters.append(User.role == role)
+    async with async_session() as session:
+        rows, next_cursor = await fetch_page(session, User, User.user_id, filters, cursor, limit, selected)
+        return page_response(response, rows, next_cursor, selected)
+
+@router.get("/{user_id}/orders", response_model=list[OrderDetailRead], response_model_exclude_none=True)
+@query_budget(2)
+async def read_user_orders(
+    user_id: int,
+    response: Response,
+    cursor: Optional[int] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+):
+    """
+    Orders placed by one user, with item names joined in the same query.
+    The user lookup is a second statement when the user isn't cached.
+    """
+    if not await get_cached_user(user_id):
+        raise HTTPException(status_code=404, detail="User not found.")
     async with async_session() as session:
-        result = await session.execute(select(User))
-        return result.scalars().all()
+        rows, next_cursor = await fetch_page(
+            session, Order, Order.order_id, [Order.user_id == user_id], cursor, limit,
+            query=order_details_query({"inventory"}),
+        )
+        return page_response(response, rows, next_cursor)
 
 @router.delete("/{user_id}", status_code=204)
+@query_budget(2)
 async def delete_user(user_id: int):
     async with async_session() as session:
         db_user = await session.get(User, user_id)
@@ -44,4 +113,5 @@ async def delete_user(user_id: int):
             raise HTTPException(status_code=404, detail="User not found.")
         await session.delete(db_user)
         await session.commit()
+        await user_cache.invalidate(user_id)
         return {'message': 'user deleted!'}
@@ -0,0 +1,21 @@
+from datetime import date
+
+from pydantic import BaseModel
+
+class ItemSalesRead(BaseModel):
+    inventory_id: int
+    period_start: date
+    units: int
+    orders: int
+
+class CategorySalesRead(BaseModel):
+    category: str
+    period_start: date
+    units: int
+    orders: int
+
+class SalesRebuildResult(BaseModel):
+    date_from: date
+    date_to: date
+    item_rows: int
+    category_rows: int
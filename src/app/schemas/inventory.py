@@ -1,3 +1,6 @@
+from datetime import datetime
+from typing import Literal, Optional
+
 from pydantic import BaseModel
 
 class InventoryCreate(BaseModel):
@@ -11,4 +14,71 @@ class InventoryRead(BaseModel):
     name: str
     category: str
     quantity: int
-    threshold: int
\ No newline at end of file
+    threshold: int
+
+class InventorySearchResult(InventoryRead):
+    # Higher is a better match, names starting with the query get a bonus
+    score: float
+
+class RowError(BaseModel):
+    row: int
+    detail: str
+
+class InventoryImportResult(BaseModel):
+    inserted: int
+    failed: int
+    errors: list[RowError]
+    elapsed_seconds: float
+    rows_per_second: float
+    # Set when the body could not be read to the end, the rows before stopped_at_row were imported
+    stopped_at_row: Optional[int] = None
+    stop_reason: Optional[str] = None
+
+class InventoryAdjustment(BaseModel):
+    inventory_id: int
+    delta: int
+
+class InventoryAdjustResult(BaseModel):
+    updated: int
+    failed: int
+    errors: list[RowError]
+    elapsed_seconds: float
+    rows_per_second: float
+
+class StockMovementCreate(BaseModel):
+    # Sales and opening stock are recorded by the order and item endpoints
+    kind: Literal["receipt", "adjustment"]
+    delta: int
+    reference: Optional[str] = None
+
+class StockMovementRead(BaseModel):
+    movement_id: int
+    inventory_id: int
+    delta: int
+    kind: str
+    reference: Optional[str]
+    created_at: datetime
+
+class StockLevelRead(BaseModel):
+    inventory_id: int
+    as_of: datetime
+    quantity: int
+    # The snapshot the quantity was computed from, and the movements added to it
+    snapshot_as_of: Optional[datetime]
+    movements_scanned: int
+
+class ReorderSuggestionRead(BaseModel):
+    inventory_id: int
+    name: str
+    category: str
+    quantity: int
+    threshold: int
+    # Mean and standard deviation of units sold per day over the history window
+    daily_demand: float
+    demand_stddev: float
+    safety_stock: int
+    reorder_point: int
+    suggested_quantity: int
+    # None when the item has no recent sales
+    days_of_cover: Optional[float]
+    needs_reorder: bool
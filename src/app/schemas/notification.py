@@ -1,3 +1,5 @@
+from typing import Optional
+
 from pydantic import BaseModel
 
 class NotificationCreate(BaseModel):
@@ -9,4 +11,11 @@ class NotificationRead(BaseModel):
     notification_id: int
     user_id: int
     message: str
-    status: str
\ No newline at end of file
+    status: str
+class NotificationUpdate(BaseModel):
+    status: str
+
+class NotificationMarkRead(BaseModel):
+    user_id: int
+    # All of the user's unread notifications when omitted
+    notification_ids: Optional[list[int]] = None
@@ -1,14 +1,42 @@
-from pydantic import BaseModel
+from datetime import date
+from typing import Literal, Optional
+
+from pydantic import BaseModel, Field
 
 class OrderCreate(BaseModel):
     user_id: int
     inventory_id: int
-    quantity: int
-    order_date: str  
+    quantity: int = Field(gt=0)
+    order_date: date
 
 class OrderRead(BaseModel):
     order_id: int
     user_id: int
     inventory_id: int
     quantity: int
-    order_date: str
\ No newline at end of file
+    order_date: date
+
+class OrderLine(BaseModel):
+    inventory_id: int
+    quantity: int = Field(gt=0)
+
+class OrderBatchCreate(BaseModel):
+    user_id: int
+    order_date: date
+    items: list[OrderLine] = Field(min_length=1)
+    # all_or_nothing rejects the whole basket if any line fails, best_effort places what it can
+    mode: Literal["all_or_nothing", "best_effort"] = "all_or_nothing"
+
+class OrderLineError(BaseModel):
+    inventory_id: int
+    detail: str
+
+class OrderBatchRead(BaseModel):
+    orders: list[OrderRead]
+    errors: list[OrderLineError]
+
+class OrderDetailRead(OrderRead):
+    # Filled in when the related rows are expanded
+    item_name: Optional[str] = None
+    item_category: Optional[str] = None
+    user_name: Optional[str] = None
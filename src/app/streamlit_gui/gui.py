@@ -1,3 +1,5 @@
+from datetime import date
+
 import requests
 import streamlit as st
 
@@ -55,21 +57,26 @@ def signup_page():
         else:
             st.error(response.json().get("detail", "Unknown error"))
 
+def fetch_all(path, params=None):
+    # List endpoints are paginated; follow the next cursor until the last page
+    params = dict(params or {}, limit=1000)
+    items = []
+    while True:
+        response = requests.get(f"{BASE_URL}{path}", params=params)
+        response.raise_for_status()
+        items.extend(response.json())
+        next_cursor = response.headers.get("X-Next-Cursor")
+        if not next_cursor:
+            return items
+        params["cursor"] = next_cursor
+
 def fetch_inventory():
     try:
-        response = requests.get(f"{BASE_URL}/inventory")
-        return response.json() if response.status_code == 200 else []
+        return fetch_all("/inventory")
     except requests.exceptions.RequestException as e:
         st.error(f"Error fetching inventory: {e}")
         return []
 
-def fetch_item_name(item_id):
-    inventory = fetch_inventory()
-    for item in inventory:
-        if item["inventory_id"] == item_id:
-            return item["name"]
-    return "Unknown"
-
 def user_page():
     st.title("User Dashboard")
     st.write("Welcome to your dashboard!")
@@ -89,18 +96,14 @@ def user_page():
     if st.button("Refresh Orders"):
         user_id = st.session_state["user"]["user_id"]
         try:
-            response = requests.get(f"{BASE_URL}/order")
-            if response.status_code == 200:
-                orders = response.json()
-                user_orders = [order for order in orders if order["user_id"] == user_id]
-                if user_orders:
-                    for order in user_orders:
-                        item_name = fetch_item_name(order["inventory_id"])
-                        st.write(f"- Order ID: {order['order_id']}, Item: {item_name}, Quantity: {order['quantity']}")
-                else:
-                    st.write("No orders placed yet.")
+            # Orders come back with their item names joined server-side
+            user_orders = fetch_all(f"/user/{user_id}/orders")
+            if user_orders:
+                for order in user_orders:
+                    item_name = order.get("item_name", "Unknown")
+                    st.write(f"- Order ID: {order['order_id']}, Item: {item_name}, Quantity: {order['quantity']}")
             else:
-                st.error("Failed to load orders.")
+                st.write("No orders placed yet.")
         except requests.exceptions.RequestException as e:
             st.error(f"Error fetching orders: {e}")
 
@@ -115,7 +118,7 @@ def user_page():
                 "user_id": user_id,
                 "inventory_id": inventory_id,
                 "quantity": quantity,
-                "order_date": "2024-12-10"
+                "order_date": date.today().isoformat()
             })
             if response.status_code == 201:
                 st.success("Order placed successfully!")
@@ -176,17 +179,13 @@ def admin_page():
     st.subheader("All Orders")
     if st.button("Refresh Orders"):
         try:
-            response = requests.get(f"{BASE_URL}/order")
-            if response.status_code == 200:
-                orders = response.json()
-                if orders:
-                    for order in orders:
-                        item_name = fetch_item_name(order["inventory_id"])
-                        st.write(f"- Order ID: {order['order_id']}, User ID: {order['user_id']}, Item: {item_name}, Quantity: {order['quantity']}")
-                else:
-                    st.write("No orders placed yet.")
+            orders = fetch_all("/order", {"expand": "inventory,user"})
+            if orders:
+                for order in orders:
+                    item_name = order.get("item_name", "Unknown")
+                    st.write(f"- Order ID: {order['order_id']}, User: {order.get('user_name', order['user_id'])}, Item: {item_name}, Quantity: {order['quantity']}")
             else:
-                st.error("Failed to load orders.")
+                st.write("No orders placed yet.")
         except requests.exceptions.RequestException as e:
             st.error(f"Error fetching orders: {e}")
 
@@ -207,13 +206,9 @@ def admin_page():
     st.subheader("View All Users")
     if st.button("Refresh Users"):
         try:
-            response = requests.get(f"{BASE_URL}/user")
-            if response.status_code == 200:
-                users = response.json()
-                for user in users:
-                    st.write(f"- ID: {user['user_id']}, Name: {user['name']} ({user['role']})")
-            else:
-                st.error("Failed to load users.")
+            users = fetch_all("/user")
+            for user in users:
+                st.write(f"- ID: {user['user_id']}, Name: {user['name']} ({user['role']})")
         except requests.exceptions.RequestException as e:
             st.error(f"Error fetching users: {e}")
 
@@ -0,0 +1,248 @@
+import asyncio
+import heapq
+import itertools
+import json
+import math
+import time
+from collections import OrderedDict
+
+from src.app.database.settings import (
+    ADMISSION_ENABLED, RATE_LIMIT_PER_SECOND, RATE_LIMIT_BURST, RATE_LIMIT_ANONYMOUS, TRUSTED_PROXIES,
+    ADMISSION_CONCURRENCY, ADMISSION_RESERVED, ADMISSION_QUEUE_SIZE, ADMISSION_QUEUE_TIMEOUT_MS,
+)
+from src.app.utils.metrics import requests_shed
+from src.app.utils.security import decode_token
+
+CRITICAL, NORMAL, LOW = 0, 1, 2
+PRIORITY_NAMES = {CRITICAL: "critical", NORMAL: "normal", LOW: "low"}
+
+# Checked in order, the first (method, path prefix) that matches wins; unmatched writes are NORMAL
+PRIORITIES = (
+    ("POST", "/order", CRITICAL),
+    ("GET", "/", LOW),
+    ("HEAD", "/", LOW),
+)
+
+# Cheap or long-lived routes that never hold a database connection for long
+UNGATED_PATHS = {"/", "/metrics", "/db/pool", "/cache/stats", "/admission/stats", "/notification/stream"}
+
+MAX_TRACKED_CLIENTS = 100000
+
+
+class Shed(Exception):
+    def __init__(self, reason: str, status_code: int, retry_after: int):
+        self.reason = reason
+        self.status_code = status_code
+        self.retry_after = retry_after
+
+
+def request_priority(method: str, path: str) -> int:
+    for rule_method, prefix, priority in PRIORITIES:
+        if method == rule_method and path.startswith(prefix):
+            return priority
+    return NORMAL
+
+
+def client_ip(scope, trusted_proxies: set = TRUSTED_PROXIES) -> str:
+    """
+    The peer address, or behind trusted proxies the nearest X-Forwarded-For hop that isn't one of them.
+    """
+    client = scope.get("client")
+    address = client[0] if client else "unknown"
+    if address not in trusted_proxies:
+        return address
+    hops = [
+        hop.strip()
+        for name, value in scope.get("headers", ())
+        if name == b"x-forwarded-for"
+        for hop in value.decode("latin-1").split(",")
+    ]
+    for hop in reversed(hops):
+        if hop and hop not in trusted_proxies:
+            return hop
+    return address
+
+
+def client_key(scope) -> str:
+    """
+    The signed-in user when the request carries a valid bearer token, the client IP otherwise.
+    """
+    for name, value in scope.get("headers", ()):
+        if name == b"authorization":
+            scheme, _, token = value.decode("latin-1").partition(" ")
+            claims = decode_token(token) if scheme.lower() == "bearer" else None
+            if claims:
+                return f"user:{claims['sub']}"
+            break
+    return f"ip:{client_ip(scope)}"
+
+
+class RateLimiter:
+    """
+    Token bucket per client, refilled at `rate` tokens per second up to `burst`.
+    Clients keyed by IP are only limited with `anonymous`.
+    The least recently seen clients are forgotten past MAX_TRACKED_CLIENTS.
+    """
+    def __init__(self, rate: int = RATE_LIMIT_PER_SECOND, burst: int = RATE_LIMIT_BURST,
+                 anonymous: bool = RATE_LIMIT_ANONYMOUS):
+        self.rate = rate
+        self.burst = max(burst, 1)
+        self.anonymous = anonymous
+        self.buckets = OrderedDict()
+
+    def take(self, client: str) -> float:
+        """
+        Spend one token. Returns 0 when allowed, otherwise the seconds until a token is available.
+        """
+        if self.rate <= 0 or (not self.anonymous and client.startswith("ip:")):
+            return 0.0
+        now = time.monotonic()
+        tokens, last = self.buckets.pop(client, (self.burst, now))
+        tokens = min(self.burst, tokens + (now - last) * self.rate)
+        if tokens >= 1:
+            tokens -= 1
+            wait = 0.0
+        else:
+            wait = (1 - tokens) / self.rate
+        self.buckets[client] = (tokens, now)
+        if len(self.buckets) > MAX_TRACKED_CLIENTS:
+            self.buckets.popitem(last=False)
+        return wait
+
+
+class PriorityGate:
+    """
+    Concurrency cap with a bounded wait queue served in priority order.
+    Low-priority requests never take the last `reserved` slots.
+    """
+    def __init__(self, capacity: int = ADMISSION_CONCURRENCY, reserved: int = ADMISSION_RESERVED,
+                 queue_size: int = ADMISSION_QUEUE_SIZE, timeout: float = ADMISSION_QUEUE_TIMEOUT_MS / 1000):
+        self.capacity = max(capacity, 1)
+        self.reserved = min(reserved, self.capacity - 1)
+        self.queue_size = queue_size
+        self.timeout = timeout
+        self.in_use = 0
+        self.waiters = []
+        self.counter = itertools.count()
+
+    def has_room(self, priority: int) -> bool:
+        limit = self.capacity - self.reserved if priority == LOW else self.capacity
+        return self.in_use < limit
+
+    def waiting(self) -> list:
+        return [waiter for waiter in self.waiters if not waiter[2].done()]
+
+    async def acquire(self, priority: int):
+        waiting = self.waiting()
+        # Requests only skip the queue when nobody of the same or higher priority is ahead of them
+        if self.has_room(priority) and not any(waiter[0] <= priority for waiter in waiting):
+            self.in_use += 1
+            return
+        if len(waiting) >= self.queue_size:
+            worst = max(waiting)
+            if worst[0] <= priority:
+                raise Shed("queue_full", 503, 1)
+            # Make room by shedding the lowest-priority request still waiting
+            worst[2].set_exception(Shed("queue_full", 503, 1))
+
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self.waiters, (priority, next(self.counter), future))
+        try:
+            await asyncio.wait_for(future, self.timeout)
+        except TimeoutError:
+            # release() may have handed over a slot just as the wait timed out
+            self.return_handed_slot(future)
+            raise Shed("queue_timeout", 503, max(1, math.ceil(self.timeout)))
+        except asyncio.CancelledError:
+            # The client went away just as a slot was handed over
+            self.return_handed_slot(future)
+            raise
+
+    def return_handed_slot(self, future):
+        if future.done() and not future.cancelled() and future.exception() is None:
+            self.release()
+
+    def release(self):
+        self.in_use -= 1
+        while self.waiters:
+            priority, _, future = self.waiters[0]
+            if future.done():
+                heapq.heappop(self.waiters)
+                continue
+            if not self.has_room(priority):
+                break
+            heapq.heappop(self.waiters)
+            self.in_use += 1
+            future.set_result(None)
+
+
+class AdmissionController:
+    def __init__(self):
+        self.limiter = RateLimiter()
+        self.gate = PriorityGate()
+        self.admitted = {name: 0 for name in PRIORITY_NAMES.values()}
+        self.shed = {}
+
+    def record_shed(self, reason: str, priority: int):
+        name = PRIORITY_NAMES[priority]
+        self.shed[(reason, name)] = self.shed.get((reason, name), 0) + 1
+        requests_shed.inc(reason, name)
+
+    def stats(self) -> dict:
+        return {
+            "capacity": self.gate.capacity,
+            "in_use": self.gate.in_use,
+            "waiting": len(self.gate.waiting()),
+            "admitted": self.admitted,
+            "shed": [{"reason": reason, "priority": name, "count": count} for (reason, name), count in self.shed.items()],
+        }
+
+
+admission = AdmissionController()
+
+
+async def reject(send, shed: Shed):
+    body = json.dumps({"detail": "Too many requests." if shed.status_code == 429 else "Server busy, retry later."}).encode()
+    await send({
+        "type": "http.response.start",
+        "status": shed.status_code,
+        "headers": [
+            (b"content-type", b"application/json"),
+            (b"content-length", str(len(body)).encode()),
+            (b"retry-after", str(shed.retry_after).encode()),
+        ],
+    })
+    await send({"type": "http.response.body", "body": body})
+
+
+class AdmissionMiddleware:
+    """
+    Rate limits each client and caps concurrent requests to what the database pool
+    can serve, queueing the excess by priority. Requests that can't be served soon
+    get an immediate 429 or 503 with Retry-After instead of waiting on the pool.
+    """
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not ADMISSION_ENABLED:
+            return await self.app(scope, receive, send)
+
+        priority = request_priority(scope["method"], scope["path"])
+        wait = admission.limiter.take(client_key(scope))
+        if wait:
+            admission.record_shed("rate_limited", priority)
+            return await reject(send, Shed("rate_limited", 429, math.ceil(wait)))
+        if scope["path"] in UNGATED_PATHS:
+            return await self.app(scope, receive, send)
+
+        try:
+            await admission.gate.acquire(priority)
+        except Shed as shed:
+            admission.record_shed(shed.reason, priority)
+            return await reject(send, shed)
+        admission.admitted[PRIORITY_NAMES[priority]] += 1
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            admission.gate.release()
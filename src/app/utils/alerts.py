@@ -0,0 +1,122 @@
+import asyncio
+import logging
+import time
+
+from sqlmodel import select
+
+from src.app.database.connectivity import async_session
+from src.app.database.settings import LOW_STOCK_QUEUE_SIZE, LOW_STOCK_BATCH_SIZE, LOW_STOCK_DEBOUNCE
+from src.app.models.user import User
+from src.app.utils.writebehind import notification_writer
+
+logger = logging.getLogger(__name__)
+
+# Wait this long for more alerts before writing a batch
+BATCH_LINGER = 0.5
+
+
+def crossed_threshold(row, delta: int) -> bool:
+    """
+    True when a stock change of `delta` took the item from above its threshold to at or below it.
+    """
+    return row.quantity <= row.threshold < row.quantity - delta
+
+
+class LowStockMonitor:
+    """
+    Turns low-stock crossings reported by writers into Notification rows for every admin.
+    Writers only enqueue; a single background worker debounces and writes in batches.
+    """
+    def __init__(self, queue_size: int = LOW_STOCK_QUEUE_SIZE, batch_size: int = LOW_STOCK_BATCH_SIZE,
+                 debounce: int = LOW_STOCK_DEBOUNCE):
+        self.queue = asyncio.Queue(maxsize=queue_size)
+        self.batch_size = batch_size
+        self.debounce = debounce
+        self.last_alert = {}
+        self.task = None
+        self.batch = []
+        self.dropped = 0
+        self.sent = 0
+
+    def check(self, inventory_id: int, row, delta: int):
+        """
+        Called after a stock change is committed, with the updated row and the signed change.
+        """
+        if not crossed_threshold(row, delta):
+            return
+        try:
+            self.queue.put_nowait((inventory_id, row.name, row.quantity, row.threshold))
+        except asyncio.QueueFull:
+            # Never block an order on alerting
+            self.dropped += 1
+
+    def start(self):
+        if self.task is None:
+            self.task = asyncio.create_task(self.run())
+
+    async def stop(self):
+        if self.task is None:
+            return
+        self.task.cancel()
+        try:
+            await self.task
+        except asyncio.CancelledError:
+            pass
+        self.task = None
+        # Write out the batch in progress and whatever is still queued
+        alerts, self.batch = self.batch, []
+        while alerts:
+            await self.flush(alerts)
+            alerts = self.drain()
+
+    def drain(self) -> list:
+        alerts = []
+        while not self.queue.empty() and len(alerts) < self.batch_size:
+            alerts.append(self.queue.get_nowait())
+        return alerts
+
+    async def run(self):
+        while True:
+            self.batch = [await self.queue.get()]
+            await asyncio.sleep(BATCH_LINGER)
+            self.batch += self.drain()
+            try:
+                await self.flush(self.batch)
+            except Exception:
+                logger.exception("Failed to write %d low-stock alerts", len(self.batch))
+            self.batch = []
+
+    async def flush(self, alerts: list):
+        now = time.monotonic()
+        pending = {}
+        for inventory_id, name, quantity, threshold in alerts:
+            if now - self.last_alert.get(inventory_id, float("-inf")) < self.debounce:
+                continue
+            # Only the latest state of an item matters within a batch
+            pending[inventory_id] = (name, quantity, threshold)
+        if not pending:
+            return
+
+        async with async_session() as session:
+            result = await session.execute(select(User.user_id).where(User.role == "admin"))
+            admin_ids = result.scalars().all()
+        rows = [
+            {
+                "user_id": user_id,
+                "message": f"Low stock: {name} (ID {inventory_id}) has {quantity} left, threshold is {threshold}.",
+                "status": "unread",
+            }
+            for inventory_id, (name, quantity, threshold) in pending.items()
+            for user_id in admin_ids
+        ]
+        # Queued behind the write-behind buffer, which commits and pushes them in batches
+        await notification_writer.write(rows)
+        for inventory_id in pending:
+            self.last_alert[inventory_id] = now
+        self.sent += len(pending)
+
+    def stats(self) -> dict:
+        return {"queued": self.queue.qsize(), "sent": self.sent, "dropped": self.dropped}
+
+
+low_stock_monitor = LowStockMonitor()
@@ -0,0 +1,206 @@
+import argparse
+import asyncio
+from datetime import date, timedelta
+
+from fastapi import HTTPException
+from sqlalchemy import delete, func, insert, select
+from sqlalchemy.dialects import postgresql, sqlite
+
+from src.app.database.connectivity import async_session
+from src.app.models.inventory import Inventory
+from src.app.models.order import Order, OrderArchive
+from src.app.models.sales import ItemDailySales, CategoryDailySales
+from src.app.utils.archive import iter_archived_orders
+
+# Longest range a single report may cover, keeps reads bounded whatever the order history
+MAX_REPORT_DAYS = 366
+DEFAULT_REPORT_DAYS = 30
+# Days rebuilt per transaction by the backfill
+REBUILD_CHUNK_DAYS = 31
+# Rollup rows per upsert statement when adding archived orders
+UPSERT_BATCH_SIZE = 1000
+
+ROLLUPS = (
+    (ItemDailySales.__table__, "inventory_id"),
+    (CategoryDailySales.__table__, "category"),
+)
+
+
+def upsert(session, table, rows: list[dict], key: str):
+    """
+    INSERT ... ON CONFLICT that adds the rows' units and orders to existing totals.
+    """
+    dialect = postgresql if session.get_bind().dialect.name == "postgresql" else sqlite
+    statement = dialect.insert(table).values(rows)
+    return statement.on_conflict_do_update(
+        index_elements=[table.c[key], table.c.day],
+        set_={
+            "units": table.c.units + statement.excluded.units,
+            "orders": table.c.orders + statement.excluded.orders,
+        },
+    )
+
+
+async def record_sales(session, lines):
+    """
+    Add placed order lines, as (inventory_id, category, order_date, quantity), to the
+    rollups. Call it in the transaction that inserts the orders so both commit together.
+    """
+    totals = {"inventory_id": {}, "category": {}}
+    for inventory_id, category, day, quantity in lines:
+        for key, value in (("inventory_id", inventory_id), ("category", category)):
+            units, orders = totals[key].get((value, day), (0, 0))
+            # One row per key and day, ON CONFLICT cannot touch the same row twice in a statement
+            totals[key][(value, day)] = (units + quantity, orders + 1)
+
+    for table, key in ROLLUPS:
+        rows = [
+            {key: value, "day": day, "units": units, "orders": orders}
+            for (value, day), (units, orders) in totals[key].items()
+        ]
+        if rows:
+            await session.execute(upsert(session, table, rows, key))
+
+
+async def archived_sales(date_from: date, date_to: date) -> dict:
+    """
+    Units and orders per (inventory_id, day) of the archived orders in the range.
+    """
+    totals = {}
+    async for rows in iter_archived_orders(date_from, date_to):
+        for _, _, inventory_id, quantity, day in rows:
+            units, orders = totals.get((inventory_id, day), (0, 0))
+            totals[(inventory_id, day)] = (units + quantity, orders + 1)
+    return totals
+
+
+async def add_archived_sales(session, totals: dict) -> dict:
+    """
+    Add archived_sales() totals to the rollups. Like the rebuild from the order table,
+    items that no longer exist are skipped and categories are the items' current ones.
+    """
+    categories = {}
+    ids = list({inventory_id for inventory_id, _ in totals})
+    for i in range(0, len(ids), UPSERT_BATCH_SIZE):
+        result = await session.execute(
+            select(Inventory.inventory_id, Inventory.category).where(Inventory.inventory_id.in_(ids[i:i + UPSERT_BATCH_SIZE]))
+        )
+        categories.update(result.all())
+
+    rows = {"inventory_id": {}, "category": {}}
+    for (inventory_id, day), (units, orders) in totals.items():
+        if inventory_id not in categories:
+            continue
+        rows["inventory_id"][(inventory_id, day)] = (units, orders)
+        previous = rows["category"].get((categories[inventory_id], day), (0, 0))
+        rows["category"][(categories[inventory_id], day)] = (previous[0] + units, previous[1] + orders)
+
+    counts = {}
+    for table, key in ROLLUPS:
+        values = [
+            {key: value, "day": day, "units": units, "orders": orders}
+            for (value, day), (units, orders) in rows[key].items()
+        ]
+        for i in range(0, len(values), UPSERT_BATCH_SIZE):
+            await session.execute(upsert(session, table, values[i:i + UPSERT_BATCH_SIZE], key))
+        counts[key] = len(values)
+    return counts
+
+
+async def rebuild_sales(date_from: date = None, date_to: date = None) -> dict:
+    """
+    Recompute the rollups from the raw orders, one chunk of days per transaction.
+    Orders archived out of the order table are read back from their files.
+    Defaults to the full order history. Orders placed in a chunk while it is being
+    rebuilt can be counted twice, so run it when order traffic is quiet.
+    """
+    async with async_session() as session:
+        if date_from is None or date_to is None:
+            first, last = (await session.execute(select(func.min(Order.order_date), func.max(Order.order_date)))).one()
+            archived_first = (await session.execute(select(func.min(OrderArchive.month)))).scalar_one()
+            if archived_first is not None:
+                first = min(first, archived_first) if first else archived_first
+            date_from = date_from or first or date.today()
+            date_to = date_to or last or date.today()
+
+    counts = {"item_rows": 0, "category_rows": 0}
+    chunk_start = date_from
+    while chunk_start <= date_to:
+        chunk_end = min(chunk_start + timedelta(days=REBUILD_CHUNK_DAYS - 1), date_to)
+        # Read before the chunk's transaction starts, the archive index is queried on its own session
+        archived = await archived_sales(chunk_start, chunk_end)
+        async with async_session() as session:
+            for (table, key), count_key in zip(ROLLUPS, counts):
+                await session.execute(delete(table).where(table.c.day.between(chunk_start, chunk_end)))
+                key_column = Order.inventory_id if key == "inventory_id" else Inventory.category
+                totals = (
+                    select(key_column, Order.order_date, func.sum(Order.quantity), func.count())
+                    .join(Inventory, Inventory.inventory_id == Order.inventory_id)
+                    .where(Order.order_date.between(chunk_start, chunk_end))
+                    .group_by(key_column, Order.order_date)
+                )
+                result = await session.execute(insert(table).from_select([key, "day", "units", "orders"], totals))
+                counts[count_key] += result.rowcount
+            if archived:
+                added = await add_archived_sales(session, archived)
+                counts["item_rows"] += added["inventory_id"]
+                counts["category_rows"] += added["category"]
+            await session.commit()
+        chunk_start = chunk_end + timedelta(days=1)
+    return {"date_from": date_from, "date_to": date_to, **counts}
+
+
+def report_range(date_from: date = None, date_to: date = None) -> tuple[date, date]:
+    date_to = date_to or date.today()
+    date_from = date_from or date_to - timedelta(days=DEFAULT_REPORT_DAYS - 1)
+    if date_from > date_to:
+        raise HTTPException(status_code=400, detail="date_from must not be after date_to.")
+    if (date_to - date_from).days >= MAX_REPORT_DAYS:
+        raise HTTPException(status_code=400, detail=f"Reports cover at most {MAX_REPORT_DAYS} days.")
+    return date_from, date_to
+
+
+def week_start(day: date) -> date:
+    return day - timedelta(days=day.weekday())
+
+
+async def sales_report(session, table, key: str, period: str, date_from: date, date_to: date, value=None) -> list[dict]:
+    """
+    Units and orders per key and day (or ISO week, starting Monday) from a rollup table.
+    Weeks are folded from the daily rows, at most seven per key.
+    """
+    if period == "week":
+        # Whole weeks, so the first and last buckets aren't partial
+        date_from, date_to = week_start(date_from), week_start(date_to) + timedelta(days=6)
+    statement = (
+        select(table.c[key], table.c.day, table.c.units, table.c.orders)
+        .where(table.c.day.between(date_from, date_to))
+        .order_by(table.c.day, table.c[key])
+    )
+    if value is not None:
+        statement = statement.where(table.c[key] == value)
+    rows = (await session.execute(statement)).all()
+
+    if period == "day":
+        return [{key: row[0], "period_start": row.day, "units": row.units, "orders": row.orders} for row in rows]
+    weeks = {}
+    for row in rows:
+        bucket = weeks.setdefault((week_start(row.day), row[0]), [0, 0])
+        bucket[0] += row.units
+        bucket[1] += row.orders
+    return [
+        {key: value, "period_start": start, "units": units, "orders": orders}
+        for (start, value), (units, orders) in sorted(weeks.items())
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Rebuild the sales rollup tables from the orders.")
+    parser.add_argument("--from", dest="date_from", type=date.fromisoformat, help="first day, defaults to the first order")
+    parser.add_argument("--to", dest="date_to", type=date.fromisoformat, help="last day, defaults to the last order")
+    args = parser.parse_args()
+    print(asyncio.run(rebuild_sales(args.date_from, args.date_to)))
+
+
+if __name__ == "__main__":
+    main()
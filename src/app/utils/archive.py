@@ -0,0 +1,381 @@
+import argparse
+import asyncio
+import csv
+import gzip
+import logging
+import os
+import uuid
+from contextlib import asynccontextmanager
+from datetime import date, datetime, timezone
+
+from sqlalchemy import delete, func, select, text
+from sqlalchemy.exc import DBAPIError
+
+from src.app.database.connectivity import async_session, engine
+from src.app.database.settings import (
+    ORDER_RETENTION_MONTHS, ORDER_ARCHIVE_DIR, ORDER_ARCHIVE_FORMAT, ORDER_ARCHIVE_INTERVAL, ORDER_ARCHIVE_ENABLED,
+    ORDER_PARTITIONS_AHEAD,
+)
+from src.app.models.order import Order, OrderArchive
+from src.app.schemas.order import OrderRead
+
+logger = logging.getLogger(__name__)
+
+FORMATS = ("csv.gz", "parquet")
+# Archive files hold the OrderRead columns, in this order
+ARCHIVE_COLUMNS = [getattr(Order, f) for f in OrderRead.model_fields]
+ARCHIVE_CHUNK_SIZE = 10000
+# Postgres advisory lock key held by the archival run, arbitrary but fixed
+ARCHIVE_LOCK_KEY = 0x6f72646572
+
+
+def month_start(day: date) -> date:
+    return day.replace(day=1)
+
+
+def add_months(month: date, months: int) -> date:
+    index = month.year * 12 + month.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(month: date) -> str:
+    return f"order_p{month:%Y_%m}"
+
+
+def parquet():
+    try:
+        import pyarrow
+        import pyarrow.parquet
+    except ImportError:
+        raise RuntimeError("ORDER_ARCHIVE_FORMAT=parquet requires the pyarrow package")
+    return pyarrow
+
+
+class ArchiveWriter:
+    """
+    Writes orders to a gzipped CSV or zstd-compressed Parquet file. Data goes to a
+    temporary name and is only renamed into place once synced to disk.
+    `path` must be unique to this writer, discard() removes it once it was created.
+    """
+    def __init__(self, path: str, format: str):
+        if format not in FORMATS:
+            raise RuntimeError(f"Unknown ORDER_ARCHIVE_FORMAT {format!r}, use one of {', '.join(FORMATS)}")
+        self.path = path
+        self.temporary = path + ".tmp"
+        self.format = format
+        self.created = False
+        self.names = [column.key for column in ARCHIVE_COLUMNS]
+        if format == "parquet":
+            pa = parquet()
+            self.schema = pa.schema([(name, pa.int64()) for name in self.names[:-1]] + [("order_date", pa.date32())])
+            self.writer = pa.parquet.ParquetWriter(self.temporary, self.schema, compression="zstd")
+        else:
+            self.file = gzip.open(self.temporary, "wt", newline="")
+            self.writer = csv.writer(self.file)
+            self.writer.writerow(self.names)
+
+    def write(self, rows):
+        if self.format == "parquet":
+            self.writer.write_table(parquet().Table.from_pydict(dict(zip(self.names, zip(*rows))), self.schema))
+        else:
+            self.writer.writerows(rows)
+
+    def close(self):
+        if self.format == "parquet":
+            self.writer.close()
+        else:
+            self.file.close()
+        with open(self.temporary, "rb") as file:
+            os.fsync(file.fileno())
+        os.replace(self.temporary, self.path)
+        self.created = True
+
+    def discard(self):
+        # Only files this writer made, never an archive written by another run
+        for path, owned in ((self.temporary, True), (self.path, self.created)):
+            if owned and os.path.exists(path):
+                os.remove(path)
+
+
+def read_archive(path: str, format: str):
+    """
+    Orders in an archive file as (order_id, user_id, inventory_id, quantity, order_date)
+    tuples, one list per chunk.
+    """
+    if format == "parquet":
+        for batch in parquet().parquet.ParquetFile(path).iter_batches(ARCHIVE_CHUNK_SIZE):
+            yield list(zip(*(column.to_pylist() for column in batch.columns)))
+        return
+    with gzip.open(path, "rt", newline="") as file:
+        reader = csv.reader(file)
+        next(reader)
+        chunk = []
+        for order_id, user_id, inventory_id, quantity, order_date in reader:
+            chunk.append((int(order_id), int(user_id), int(inventory_id), int(quantity), date.fromisoformat(order_date)))
+            if len(chunk) == ARCHIVE_CHUNK_SIZE:
+                yield chunk
+                chunk = []
+        if chunk:
+            yield chunk
+
+
+async def iter_archived_orders(date_from: date = None, date_to: date = None, user_id: int = None):
+    """
+    Archived orders dated from `date_from` to `date_to` (both optional and inclusive),
+    oldest month first, as lists of row tuples. Only the files of the months in range are read.
+    """
+    query = select(OrderArchive.path, OrderArchive.format).order_by(OrderArchive.month, OrderArchive.archive_id)
+    if date_from is not None:
+        query = query.where(OrderArchive.month >= month_start(date_from))
+    if date_to is not None:
+        query = query.where(OrderArchive.month <= date_to)
+    async with async_session() as session:
+        files = (await session.execute(query)).all()
+
+    for path, format in files:
+        chunks = read_archive(path, format)
+        try:
+            # File reads and decoding happen off the event loop
+            while (chunk := await asyncio.to_thread(next, chunks, None)) is not None:
+                rows = [
+                    row for row in chunk
+                    if (date_from is None or row[4] >= date_from)
+                    and (date_to is None or row[4] <= date_to)
+                    and (user_id is None or row[1] == user_id)
+                ]
+                if rows:
+                    yield rows
+        finally:
+            chunks.close()
+
+
+async def is_partitioned(session) -> bool:
+    """
+    True when the order table is partitioned by month, i.e. on Postgres after migration 0007.
+    """
+    if session.get_bind().dialect.name != "postgresql":
+        return False
+    result = await session.execute(text(
+        "SELECT EXISTS (SELECT 1 FROM pg_partitioned_table WHERE partrelid = to_regclass('\"order\"'))"
+    ))
+    return result.scalar_one()
+
+
+async def partition_exists(session, name: str) -> bool:
+    return (await session.execute(text("SELECT to_regclass(:name)"), {"name": name})).scalar_one() is not None
+
+
+async def ensure_partitions(months_ahead: int = ORDER_PARTITIONS_AHEAD) -> list[str]:
+    """
+    Create the monthly order partitions for this month and the next `months_ahead`,
+    when the order table is partitioned. Returns the partitions created.
+    """
+    created = []
+    async with async_session() as session:
+        if not await is_partitioned(session):
+            return created
+        current = month_start(date.today())
+        for offset in range(months_ahead + 1):
+            month = add_months(current, offset)
+            name = partition_name(month)
+            if await partition_exists(session, name):
+                continue
+            try:
+                async with session.begin_nested():
+                    await session.execute(text(
+                        f"CREATE TABLE {name} PARTITION OF \"order\" "
+                        f"FOR VALUES FROM ('{month}') TO ('{add_months(month, 1)}')"
+                    ))
+                created.append(name)
+            except DBAPIError:
+                # Orders dated in the month already landed in the default partition
+                logger.exception("Could not create order partition %s", name)
+        await session.commit()
+    return created
+
+
+async def remove_month(session, month: date, expected: int) -> bool:
+    """
+    Delete the orders dated in `month`, dropping its partition when there is one.
+    Returns False, leaving the caller to roll back, unless exactly `expected` orders were removed.
+    """
+    removed = 0
+    name = partition_name(month)
+    if await is_partitioned(session) and await partition_exists(session, name):
+        # Holds off new orders for the month until the partition is gone
+        await session.execute(text(f"LOCK TABLE {name} IN ACCESS EXCLUSIVE MODE"))
+        removed += (await session.execute(text(f"SELECT count(*) FROM {name}"))).scalar_one()
+        await session.execute(text(f"ALTER TABLE \"order\" DETACH PARTITION {name}"))
+        await session.execute(text(f"DROP TABLE {name}"))
+    # Anything in the default partition, or the whole month when the table isn't partitioned
+    result = await session.execute(
+        delete(Order)
+        .where(Order.order_date >= month, Order.order_date < add_months(month, 1))
+        .execution_options(synchronize_session=False)
+    )
+    removed += result.rowcount
+    return removed == expected
+
+
+async def archive_month(month: date, format: str = ORDER_ARCHIVE_FORMAT) -> int:
+    """
+    Move the orders dated in `month` out of the order table into an archive file.
+    The file is synced before the orders are deleted, and the delete commits together
+    with the file's order_archive row. If orders for the month arrive meanwhile nothing
+    is deleted and the file is discarded, the next run tries again.
+    Returns the orders archived.
+    """
+    directory = os.path.abspath(ORDER_ARCHIVE_DIR)
+    os.makedirs(directory, exist_ok=True)
+    stamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S")
+    # The random suffix keeps runs in the same second from sharing a file
+    name = f"orders-{month:%Y-%m}-{stamp}-{uuid.uuid4().hex[:12]}.{format}"
+    writer = ArchiveWriter(os.path.join(directory, name), format)
+    try:
+        rows = 0
+        async with async_session() as session:
+            result = await session.stream(
+                select(*ARCHIVE_COLUMNS)
+                .where(Order.order_date >= month, Order.order_date < add_months(month, 1))
+                .order_by(Order.order_id)
+                .execution_options(yield_per=ARCHIVE_CHUNK_SIZE)
+            )
+            async for partition in result.partitions():
+                await asyncio.to_thread(writer.write, partition)
+                rows += len(partition)
+            await asyncio.to_thread(writer.close)
+
+            if await remove_month(session, month, rows):
+                if rows:
+                    session.add(OrderArchive(
+                        month=month, path=writer.path, format=format, rows=rows,
+                        archived_at=datetime.now(timezone.utc).replace(tzinfo=None),
+                    ))
+                await session.commit()
+                if rows:
+                    return rows
+            else:
+                await session.rollback()
+                logger.warning("Orders for %s changed while archiving, leaving them for the next run", f"{month:%Y-%m}")
+        writer.discard()
+        return 0
+    except BaseException:
+        writer.discard()
+        raise
+
+
+run_lock = asyncio.Lock()
+
+
+@asynccontextmanager
+async def single_run(allow_unlocked: bool = False):
+    """
+    Yields True when no other archival run is going on: none in this process, and on
+    Postgres none in any process, through a session-level advisory lock. Yields False
+    otherwise, and on other backends, which have no lock shared between processes,
+    unless `allow_unlocked` vouches that nothing else is archiving.
+    """
+    if run_lock.locked() or (engine.dialect.name != "postgresql" and not allow_unlocked):
+        yield False
+        return
+    async with run_lock:
+        if engine.dialect.name != "postgresql":
+            yield True
+            return
+        # Autocommit, so the connection holding the lock doesn't sit idle in a transaction
+        async with engine.connect() as conn:
+            conn = await conn.execution_options(isolation_level="AUTOCOMMIT")
+            if not (await conn.execute(text("SELECT pg_try_advisory_lock(:key)"), {"key": ARCHIVE_LOCK_KEY})).scalar_one():
+                yield False
+                return
+            try:
+                yield True
+            finally:
+                await conn.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": ARCHIVE_LOCK_KEY})
+
+
+async def archive_orders(retention_months: int = ORDER_RETENTION_MONTHS, format: str = ORDER_ARCHIVE_FORMAT,
+                         allow_unlocked: bool = False) -> dict:
+    """
+    Archive, oldest first, every month before the last `retention_months` full months.
+    Does nothing, and says why under "skipped", while another run is in progress or
+    when the database can't keep runs from overlapping (see single_run).
+    """
+    cutoff = add_months(month_start(date.today()), -retention_months)
+    async with single_run(allow_unlocked) as acquired:
+        if not acquired:
+            if engine.dialect.name == "postgresql" or allow_unlocked:
+                skipped = "another archival run is in progress"
+            else:
+                skipped = f"{engine.dialect.name} has no lock shared between processes, archive with --no-lock while nothing else does"
+            return {"kept_from": cutoff, "archived": {}, "skipped": skipped}
+        return await archive_expired(cutoff, format)
+
+
+async def archive_expired(cutoff: date, format: str) -> dict:
+    async with async_session() as session:
+        first = (await session.execute(select(func.min(Order.order_date)).where(Order.order_date < cutoff))).scalar_one()
+    archived = {}
+    month = month_start(first) if first else cutoff
+    while month < cutoff:
+        rows = await archive_month(month, format)
+        if rows:
+            archived[f"{month:%Y-%m}"] = rows
+        month = add_months(month, 1)
+    return {"kept_from": cutoff, "archived": archived}
+
+
+class OrderArchiver:
+    """
+    Creates upcoming order partitions every `interval` seconds, and with `enabled`
+    archives expired months too.
+    """
+    def __init__(self, interval: int = ORDER_ARCHIVE_INTERVAL, enabled: bool = ORDER_ARCHIVE_ENABLED):
+        self.interval = interval
+        self.enabled = enabled
+        self.task = None
+
+    def start(self):
+        if self.enabled and engine.dialect.name != "postgresql":
+            logger.warning("Order archival only runs on Postgres, use the CLI with --no-lock on %s", engine.dialect.name)
+        if self.task is None:
+            self.task = asyncio.create_task(self.run())
+
+    async def stop(self):
+        if self.task is None:
+            return
+        self.task.cancel()
+        try:
+            await self.task
+        except asyncio.CancelledError:
+            pass
+        self.task = None
+
+    async def run(self):
+        while True:
+            try:
+                await ensure_partitions()
+                if self.enabled:
+                    result = await archive_orders()
+                    if result["archived"]:
+                        logger.info("Archived orders: %s", result["archived"])
+            except Exception:
+                logger.exception("Order archival failed")
+            await asyncio.sleep(self.interval)
+
+
+order_archiver = OrderArchiver()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Move orders older than the retention window to archive files.")
+    parser.add_argument("--retention-months", type=int, default=ORDER_RETENTION_MONTHS)
+    parser.add_argument("--format", choices=FORMATS, default=ORDER_ARCHIVE_FORMAT)
+    parser.add_argument("--no-lock", action="store_true",
+                        help="archive on databases without advisory locks; only while no other process archives")
+    args = parser.parse_args()
+    print(asyncio.run(archive_orders(args.retention_months, args.format, args.no_lock)))
+
+
+if __name__ == "__main__":
+    main()
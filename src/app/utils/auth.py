@@ -1,14 +1,19 @@
-from fastapi import Depends, HTTPException
-from src.app.models.user import User
-from src.app.database.connectivity import async_session
-from sqlmodel.ext.asyncio.session import AsyncSession
+from typing import Optional
 
-async def get_current_user(user_id: int, session: AsyncSession = Depends(async_session)):
-    user = await session.get(User, user_id)
-    if not user:
-        raise HTTPException(status_code=404, detail="User not found")
-    return user
+from fastapi import Depends, Header, HTTPException
+from src.app.utils.security import decode_token
+
+async def get_current_user(authorization: Optional[str] = Header(default=None)) -> dict:
+    """
+    Claims of the signed bearer token issued at login, checked without a database round trip.
+    """
+    scheme, _, token = (authorization or "").partition(" ")
+    claims = decode_token(token) if scheme.lower() == "bearer" else None
+    if not claims:
+        raise HTTPException(status_code=401, detail="Invalid or expired token", headers={"WWW-Authenticate": "Bearer"})
+    return claims
 
-async def require_admin(user: User = Depends(get_current_user)):
-    if user.role != "admin":
-        raise HTTPException(status_code=403, detail="Not authorized")
\ No newline at end of file
+async def require_admin(user: dict = Depends(get_current_user)):
+    if user["role"] != "admin":
+        raise HTTPException(status_code=403, detail="Not authorized")
+    return user
@@ -0,0 +1,211 @@
+import codecs
+import csv
+import json
+
+from pydantic import ValidationError
+from sqlalchemy import insert, text
+from sqlalchemy.exc import DBAPIError
+
+try:
+    from asyncpg import PostgresError
+except ImportError:  # COPY is only used with the asyncpg driver
+    PostgresError = DBAPIError
+
+BATCH_SIZE = 1000
+ADJUST_BATCH_SIZE = 5000
+MAX_REPORTED_ERRORS = 1000
+
+CSV_TYPES = {"text/csv", "application/csv"}
+NDJSON_TYPES = {"application/x-ndjson", "application/ndjson", "application/jsonl"}
+
+
+class UploadError(Exception):
+    """
+    The upload could not be read from `row` on. Rows before it were already processed.
+    """
+    def __init__(self, row: int, detail: str):
+        super().__init__(detail)
+        self.row = row
+        self.detail = detail
+
+
+async def iter_lines(stream):
+    """
+    Decode an async byte stream into lines, line endings kept, without reading it all into memory.
+    On invalid UTF-8 the complete lines before the bad byte are yielded, then the error is raised.
+    """
+    decoder = codecs.getincrementaldecoder("utf-8-sig")()
+    buffer = ""
+    async for chunk in stream:
+        try:
+            buffer += decoder.decode(chunk)
+        except UnicodeDecodeError as e:
+            *lines, _ = (buffer + e.object[:e.start].decode("utf-8-sig")).split("\n")
+            for line in lines:
+                yield line + "\n"
+            raise
+        *lines, buffer = buffer.split("\n")
+        for line in lines:
+            yield line + "\n"
+    buffer += decoder.decode(b"", final=True)
+    if buffer:
+        yield buffer
+
+
+async def iter_csv_rows(lines):
+    """
+    Parse CSV rows from decoded lines. A quoted field may span several lines.
+    """
+    pending, quotes = [], 0
+    async for line in lines:
+        pending.append(line)
+        # An odd number of quotes so far means a quoted field is still open
+        quotes += line.count('"')
+        if quotes % 2:
+            continue
+        yield next(csv.reader(pending), [])
+        pending, quotes = [], 0
+    if pending:
+        yield next(csv.reader(pending), [])
+
+
+async def iter_records(stream, content_type: str):
+    """
+    Yield (row_number, dict) pairs from a CSV (with header) or NDJSON upload.
+    Rows that can't be parsed are yielded as (row_number, error message).
+    Raises ValueError for an unsupported content type before reading anything,
+    and UploadError when the body turns out not to be UTF-8.
+    """
+    media_type = content_type.split(";")[0].strip().lower()
+    if media_type not in CSV_TYPES | NDJSON_TYPES:
+        raise ValueError(f"Unsupported content type: {media_type or 'missing'}")
+
+    header = None
+    row_number = 0
+    try:
+        if media_type in CSV_TYPES:
+            async for values in iter_csv_rows(iter_lines(stream)):
+                if not values or (len(values) == 1 and not values[0].strip()):
+                    continue
+                if header is None:
+                    header = [h.strip() for h in values]
+                    continue
+                row_number += 1
+                if len(values) != len(header):
+                    yield row_number, f"Expected {len(header)} columns, got {len(values)}"
+                    continue
+                yield row_number, dict(zip(header, values))
+        else:
+            async for line in iter_lines(stream):
+                if not line.strip():
+                    continue
+                row_number += 1
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError as e:
+                    yield row_number, f"Invalid JSON: {e.msg}"
+                    continue
+                if not isinstance(record, dict):
+                    yield row_number, "Expected a JSON object"
+                    continue
+                yield row_number, record
+    except UnicodeDecodeError as e:
+        raise UploadError(row_number + 1, f"The body is not valid UTF-8: {e.reason}")
+
+
+async def iter_validated_batches(records, schema, batch_size: int = BATCH_SIZE):
+    """
+    Validate records against `schema` and group the valid ones into batches.
+    Yields (rows, errors) where rows are (row_number, dict) pairs.
+    On UploadError the rows read so far are still yielded before it is raised.
+    """
+    rows, errors = [], []
+    try:
+        async for row_number, record in records:
+            if isinstance(record, str):
+                errors.append({"row": row_number, "detail": record})
+                continue
+            try:
+                rows.append((row_number, schema(**record).model_dump()))
+            except ValidationError as e:
+                errors.append({"row": row_number, "detail": "; ".join(
+                    f"{'.'.join(str(p) for p in err['loc'])}: {err['msg']}" for err in e.errors()
+                )})
+            if len(rows) >= batch_size:
+                yield rows, errors
+                rows, errors = [], []
+    except UploadError:
+        if rows or errors:
+            yield rows, errors
+        raise
+    if rows or errors:
+        yield rows, errors
+
+
+async def allocate_ids(session, model, count: int) -> list[int]:
+    """
+    Draw `count` primary keys from the table's sequence, for rows written by COPY.
+    """
+    key = model.__table__.primary_key.columns[0].name
+    result = await session.execute(
+        text("SELECT nextval(pg_get_serial_sequence(:table, :column)::regclass) FROM generate_series(1, :count)"),
+        {"table": f'"{model.__tablename__}"', "column": key, "count": count},
+    )
+    return list(result.scalars())
+
+
+async def copy_rows(session, model, rows: list[dict]):
+    """
+    Write rows through asyncpg's binary COPY protocol.
+    """
+    columns = list(rows[0])
+    connection = await session.connection()
+    raw = await connection.get_raw_connection()
+    await raw.driver_connection.copy_records_to_table(
+        model.__tablename__,
+        records=[tuple(row[c] for c in columns) for row in rows],
+        columns=columns,
+    )
+
+
+async def write_batch(session, model, rows: list[tuple[int, dict]], after_insert=None) -> list[dict]:
+    """
+    Insert a batch of validated rows and commit it.
+    If the batch is rejected the rows are retried one by one inside savepoints,
+    so a single bad row doesn't abort the rest of the load.
+    `after_insert(session, inserted)`, given the (primary key, row) pairs that went in,
+    runs in the same transaction just before the commit.
+    Returns the per-row errors.
+    """
+    key = model.__table__.primary_key.columns[0]
+    use_copy = session.get_bind().dialect.driver == "asyncpg"
+    values = [row for _, row in rows]
+    try:
+        if use_copy:
+            if after_insert is not None:
+                ids = await allocate_ids(session, model, len(values))
+                values = [{key.name: pk, **row} for pk, row in zip(ids, values)]
+            await copy_rows(session, model, values)
+            ids = [row.get(key.name) for row in values]
+        else:
+            result = await session.execute(insert(model).returning(key, sort_by_parameter_order=True), values)
+            ids = list(result.scalars())
+        if after_insert is not None:
+            await after_insert(session, list(zip(ids, [row for _, row in rows])))
+        await session.commit()
+        return []
+    except (DBAPIError, PostgresError):
+        await session.rollback()
+
+    errors, inserted = [], []
+    for row_number, row in rows:
+        try:
+            async with session.begin_nested():
+                result = await session.execute(insert(model).values(**row).returning(key))
+            inserted.append((result.scalar_one(), row))
+        except DBAPIError as e:
+            errors.append({"row": row_number, "detail": str(e.orig)})
+    if after_insert is not None and inserted:
+        await after_insert(session, inserted)
+    await session.commit()
+    return errors
@@ -0,0 +1,215 @@
+import json
+import secrets
+import time
+from collections import OrderedDict
+from typing import Optional
+
+from src.app.database.connectivity import async_session
+from src.app.database.settings import CACHE_BACKEND, CACHE_URL, CACHE_TTL, CACHE_MAX_ENTRIES
+from src.app.models.inventory import Inventory
+from src.app.models.user import User
+
+
+class MemoryBackend:
+    """
+    Per-process cache with a TTL and size-bounded LRU eviction.
+    Version counters are kept apart from the entries and never expire.
+    """
+    def __init__(self, ttl: int = CACHE_TTL, max_entries: int = CACHE_MAX_ENTRIES):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.versions = {}
+        self.evictions = 0
+
+    async def get(self, key: str) -> Optional[dict]:
+        entry = self.entries.get(key)
+        if entry is None:
+            return None
+        expires, value = entry
+        if expires < time.monotonic():
+            del self.entries[key]
+            return None
+        self.entries.move_to_end(key)
+        return value
+
+    async def set(self, key: str, value: dict):
+        self.entries[key] = (time.monotonic() + self.ttl, value)
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+            self.evictions += 1
+
+    async def set_if_version(self, key: str, value: dict, version_key: str, version: int):
+        if self.versions.get(version_key) == version:
+            await self.set(key, value)
+
+    async def delete(self, *keys: str):
+        for key in keys:
+            self.entries.pop(key, None)
+
+    async def version(self, key: str) -> int:
+        # Counters start at random so a restarted process never reissues an old ETag
+        return self.versions.setdefault(key, secrets.randbits(48))
+
+    async def bump(self, *keys: str):
+        for key in keys:
+            self.versions[key] = await self.version(key) + 1
+
+    def size(self) -> int:
+        return len(self.entries)
+
+
+class RedisBackend:
+    """
+    Shared cache for multi-worker deployments, entries expire through Redis TTLs.
+    """
+    def __init__(self, url: str, ttl: int = CACHE_TTL):
+        try:
+            from redis import asyncio as redis
+        except ImportError:
+            raise RuntimeError("CACHE_BACKEND=redis requires the redis package")
+        self.client = redis.from_url(url)
+        self.ttl = ttl
+        self.evictions = 0
+
+    async def get(self, key: str) -> Optional[dict]:
+        value = await self.client.get(key)
+        return json.loads(value) if value is not None else None
+
+    async def set(self, key: str, value: dict):
+        await self.client.set(key, json.dumps(value), ex=self.ttl)
+
+    async def set_if_version(self, key: str, value: dict, version_key: str, version: int):
+        from redis.exceptions import WatchError
+
+        version_key = f"version:{version_key}"
+        async with self.client.pipeline(transaction=True) as pipeline:
+            try:
+                # The SET is dropped if the version changes between the check and the write
+                await pipeline.watch(version_key)
+                current = await pipeline.get(version_key)
+                if current is None or int(current) != version:
+                    return
+                pipeline.multi()
+                pipeline.set(key, json.dumps(value), ex=self.ttl)
+                await pipeline.execute()
+            except WatchError:
+                pass
+
+    async def delete(self, *keys: str):
+        if keys:
+            await self.client.delete(*keys)
+
+    async def version(self, key: str) -> int:
+        key = f"version:{key}"
+        value = await self.client.get(key)
+        if value is None:
+            await self.client.set(key, secrets.randbits(48), nx=True)
+            value = await self.client.get(key)
+        return int(value)
+
+    async def bump(self, *keys: str):
+        if keys:
+            async with self.client.pipeline(transaction=False) as pipeline:
+                for key in keys:
+                    pipeline.incr(f"version:{key}")
+                await pipeline.execute()
+
+    def size(self) -> Optional[int]:
+        return None
+
+
+def make_backend():
+    if CACHE_BACKEND == "redis":
+        return RedisBackend(CACHE_URL)
+    return MemoryBackend()
+
+
+class EntityCache:
+    """
+    Read-through cache for one entity type, keyed by primary key.
+    Writers must call `invalidate` after committing changes to an entity, which also
+    bumps the version counters behind the ETags of the entity and its collection.
+    """
+    def __init__(self, name: str, backend):
+        self.name = name
+        self.backend = backend
+        self.hits = 0
+        self.misses = 0
+
+    def key(self, entity_id) -> str:
+        return f"{self.name}:{entity_id}"
+
+    async def get_or_load(self, entity_id, loader) -> Optional[dict]:
+        value = await self.backend.get(self.key(entity_id))
+        if value is not None:
+            self.hits += 1
+            return value
+        self.misses += 1
+        key = self.key(entity_id)
+        # A write invalidating the entity while it loads bumps the version, and the
+        # possibly stale value isn't stored
+        version = await self.backend.version(key)
+        value = await loader()
+        if value is not None:
+            await self.backend.set_if_version(key, value, key, version)
+        return value
+
+    async def version(self, entity_id=None) -> int:
+        """
+        Changes whenever the entity is invalidated, or without an id, whenever any entity of this type is.
+        """
+        return await self.backend.version(self.name if entity_id is None else self.key(entity_id))
+
+    async def invalidate(self, *entity_ids):
+        """
+        Drop the entities from the cache and bump their versions. Without ids only the
+        collection's version is bumped, e.g. after a bulk insert.
+        """
+        keys = [self.key(entity_id) for entity_id in entity_ids]
+        await self.backend.delete(*keys)
+        await self.backend.bump(self.name, *keys)
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": self.hits / lookups if lookups else 0.0,
+            "entries": self.backend.size(),
+            "evictions": self.backend.evictions,
+        }
+
+
+inventory_cache = EntityCache("inventory", make_backend())
+user_cache = EntityCache("user", make_backend())
+
+
+async def get_cached_inventory(inventory_id: int, session=None) -> Optional[dict]:
+    async def load():
+        if session is not None:
+            item = await session.get(Inventory, inventory_id)
+        else:
+            async with async_session() as own_session:
+                item = await own_session.get(Inventory, inventory_id)
+        return item.model_dump() if item else None
+
+    return await inventory_cache.get_or_load(inventory_id, load)
+
+
+async def get_cached_user(user_id: int, session=None) -> Optional[dict]:
+    async def load():
+        if session is not None:
+            user = await session.get(User, user_id)
+        else:
+            async with async_session() as own_session:
+                user = await own_session.get(User, user_id)
+        # Passwords never go into the cache
+        return user.model_dump(exclude={"password"}) if user else None
+
+    return await user_cache.get_or_load(user_id, load)
+
+
+def cache_stats() -> dict:
+    return {"inventory": inventory_cache.stats(), "user": user_cache.stats()}
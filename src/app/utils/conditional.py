@@ -0,0 +1,59 @@
+import hashlib
+import logging
+from typing import Optional
+
+from fastapi import HTTPException, Request, Response
+
+from src.app.database.settings import CACHE_BACKEND, CONDITIONAL_REQUESTS, WEB_CONCURRENCY
+
+logger = logging.getLogger(__name__)
+
+if CONDITIONAL_REQUESTS and CACHE_BACKEND != "redis" and WEB_CONCURRENCY > 1:
+    logger.warning(
+        "CONDITIONAL_REQUESTS is on with the memory cache backend and %d workers, "
+        "ETags can stay unchanged on one worker after a write through another", WEB_CONCURRENCY,
+    )
+
+
+def make_etag(version: int, query: str) -> str:
+    # The query string picks the page, filters and fields, so it is part of the representation
+    digest = hashlib.blake2b(query.encode(), digest_size=6).hexdigest()
+    return f'"{version:x}-{digest}"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if if_none_match is None:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    # Weak comparison, as If-None-Match requires
+    return any(tag.strip().removeprefix("W/") == etag for tag in if_none_match.split(","))
+
+
+def conditional(cache, cache_control: str, item_param: Optional[str] = None):
+    """
+    Dependency for GET routes serving `cache`'s entity type: sets an ETag built from
+    the collection's version counter, or the item's when `item_param` names the path
+    parameter holding its id, and answers a matching If-None-Match with 304 before
+    the route runs, so no rows are queried or serialized.
+
+    The version is read before the route queries anything: a write committing in
+    between bumps it afterwards, so the response can only be labelled older than it
+    is and the next request refetches. With a read replica, a client may keep a
+    response as stale as the replica's lag until the next change.
+
+    Only active when CONDITIONAL_REQUESTS is on, which by default it is with the
+    redis backend or a single worker: the memory backend's counters are per process,
+    so a write through one worker would leave the ETags of the others unchanged.
+    """
+    async def check(request: Request, response: Response):
+        if not CONDITIONAL_REQUESTS:
+            return
+        entity_id = request.path_params.get(item_param) if item_param else None
+        etag = make_etag(await cache.version(entity_id), request.url.query)
+        headers = {"ETag": etag, "Cache-Control": cache_control}
+        if etag_matches(request.headers.get("if-none-match"), etag):
+            raise HTTPException(status_code=304, headers=headers)
+        response.headers.update(headers)
+
+    return check
@@ -0,0 +1,76 @@
+import csv
+import io
+import json
+import zlib
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import StreamingResponse
+from sqlmodel import select
+
+from src.app.database.connectivity import async_session
+
+EXPORT_CHUNK_SIZE = 1000
+
+MEDIA_TYPES = {"csv": "text/csv", "ndjson": "application/x-ndjson"}
+
+
+async def iter_export(columns, filters=(), order_by=None, format: str = "csv", prepend=None):
+    """
+    Stream the selected columns as CSV or NDJSON.
+    Rows are fetched through a server-side cursor and encoded one chunk at a time,
+    so memory stays flat regardless of table size. `prepend` is an optional async
+    iterable of row chunks, with the same columns, streamed before the query's rows.
+    """
+    names = [c.key for c in columns]
+    query = select(*columns)
+    for condition in filters:
+        query = query.where(condition)
+    if order_by is not None:
+        query = query.order_by(order_by)
+
+    def encode(rows) -> bytes:
+        buffer = io.StringIO()
+        if format == "csv":
+            csv.writer(buffer).writerows(rows)
+        else:
+            for row in rows:
+                buffer.write(json.dumps(jsonable_encoder(dict(zip(names, row)))))
+                buffer.write("\n")
+        return buffer.getvalue().encode()
+
+    if format == "csv":
+        buffer = io.StringIO()
+        csv.writer(buffer).writerow(names)
+        yield buffer.getvalue().encode()
+
+    if prepend is not None:
+        async for rows in prepend:
+            yield encode(rows)
+
+    async with async_session() as session:
+        result = await session.stream(query.execution_options(yield_per=EXPORT_CHUNK_SIZE))
+        async for partition in result.partitions():
+            yield encode(partition)
+
+
+async def gzip_stream(chunks):
+    compressor = zlib.compressobj(wbits=31)  # gzip container
+    async for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def export_response(chunks, filename: str, format: str = "csv", compress: bool = False):
+    filename = f"{filename}.{format}"
+    media_type = MEDIA_TYPES[format]
+    if compress:
+        chunks = gzip_stream(chunks)
+        filename += ".gz"
+        media_type = "application/gzip"
+    return StreamingResponse(
+        chunks,
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
@@ -0,0 +1,154 @@
+import asyncio
+import hashlib
+import json
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+
+from fastapi import HTTPException
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from sqlalchemy import delete, update
+from sqlalchemy.exc import IntegrityError
+from sqlmodel import select
+
+from src.app.database.connectivity import async_session
+from src.app.database.settings import IDEMPOTENCY_TTL, IDEMPOTENCY_PURGE_INTERVAL
+from src.app.models.idempotency import IdempotencyKey
+
+REPLAYED_HEADER = "Idempotent-Replayed"
+MAX_KEY_LENGTH = 255
+
+# Requests running in this process, by (route, key), so duplicates wait for the first
+in_flight = {}
+last_purge = 0.0
+
+
+def utcnow() -> datetime:
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+def request_hash(payload) -> str:
+    body = json.dumps(jsonable_encoder(payload), sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(body.encode()).hexdigest()
+
+
+def replay(status_code: int, body) -> JSONResponse:
+    return JSONResponse(content=body, status_code=status_code, headers={REPLAYED_HEADER: "true"})
+
+
+async def purge_expired():
+    """
+    Delete expired keys, at most once per IDEMPOTENCY_PURGE_INTERVAL in each process.
+    """
+    global last_purge
+    if time.monotonic() - last_purge < IDEMPOTENCY_PURGE_INTERVAL:
+        return
+    last_purge = time.monotonic()
+    async with async_session() as session:
+        await session.execute(delete(IdempotencyKey).where(IdempotencyKey.expires_at < utcnow()))
+        await session.commit()
+
+
+async def claim(route: str, key: str, fingerprint: str) -> Optional[JSONResponse]:
+    """
+    Record the key as in progress. Returns the stored response instead when the key
+    was already used, or raises when it is in progress elsewhere or reused for another body.
+    """
+    async with async_session() as session:
+        for _ in range(2):
+            session.add(IdempotencyKey(
+                route=route, key=key, request_hash=fingerprint, expires_at=utcnow() + timedelta(seconds=IDEMPOTENCY_TTL),
+            ))
+            try:
+                await session.commit()
+                return None
+            except IntegrityError:
+                await session.rollback()
+
+            existing = (await session.execute(
+                select(IdempotencyKey).where(IdempotencyKey.route == route, IdempotencyKey.key == key)
+            )).scalar_one_or_none()
+            if existing is None:
+                continue
+            if existing.expires_at < utcnow():
+                await session.execute(delete(IdempotencyKey).where(
+                    IdempotencyKey.route == route, IdempotencyKey.key == key, IdempotencyKey.expires_at < utcnow(),
+                ))
+                continue
+            if existing.request_hash != fingerprint:
+                raise HTTPException(status_code=422, detail="Idempotency-Key was already used with a different request body.")
+            if existing.status_code is None:
+                # Running in another worker, the client should retry shortly
+                raise HTTPException(
+                    status_code=409, detail="A request with this Idempotency-Key is still in progress.",
+                    headers={"Retry-After": "1"},
+                )
+            return replay(existing.status_code, json.loads(existing.response))
+    raise HTTPException(status_code=409, detail="Idempotency-Key could not be claimed, retry the request.")
+
+
+async def release(route: str, key: str):
+    async with async_session() as session:
+        await session.execute(delete(IdempotencyKey).where(IdempotencyKey.route == route, IdempotencyKey.key == key))
+        await session.commit()
+
+
+async def store(route: str, key: str, status_code: int, body):
+    async with async_session() as session:
+        await session.execute(
+            update(IdempotencyKey)
+            .where(IdempotencyKey.route == route, IdempotencyKey.key == key)
+            .values(status_code=status_code, response=json.dumps(body))
+        )
+        await session.commit()
+
+
+async def idempotent(route: str, key: Optional[str], payload, read_schema, status_code: int, handler):
+    """
+    Run `handler` once per Idempotency-Key and route, replaying its response to repeats.
+
+    Duplicates arriving while the first request runs in this process wait for it,
+    duplicates in other workers get 409 with Retry-After. Failed requests release
+    their key so the client can retry them. A worker dying between committing the
+    handler's writes and storing the response leaves the key in progress until it
+    expires, so such a retry is refused rather than applied twice.
+    """
+    if key is None:
+        return await handler()
+    if not key or len(key) > MAX_KEY_LENGTH:
+        raise HTTPException(status_code=400, detail=f"Idempotency-Key must be 1 to {MAX_KEY_LENGTH} characters.")
+
+    fingerprint = request_hash(payload)
+    running = in_flight.get((route, key))
+    if running is not None:
+        first_fingerprint, future = running
+        if first_fingerprint != fingerprint:
+            raise HTTPException(status_code=422, detail="Idempotency-Key was already used with a different request body.")
+        return replay(*await asyncio.shield(future))
+
+    future = asyncio.get_running_loop().create_future()
+    in_flight[(route, key)] = (fingerprint, future)
+    try:
+        await purge_expired()
+        stored = await claim(route, key, fingerprint)
+        if stored is not None:
+            future.set_result((stored.status_code, json.loads(stored.body)))
+            return stored
+        try:
+            result = await handler()
+        except BaseException:
+            await asyncio.shield(release(route, key))
+            raise
+        body = jsonable_encoder(read_schema.model_validate(result, from_attributes=True))
+        await store(route, key, status_code, body)
+        future.set_result((status_code, body))
+        return body
+    except BaseException as e:
+        if not future.done():
+            future.set_exception(e)
+            # Mark the exception retrieved when no duplicate was waiting for it
+            future.exception()
+        raise
+    finally:
+        del in_flight[(route, key)]
@@ -0,0 +1,126 @@
+import asyncio
+import logging
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+
+from sqlalchemy import func, insert, literal, select
+
+from src.app.database.connectivity import async_session
+from src.app.database.settings import STOCK_SNAPSHOT_INTERVAL, STOCK_SNAPSHOT_SETTLE
+from src.app.models.stock import StockMovement, StockSnapshot
+
+logger = logging.getLogger(__name__)
+
+
+def utcnow() -> datetime:
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+async def record_movements(session, kind: str, changes):
+    """
+    Append (inventory_id, delta, reference) movements in the caller's transaction,
+    so they commit or roll back with the stock change they describe.
+    """
+    now = utcnow()
+    rows = [
+        {"inventory_id": inventory_id, "delta": delta, "kind": kind, "reference": reference, "created_at": now}
+        for inventory_id, delta, reference in changes
+    ]
+    if rows:
+        await session.execute(insert(StockMovement), rows)
+
+
+async def stock_as_of(session, inventory_id: int, as_of: datetime) -> dict:
+    """
+    An item's quantity at `as_of`: its latest snapshot at or before then plus the
+    movements since, so only up to STOCK_SNAPSHOT_INTERVAL of history is scanned.
+    """
+    snapshot = (await session.execute(
+        select(StockSnapshot.as_of, StockSnapshot.quantity)
+        .where(StockSnapshot.inventory_id == inventory_id, StockSnapshot.as_of <= as_of)
+        .order_by(StockSnapshot.as_of.desc())
+        .limit(1)
+    )).one_or_none()
+    query = select(func.coalesce(func.sum(StockMovement.delta), 0), func.count()).where(
+        StockMovement.inventory_id == inventory_id, StockMovement.created_at <= as_of,
+    )
+    if snapshot is not None:
+        query = query.where(StockMovement.created_at > snapshot.as_of)
+    delta, scanned = (await session.execute(query)).one()
+    return {
+        "inventory_id": inventory_id,
+        "as_of": as_of,
+        "quantity": (snapshot.quantity if snapshot else 0) + delta,
+        "snapshot_as_of": snapshot.as_of if snapshot else None,
+        "movements_scanned": scanned,
+    }
+
+
+async def take_snapshots(as_of: Optional[datetime] = None) -> int:
+    """
+    Snapshot, as of `as_of`, every item that moved since the previous snapshot run,
+    from its last snapshot and the movements in between. Returns the items snapshotted.
+
+    Defaults to STOCK_SNAPSHOT_SETTLE seconds ago: a movement is timestamped before
+    its transaction commits, and one committing after the snapshot that should
+    include it would be missed by as-of queries answered from that snapshot.
+    """
+    as_of = as_of or utcnow() - timedelta(seconds=STOCK_SNAPSHOT_SETTLE)
+    async with async_session() as session:
+        previous = (await session.execute(select(func.max(StockSnapshot.as_of)))).scalar_one()
+        if previous is not None and previous >= as_of:
+            return 0
+        moved = select(StockMovement.inventory_id, func.sum(StockMovement.delta).label("delta")).where(
+            StockMovement.created_at <= as_of,
+        )
+        if previous is not None:
+            moved = moved.where(StockMovement.created_at > previous)
+        moved = moved.group_by(StockMovement.inventory_id).subquery()
+        last_quantity = (
+            select(StockSnapshot.quantity)
+            .where(StockSnapshot.inventory_id == moved.c.inventory_id)
+            .order_by(StockSnapshot.as_of.desc())
+            .limit(1)
+            .scalar_subquery()
+        )
+        result = await session.execute(insert(StockSnapshot).from_select(
+            ["inventory_id", "as_of", "quantity"],
+            select(moved.c.inventory_id, literal(as_of), func.coalesce(last_quantity, 0) + moved.c.delta),
+        ))
+        await session.commit()
+    return result.rowcount
+
+
+class StockSnapshotter:
+    """
+    Takes stock snapshots every `interval` seconds in the background.
+    """
+    def __init__(self, interval: int = STOCK_SNAPSHOT_INTERVAL):
+        self.interval = interval
+        self.task = None
+        self.snapshotted = 0
+
+    def start(self):
+        if self.task is None:
+            self.task = asyncio.create_task(self.run())
+
+    async def stop(self):
+        if self.task is None:
+            return
+        self.task.cancel()
+        try:
+            await self.task
+        except asyncio.CancelledError:
+            pass
+        self.task = None
+
+    async def run(self):
+        while True:
+            try:
+                self.snapshotted += await take_snapshots()
+            except Exception:
+                logger.exception("Failed to take stock snapshots")
+            await asyncio.sleep(self.interval)
+
+
+stock_snapshotter = StockSnapshotter()
@@ -0,0 +1,178 @@
+import time
+from bisect import bisect_left
+
+from sqlalchemy import event
+
+from src.app.database.connectivity import engine, read_engine, pool_status
+from src.app.database.settings import METRICS_ENABLED
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def format_labels(names, values) -> str:
+    if not names:
+        return ""
+    return "{" + ",".join(f'{name}="{escape(value)}"' for name, value in zip(names, values)) + "}"
+
+
+class Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, help: str, labels=()):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self.values = {}
+
+    def header(self) -> list[str]:
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+
+
+class Counter(Metric):
+    kind = "counter"
+
+    def inc(self, *labels, amount: float = 1):
+        self.values[labels] = self.values.get(labels, 0) + amount
+
+    def render(self) -> list[str]:
+        return self.header() + [
+            f"{self.name}{format_labels(self.labels, labels)} {value}" for labels, value in self.values.items()
+        ]
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def set(self, *labels, value: float):
+        self.values[labels] = value
+
+
+class Histogram(Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, labels=(), buckets=LATENCY_BUCKETS):
+        super().__init__(name, help, labels)
+        self.buckets = buckets
+
+    def observe(self, *labels, value: float):
+        series = self.values.get(labels)
+        if series is None:
+            # Per-bucket (not cumulative) counts, plus the +Inf bucket, count and sum
+            series = self.values[labels] = [[0] * (len(self.buckets) + 1), 0.0]
+        series[0][bisect_left(self.buckets, value)] += 1
+        series[1] += value
+
+    def render(self) -> list[str]:
+        lines = self.header()
+        for labels, (counts, total) in self.values.items():
+            cumulative = 0
+            for bound, count in zip(self.buckets + ("+Inf",), counts):
+                cumulative += count
+                lines.append(f"{self.name}_bucket{format_labels(self.labels + ('le',), labels + (bound,))} {cumulative}")
+            lines.append(f"{self.name}_count{format_labels(self.labels, labels)} {cumulative}")
+            lines.append(f"{self.name}_sum{format_labels(self.labels, labels)} {total}")
+        return lines
+
+
+http_requests = Counter("http_requests_total", "HTTP requests handled", ("method", "route", "status"))
+http_latency = Histogram("http_request_duration_seconds", "HTTP request latency", ("method", "route", "status"))
+http_in_flight = Gauge("http_requests_in_flight", "HTTP requests being handled", ("method",))
+requests_shed = Counter("http_requests_shed_total", "Requests rejected by admission control", ("reason", "priority"))
+db_queries = Counter("db_queries_total", "SQL statements executed", ("engine",))
+db_rows = Counter("db_rows_returned_total", "Rows returned by SQL statements", ("engine",))
+db_time = Counter("db_query_seconds_total", "Time spent executing SQL statements", ("engine",))
+db_pool = Gauge("db_pool_connections", "Connection pool state", ("engine", "state"))
+db_pool_wait = Gauge("db_pool_checkout_wait_seconds", "Connection checkout wait time", ("engine", "stat"))
+
+REGISTRY = [http_requests, http_latency, http_in_flight, requests_shed, db_queries, db_rows, db_time, db_pool, db_pool_wait]
+
+
+def route_name(scope) -> str:
+    route = scope.get("route")
+    # Templates keep the label cardinality bounded, raw paths would not
+    return route.path if route is not None else "unmatched"
+
+
+class MetricsMiddleware:
+    """
+    Records per-route, per-status latency and in-flight requests.
+    """
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not METRICS_ENABLED:
+            return await self.app(scope, receive, send)
+
+        status = 500
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        method = scope["method"]
+        http_in_flight.inc(method)
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - start
+            http_in_flight.inc(method, amount=-1)
+            route = route_name(scope)
+            http_requests.inc(method, route, status)
+            http_latency.observe(method, route, status, value=elapsed)
+
+
+def instrument_engine(db_engine, label: str):
+    sync_engine = db_engine.sync_engine
+
+    @event.listens_for(sync_engine, "before_cursor_execute")
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        if not METRICS_ENABLED:
+            return
+        conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+    @event.listens_for(sync_engine, "after_cursor_execute")
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        if not METRICS_ENABLED or not conn.info.get("query_start"):
+            return
+        elapsed = time.perf_counter() - conn.info["query_start"].pop()
+        db_queries.inc(label)
+        db_time.inc(label, amount=elapsed)
+        if cursor.description is not None:
+            # The async driver adapters buffer results, so the row count is known here
+            rows = getattr(cursor, "_rows", None)
+            db_rows.inc(label, amount=len(rows) if rows is not None else max(cursor.rowcount, 0))
+
+
+instrument_engine(engine, "primary")
+if read_engine is not engine:
+    instrument_engine(read_engine, "replica")
+
+
+def collect_pool_metrics():
+    engines = {"primary": engine}
+    if read_engine is not engine:
+        engines["replica"] = read_engine
+    for label, db_engine in engines.items():
+        status = pool_status(db_engine)
+        for state in ("size", "checked_in", "checked_out", "overflow"):
+            if state in status:
+                db_pool.set(label, state, value=status[state])
+        for stat in ("checkout_wait_avg", "checkout_wait_max"):
+            if stat in status:
+                db_pool_wait.set(label, stat.removeprefix("checkout_wait_"), value=status[stat])
+
+
+def render_metrics() -> str:
+    collect_pool_metrics()
+    lines = []
+    for metric in REGISTRY:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,20 @@
+from src.app.database.connectivity import read_only
+
+READ_ONLY_METHODS = {"GET", "HEAD"}
+
+
+class ReadReplicaMiddleware:
+    """
+    Marks GET/HEAD requests as read-only so their queries are sent to the replica.
+    """
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] not in READ_ONLY_METHODS:
+            return await self.app(scope, receive, send)
+        token = read_only.set(True)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            read_only.reset(token)
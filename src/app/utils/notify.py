@@ -0,0 +1,194 @@
+import asyncio
+import json
+import logging
+from typing import Optional
+
+from sqlmodel import select
+
+from src.app.database.connectivity import async_session
+from src.app.database.settings import (
+    NOTIFY_BACKEND, NOTIFY_URL, NOTIFY_QUEUE_SIZE, NOTIFY_KEEPALIVE, NOTIFY_REPLAY_LIMIT,
+)
+from src.app.models.notification import Notification
+from src.app.schemas.notification import NotificationRead
+
+logger = logging.getLogger(__name__)
+
+CHANNEL_PREFIX = "notifications:"
+
+
+class Subscription:
+    """
+    Events for one open stream. `lagged` is set when the client fell too far behind.
+    """
+    def __init__(self, user_id: int, queue_size: int = NOTIFY_QUEUE_SIZE):
+        self.user_id = user_id
+        self.queue = asyncio.Queue(maxsize=queue_size)
+        self.lagged = False
+
+
+class MemoryBroker:
+    """
+    In-process pub/sub, delivers to the streams open in this worker only.
+    """
+    def __init__(self):
+        self.subscribers = {}
+        self.published = 0
+        self.dropped = 0
+
+    def subscribe(self, user_id: int) -> Subscription:
+        subscription = Subscription(user_id)
+        self.subscribers.setdefault(user_id, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        subscriptions = self.subscribers.get(subscription.user_id)
+        if subscriptions is not None:
+            subscriptions.discard(subscription)
+            if not subscriptions:
+                del self.subscribers[subscription.user_id]
+
+    def deliver(self, user_id: int, event: dict):
+        for subscription in self.subscribers.get(user_id, ()):
+            try:
+                subscription.queue.put_nowait(event)
+            except asyncio.QueueFull:
+                # Never let a slow client hold up the writer
+                subscription.lagged = True
+                self.dropped += 1
+
+    async def publish(self, user_id: int, event: dict):
+        self.published += 1
+        self.deliver(user_id, event)
+
+    def start(self):
+        pass
+
+    async def stop(self):
+        pass
+
+    def stats(self) -> dict:
+        return {
+            "streams": sum(len(subscriptions) for subscriptions in self.subscribers.values()),
+            "users": len(self.subscribers),
+            "published": self.published,
+            "dropped": self.dropped,
+        }
+
+
+class RedisBroker(MemoryBroker):
+    """
+    Fans events out to every worker through Redis pub/sub, each worker then
+    delivers them to its own streams.
+    """
+    def __init__(self, url: str):
+        super().__init__()
+        try:
+            from redis import asyncio as redis
+        except ImportError:
+            raise RuntimeError("NOTIFY_BACKEND=redis requires the redis package")
+        self.client = redis.from_url(url)
+        self.task = None
+
+    async def publish(self, user_id: int, event: dict):
+        self.published += 1
+        await self.client.publish(f"{CHANNEL_PREFIX}{user_id}", json.dumps(event))
+
+    def start(self):
+        if self.task is None:
+            self.task = asyncio.create_task(self.run())
+
+    async def stop(self):
+        if self.task is None:
+            return
+        self.task.cancel()
+        try:
+            await self.task
+        except asyncio.CancelledError:
+            pass
+        self.task = None
+
+    async def run(self):
+        while True:
+            try:
+                async with self.client.pubsub() as pubsub:
+                    await pubsub.psubscribe(f"{CHANNEL_PREFIX}*")
+                    async for message in pubsub.listen():
+                        if message["type"] != "pmessage":
+                            continue
+                        user_id = int(message["channel"].decode().removeprefix(CHANNEL_PREFIX))
+                        self.deliver(user_id, json.loads(message["data"]))
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Notification fan-out connection lost, reconnecting")
+                await asyncio.sleep(1)
+
+
+def make_broker():
+    if NOTIFY_BACKEND == "redis":
+        return RedisBroker(NOTIFY_URL)
+    return MemoryBroker()
+
+
+notification_broker = make_broker()
+
+
+def notification_event(kind: str, notification) -> dict:
+    """
+    A `created` or `updated` event carrying the notification as NotificationRead fields.
+    """
+    return {"event": kind, "data": {field: getattr(notification, field) for field in NotificationRead.model_fields}}
+
+
+async def publish_notifications(kind: str, notifications):
+    """
+    Push committed notifications to their users' open streams.
+    """
+    for notification in notifications:
+        await notification_broker.publish(notification.user_id, notification_event(kind, notification))
+
+
+def format_event(event: dict) -> bytes:
+    # Only creations carry an id, so Last-Event-ID always names the newest notification seen
+    lines = f"id: {event['data']['notification_id']}\n" if event["event"] == "created" else ""
+    return f"{lines}event: {event['event']}\ndata: {json.dumps(event['data'])}\n\n".encode()
+
+
+async def event_stream(user_id: int, last_event_id: Optional[int] = None):
+    """
+    Server-Sent Events for one user: notifications created after `last_event_id`
+    (replayed from the database), then live `created` and `updated` events.
+    """
+    # Subscribe before replaying so nothing committed in between is missed
+    subscription = notification_broker.subscribe(user_id)
+    try:
+        yield b"retry: 3000\n\n"
+        last_id = last_event_id or 0
+        if last_event_id is not None:
+            async with async_session() as session:
+                result = await session.execute(
+                    select(Notification)
+                    .where(Notification.user_id == user_id, Notification.notification_id > last_event_id)
+                    .order_by(Notification.notification_id)
+                    .limit(NOTIFY_REPLAY_LIMIT)
+                )
+                missed = result.scalars().all()
+            for notification in missed:
+                yield format_event(notification_event("created", notification))
+                last_id = notification.notification_id
+
+        # A lagged stream is closed, the client reconnects with Last-Event-ID and catches up
+        while not subscription.lagged:
+            try:
+                event = await asyncio.wait_for(subscription.queue.get(), NOTIFY_KEEPALIVE)
+            except TimeoutError:
+                yield b": keep-alive\n\n"
+                continue
+            if event["event"] == "created":
+                if event["data"]["notification_id"] <= last_id:
+                    continue
+                last_id = event["data"]["notification_id"]
+            yield format_event(event)
+    finally:
+        notification_broker.unsubscribe(subscription)
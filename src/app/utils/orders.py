@@ -0,0 +1,33 @@
+from fastapi import HTTPException
+from sqlmodel import select
+
+from src.app.models.inventory import Inventory
+from src.app.models.order import Order
+from src.app.models.user import User
+from src.app.schemas.order import OrderRead
+
+EXPANSIONS = {"inventory", "user"}
+
+
+def parse_expand(expand) -> set[str]:
+    if not expand:
+        return set()
+    requested = {e.strip() for e in expand.split(",") if e.strip()}
+    unknown = requested - EXPANSIONS
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown expansions: {', '.join(sorted(unknown))}")
+    return requested
+
+
+def order_details_query(expand: set[str]):
+    """
+    Orders joined with their item and/or user names in a single query.
+    """
+    query = select(*(getattr(Order, f) for f in OrderRead.model_fields))
+    if "inventory" in expand:
+        query = query.add_columns(
+            Inventory.name.label("item_name"), Inventory.category.label("item_category"),
+        ).outerjoin(Inventory, Inventory.inventory_id == Order.inventory_id)
+    if "user" in expand:
+        query = query.add_columns(User.name.label("user_name")).outerjoin(User, User.user_id == Order.user_id)
+    return query
@@ -0,0 +1,75 @@
+from typing import Optional
+
+from fastapi import HTTPException, Response
+from sqlmodel import select
+
+from src.app.database.settings import DEFAULT_PAGE_SIZE, FAST_JSON_LISTS
+from src.app.utils.responses import FastJSONResponse
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+def parse_fields(fields: Optional[str], schema) -> Optional[list[str]]:
+    """
+    Parse a comma separated `fields=` parameter.
+    Only fields exposed by the read schema may be requested.
+    With the fast JSON path enabled every read schema field is selected, so pages are
+    built from plain rows instead of ORM objects.
+    """
+    if not fields:
+        return list(schema.model_fields) if FAST_JSON_LISTS else None
+    requested = [f.strip() for f in fields.split(",") if f.strip()]
+    unknown = [f for f in requested if f not in schema.model_fields]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(unknown)}")
+    return requested
+
+
+async def fetch_page(session, model, pk, filters=(), cursor: Optional[int] = None,
+                     limit: int = DEFAULT_PAGE_SIZE, fields: Optional[list[str]] = None, query=None):
+    """
+    Keyset pagination on the primary key.
+    `query` can replace the default select of the model, e.g. with joined columns.
+    Returns the rows of the page and the cursor of the next one (None on the last page).
+    """
+    mapped = query is not None or bool(fields)
+    if query is None:
+        if fields:
+            # The primary key is always selected so the next cursor can be computed
+            columns = [pk] + [getattr(model, f) for f in fields if f != pk.key]
+            query = select(*columns)
+        else:
+            query = select(model)
+    for condition in filters:
+        query = query.where(condition)
+    if cursor is not None:
+        query = query.where(pk > cursor)
+    query = query.order_by(pk).limit(limit + 1)
+
+    result = await session.execute(query)
+    rows = result.mappings().all() if mapped else result.scalars().all()
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        next_cursor = last[pk.key] if mapped else getattr(last, pk.key)
+
+    if fields:
+        rows = [{f: row[f] for f in fields if f in row} for row in rows]
+    elif mapped:
+        rows = [dict(row) for row in rows]
+    return rows, next_cursor
+
+
+def page_response(response: Response, rows, next_cursor: Optional[int], fields: Optional[list[str]] = None):
+    """
+    Attach the next cursor header to the response.
+    Projected rows are encoded directly since they don't match the full read schema.
+    """
+    headers = {NEXT_CURSOR_HEADER: str(next_cursor)} if next_cursor is not None else {}
+    if fields:
+        # Headers already set on `response` (e.g. ETag) would be lost with a response of our own
+        return FastJSONResponse(content=rows, headers={**response.headers, **headers})
+    response.headers.update(headers)
+    return rows
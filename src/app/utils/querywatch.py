@@ -0,0 +1,186 @@
+import logging
+import os
+import sys
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+import greenlet
+from sqlalchemy import event
+
+from src.app.database.connectivity import engine, read_engine
+from src.app.database.settings import (
+    QUERY_WATCH, SLOW_QUERY_MS, REPEATED_QUERY_THRESHOLD, QUERY_BUDGET_STRICT,
+)
+
+logger = logging.getLogger(__name__)
+
+# Frames from these files are application code worth reporting as call sites
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+APP_DIRS = (os.path.join(PROJECT_ROOT, "src", "app") + os.sep, os.path.join(PROJECT_ROOT, "main.py"))
+CALL_SITE_DEPTH = 3
+
+
+class QueryBudgetExceeded(RuntimeError):
+    pass
+
+
+def query_budget(limit: int):
+    """
+    Declares the most SQL statements a route may issue per request.
+
+        @router.get("/{inventory_id}")
+        @query_budget(1)
+        async def read_inventory(...):
+    """
+    def decorator(endpoint):
+        endpoint.query_budget = limit
+        return endpoint
+    return decorator
+
+
+class QueryLog:
+    """
+    Statements executed while tracking is active, with their duration and call site.
+    """
+    def __init__(self, budget: int = None, scope: dict = None):
+        self.budget = budget
+        self.scope = scope
+        self.statements = []
+
+    @property
+    def count(self) -> int:
+        return len(self.statements)
+
+    @property
+    def total_ms(self) -> float:
+        return sum(elapsed for _, elapsed, _ in self.statements)
+
+    def current_budget(self):
+        # A request's route is only known once routing has run, which is before any handler query
+        if self.budget is None and self.scope is not None:
+            route = self.scope.get("route")
+            return getattr(getattr(route, "endpoint", None), "query_budget", None)
+        return self.budget
+
+    def over_budget(self) -> bool:
+        budget = self.current_budget()
+        return budget is not None and self.count > budget
+
+    def repeated(self, threshold: int = REPEATED_QUERY_THRESHOLD) -> list[tuple[str, int, str]]:
+        counts = Counter(statement for statement, _, _ in self.statements)
+        sites = {statement: call_site for statement, _, call_site in self.statements}
+        return [(statement, n, sites[statement]) for statement, n in counts.items() if n >= threshold]
+
+    def slow(self, threshold_ms: float = SLOW_QUERY_MS) -> list[tuple[str, float, str]]:
+        return [entry for entry in self.statements if entry[1] >= threshold_ms]
+
+    def report(self, label: str = "request"):
+        for statement, n, call_site in self.repeated():
+            logger.warning("%s: statement ran %d times (possible N+1) at %s: %s", label, n, call_site, statement)
+        for statement, elapsed, call_site in self.slow():
+            logger.warning("%s: slow statement (%.1f ms) at %s: %s", label, elapsed, call_site, statement)
+        if self.over_budget():
+            logger.warning("%s: %d statements, over its budget of %d", label, self.count, self.current_budget())
+
+
+current_log = ContextVar("query_log", default=None)
+
+
+@contextmanager
+def track_queries(budget: int = None):
+    """
+    Records the statements run inside the block, e.g. to assert on a budget in tests:
+
+        with track_queries() as log:
+            await create_order(order)
+        assert log.count <= 4
+    """
+    log = QueryLog(budget)
+    token = current_log.set(log)
+    try:
+        yield log
+    finally:
+        current_log.reset(token)
+
+
+def call_site() -> str:
+    """
+    Innermost application frames that led to the statement.
+    """
+    # Async sessions run statements in a child greenlet, the awaiting coroutines are on its parent
+    frames = []
+    current = greenlet.getcurrent()
+    frame = sys._getframe(2)
+    while current is not None:
+        while frame is not None:
+            filename = frame.f_code.co_filename
+            # Middleware __call__ frames are on every request's stack and say nothing about the query
+            if filename.startswith(APP_DIRS) and filename != __file__ and frame.f_code.co_name != "__call__":
+                frames.append(f"{os.path.relpath(filename, PROJECT_ROOT)}:{frame.f_lineno} ({frame.f_code.co_name})")
+                if len(frames) == CALL_SITE_DEPTH:
+                    return " <- ".join(frames)
+            frame = frame.f_back
+        current = current.parent
+        frame = current.gr_frame if current is not None else None
+    return " <- ".join(frames) or "unknown"
+
+
+def watch_engine(db_engine):
+    sync_engine = db_engine.sync_engine
+
+    @event.listens_for(sync_engine, "before_cursor_execute")
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        log = current_log.get()
+        if log is None:
+            return
+        if QUERY_BUDGET_STRICT and log.current_budget() is not None and log.count >= log.current_budget():
+            raise QueryBudgetExceeded(f"query budget of {log.current_budget()} exceeded by: {statement}")
+        conn.info.setdefault("query_watch_start", []).append((time.perf_counter(), call_site()))
+
+    @event.listens_for(sync_engine, "after_cursor_execute")
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        log = current_log.get()
+        if log is None or not conn.info.get("query_watch_start"):
+            return
+        start, site = conn.info["query_watch_start"].pop()
+        log.statements.append((statement, (time.perf_counter() - start) * 1000, site))
+
+
+watch_engine(engine)
+if read_engine is not engine:
+    watch_engine(read_engine)
+
+
+class QueryWatchMiddleware:
+    """
+    Tracks the statements of each request when QUERY_WATCH is on, reports N+1 patterns,
+    slow queries and budget overruns, and adds X-Query-Count / X-Query-Time headers.
+    """
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not QUERY_WATCH:
+            return await self.app(scope, receive, send)
+
+        log = QueryLog(scope=scope)
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                # Statements issued while a streaming body is produced are logged but not counted here
+                headers = list(message.get("headers", []))
+                headers.append((b"x-query-count", str(log.count).encode()))
+                headers.append((b"x-query-time", f"{log.total_ms:.2f}ms".encode()))
+                if log.current_budget() is not None:
+                    headers.append((b"x-query-budget", str(log.current_budget()).encode()))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        token = current_log.set(log)
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            current_log.reset(token)
+            log.report(f"{scope['method']} {scope['path']}")
@@ -0,0 +1,196 @@
+import asyncio
+import logging
+import time
+from datetime import date, datetime, timedelta, timezone
+from statistics import NormalDist
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import func
+from sqlmodel import select
+
+from src.app.database.connectivity import async_session
+from src.app.database.settings import (
+    REORDER_HISTORY_DAYS, REORDER_LEAD_DAYS, REORDER_REVIEW_DAYS, REORDER_SERVICE_LEVEL, REORDER_REFRESH_SECONDS,
+)
+from src.app.models.inventory import Inventory
+from src.app.models.sales import ItemDailySales
+
+logger = logging.getLogger(__name__)
+
+FETCH_CHUNK_SIZE = 100000
+
+SUGGESTION_COLUMNS = (
+    "inventory_id", "name", "category", "quantity", "threshold", "daily_demand", "demand_stddev",
+    "safety_stock", "reorder_point", "suggested_quantity", "days_of_cover", "needs_reorder",
+)
+
+
+async def fetch_columns(session, query, dtypes: dict) -> pd.DataFrame:
+    """
+    Load a query straight into column arrays, one chunk of rows at a time.
+    """
+    chunks = {name: [] for name in dtypes}
+    result = await session.stream(query.execution_options(yield_per=FETCH_CHUNK_SIZE))
+    async for partition in result.partitions():
+        for name, values in zip(dtypes, zip(*partition)):
+            chunks[name].append(np.array(values, dtype=dtypes[name]))
+    return pd.DataFrame({
+        name: np.concatenate(arrays) if arrays else np.empty(0, dtype=dtypes[name])
+        for name, arrays in chunks.items()
+    })
+
+
+async def load_inputs(history_days: int, today: date = None) -> pd.DataFrame:
+    """
+    Every item's stock with the total and sum of squares of its daily units sold
+    over the history window, in one query. Demand comes from the daily sales rollup,
+    reduced per item by the database so only one row per item crosses the wire.
+    """
+    start = (today or date.today()) - timedelta(days=history_days)
+    sales = (
+        select(
+            ItemDailySales.inventory_id,
+            func.sum(ItemDailySales.units).label("total"),
+            func.sum(ItemDailySales.units * ItemDailySales.units).label("squares"),
+        )
+        .where(ItemDailySales.day > start)
+        .group_by(ItemDailySales.inventory_id)
+        .subquery()
+    )
+    query = (
+        select(
+            Inventory.inventory_id, Inventory.name, Inventory.category, Inventory.quantity, Inventory.threshold,
+            func.coalesce(sales.c.total, 0), func.coalesce(sales.c.squares, 0),
+        )
+        .outerjoin(sales, sales.c.inventory_id == Inventory.inventory_id)
+        .order_by(Inventory.inventory_id)
+    )
+    async with async_session() as session:
+        return await fetch_columns(session, query, {
+            "inventory_id": np.int64, "name": object, "category": object, "quantity": np.int64,
+            "threshold": np.int64, "total": np.float64, "squares": np.float64,
+        })
+
+
+def compute_suggestions(items: pd.DataFrame, history_days: int = REORDER_HISTORY_DAYS,
+                        lead_days: int = REORDER_LEAD_DAYS, review_days: int = REORDER_REVIEW_DAYS,
+                        service_level: int = REORDER_SERVICE_LEVEL) -> pd.DataFrame:
+    """
+    Demand velocity and variability per item, and the reorder point and quantity they imply.
+
+    Days without sales count as zero demand. With daily demand mean m and standard
+    deviation s over the window:
+        safety stock   = z * s * sqrt(lead days), z for the service level
+        reorder point  = m * lead days + safety stock
+        order quantity = m * (lead + review days) + safety stock - quantity, at least 0
+    All items are computed together with array operations.
+    """
+    total = items["total"].to_numpy()
+    squares = items["squares"].to_numpy()
+
+    days = max(history_days, 2)
+    mean = total / days
+    variance = np.maximum((squares - total * mean) / (days - 1), 0.0)
+    stddev = np.sqrt(variance)
+
+    z = NormalDist().inv_cdf(min(max(service_level, 1), 99) / 100)
+    safety = z * stddev * np.sqrt(lead_days)
+    reorder_point = np.ceil(mean * lead_days + safety)
+    target = mean * (lead_days + review_days) + safety
+    quantity = items["quantity"].to_numpy()
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        days_of_cover = np.where(mean > 0, quantity / mean, np.nan)
+
+    return items.assign(
+        daily_demand=mean.round(3),
+        demand_stddev=stddev.round(3),
+        safety_stock=np.ceil(safety).astype(np.int64),
+        reorder_point=reorder_point.astype(np.int64),
+        suggested_quantity=np.maximum(np.ceil(target - quantity), 0).astype(np.int64),
+        days_of_cover=days_of_cover.round(1),
+        needs_reorder=quantity <= reorder_point,
+    )[list(SUGGESTION_COLUMNS)]
+
+
+class ReorderPlanner:
+    """
+    Holds the latest reorder suggestions and recomputes them on a schedule.
+    Requests read the cached table, only the first one waits for a computation.
+    """
+    def __init__(self, refresh_seconds: int = REORDER_REFRESH_SECONDS, history_days: int = REORDER_HISTORY_DAYS):
+        self.refresh_seconds = refresh_seconds
+        self.history_days = history_days
+        self.suggestions = None
+        self.computed_at = None
+        self.compute_seconds = None
+        self.lock = asyncio.Lock()
+        self.task = None
+
+    async def compute(self):
+        start = time.perf_counter()
+        items = await load_inputs(self.history_days)
+        # The arithmetic is CPU-bound, keep it off the event loop
+        self.suggestions = await asyncio.to_thread(compute_suggestions, items, self.history_days)
+        self.computed_at = datetime.now(timezone.utc)
+        self.compute_seconds = time.perf_counter() - start
+
+    async def refresh(self) -> pd.DataFrame:
+        async with self.lock:
+            await self.compute()
+        return self.suggestions
+
+    async def get(self) -> pd.DataFrame:
+        if self.suggestions is None:
+            async with self.lock:
+                # Concurrent first requests wait for the computation already running
+                if self.suggestions is None:
+                    await self.compute()
+        return self.suggestions
+
+    def start(self):
+        if self.task is None:
+            self.task = asyncio.create_task(self.run())
+
+    async def stop(self):
+        if self.task is None:
+            return
+        self.task.cancel()
+        try:
+            await self.task
+        except asyncio.CancelledError:
+            pass
+        self.task = None
+
+    async def run(self):
+        while True:
+            try:
+                await self.refresh()
+            except Exception:
+                logger.exception("Failed to compute reorder suggestions")
+            await asyncio.sleep(self.refresh_seconds)
+
+    def page(self, cursor: int = None, limit: int = 100, needs_reorder_only: bool = True, category: str = None):
+        """
+        One keyset page of the cached suggestions, as plain dicts, and the next cursor.
+        """
+        table = self.suggestions
+        if needs_reorder_only:
+            table = table[table["needs_reorder"]]
+        if category is not None:
+            table = table[table["category"] == category]
+        start = np.searchsorted(table["inventory_id"].to_numpy(), cursor, side="right") if cursor is not None else 0
+        page = table.iloc[start:start + limit + 1]
+        next_cursor = None
+        if len(page) > limit:
+            page = page.iloc[:limit]
+            next_cursor = int(page["inventory_id"].iloc[-1])
+        # tolist() turns numpy scalars into Python ones, NaN cover (no demand) becomes None
+        columns = [page[name].tolist() for name in SUGGESTION_COLUMNS]
+        cover = SUGGESTION_COLUMNS.index("days_of_cover")
+        columns[cover] = [None if value != value else value for value in columns[cover]]
+        return [dict(zip(SUGGESTION_COLUMNS, row)) for row in zip(*columns)], next_cursor
+
+
+reorder_planner = ReorderPlanner()
@@ -0,0 +1,29 @@
+import json
+from datetime import date, datetime
+from decimal import Decimal
+
+from fastapi.responses import JSONResponse
+
+try:
+    import orjson
+except ImportError:  # optional, the standard json module is used without it
+    orjson = None
+
+
+def default(value):
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return float(value)
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+class FastJSONResponse(JSONResponse):
+    """
+    Encodes plain rows (dicts of column values) directly to bytes.
+    Content is trusted to be JSON-ready apart from dates, it is not validated.
+    """
+    def render(self, content) -> bytes:
+        if orjson is not None:
+            return orjson.dumps(content, default=default)
+        return json.dumps(content, default=default, separators=(",", ":")).encode()
@@ -0,0 +1,351 @@
+import asyncio
+import bisect
+import heapq
+import logging
+import math
+import re
+import time
+
+from sqlalchemy import case, func, or_, select
+
+from src.app.database.connectivity import async_session, engine
+from src.app.database.settings import SEARCH_MIN_SIMILARITY, SEARCH_SYNC_MS
+from src.app.models.inventory import Inventory
+
+logger = logging.getLogger(__name__)
+
+TOKEN = re.compile(r"[^\W_]+")
+
+# Relative weight of a match on the category instead of the name
+CATEGORY_WEIGHT = 0.5
+# Bonus for names starting with the whole query, what a typeahead user expects first
+NAME_PREFIX_BONUS = 0.5
+# Typo-tolerant matches rank below any prefix match of the same token
+FUZZY_WEIGHT = 0.6
+# Items scored per query, bounds the work for one- and two-letter prefixes
+MAX_CANDIDATES = 1000
+# Vocabulary tokens a prefix expands to, the exact match and the shortest ones first
+MAX_PREFIX_TOKENS = 1000
+# Most vocabulary tokens a misspelled query token expands to
+MAX_FUZZY_TOKENS = 50
+
+
+def tokenize(text: str) -> list[str]:
+    return TOKEN.findall(text.lower())
+
+
+def trigrams(token: str) -> set[str]:
+    # Padded like pg_trgm, so short tokens and word starts get trigrams too
+    padded = f"  {token} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def prefix_weight(token: str, word: str) -> float:
+    # An exact word beats a completion, short completions beat long ones
+    return 1.0 if word == token else 0.6 + 0.3 * len(token) / len(word)
+
+
+def escape_like(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+async def trigram_search(session, q: str, limit: int, category: str = None):
+    """
+    Ranked search on Postgres through the pg_trgm GIN indexes on name and category.
+    Returns (Inventory, score) rows.
+    """
+    # The threshold of the %> operator, for this transaction only
+    await session.execute(select(func.set_config(
+        "pg_trgm.word_similarity_threshold", str(SEARCH_MIN_SIMILARITY / 100), True,
+    )))
+    score = (
+        func.greatest(
+            func.word_similarity(q, Inventory.name),
+            func.word_similarity(q, Inventory.category) * CATEGORY_WEIGHT,
+        )
+        + case((Inventory.name.ilike(f"{escape_like(q)}%", escape="\\"), NAME_PREFIX_BONUS), else_=0)
+    ).label("score")
+    query = (
+        select(Inventory, score)
+        .where(or_(Inventory.name.op("%>")(q), Inventory.category.op("%>")(q)))
+        .order_by(score.desc(), func.length(Inventory.name), Inventory.inventory_id)
+        .limit(limit)
+    )
+    if category is not None:
+        query = query.where(Inventory.category == category)
+    return (await session.execute(query)).all()
+
+
+async def prefix_search(session, q: str, limit: int, category: str = None):
+    """
+    Names with a word starting with `q`, for when the in-memory index isn't built yet.
+    Unordered, so the scan stops at the first `limit` matches, which are then ranked.
+    Returns (Inventory, score) rows.
+    """
+    q = q.strip()
+    pattern = escape_like(q)
+    query = (
+        select(Inventory)
+        .where(or_(Inventory.name.ilike(f"{pattern}%", escape="\\"), Inventory.name.ilike(f"% {pattern}%", escape="\\")))
+        .limit(limit)
+    )
+    if category is not None:
+        query = query.where(Inventory.category == category)
+    prefix = q.lower()
+    rows = [
+        (item, 1.0 + (NAME_PREFIX_BONUS if item.name.lower().startswith(prefix) else 0))
+        for item in (await session.execute(query)).scalars()
+    ]
+    rows.sort(key=lambda row: (-row[1], len(row[0].name)))
+    return rows
+
+
+class SearchIndex:
+    """
+    In-memory search over inventory names and categories, for databases without
+    trigram indexes. Prefixes are found by bisecting the sorted token vocabulary and
+    misspelled tokens through a trigram index of the vocabulary, so no lookup scans
+    the catalogue. Items written by this process are added and removed as they
+    change, items created by other processes are picked up within `sync_interval`.
+    Postings are append-only lists, removed items are skipped when read.
+
+    Built in the background from start(), searches fall back to prefix_search until it is ready.
+    """
+    def __init__(self, min_similarity: float = SEARCH_MIN_SIMILARITY / 100, sync_interval: float = SEARCH_SYNC_MS / 1000):
+        self.min_similarity = min_similarity
+        self.sync_interval = sync_interval
+        # inventory_id: (lowercased name, category, name tokens, category tokens)
+        self.items = {}
+        self.name_postings = {}
+        self.category_postings = {}
+        self.vocabulary = []
+        self.token_trigrams = {}
+        self.max_id = 0
+        self.synced_at = 0.0
+        self.ready = False
+        self.task = None
+
+    def start(self):
+        # Postgres searches through its trigram indexes instead
+        if self.task is None and not self.ready and engine.dialect.name != "postgresql":
+            self.task = asyncio.create_task(self.build())
+
+    async def stop(self):
+        if self.task is None:
+            return
+        self.task.cancel()
+        try:
+            await self.task
+        except asyncio.CancelledError:
+            pass
+        self.task = None
+
+    async def build(self):
+        try:
+            start = time.perf_counter()
+            async with async_session() as session:
+                result = await session.execute(select(Inventory.inventory_id, Inventory.name, Inventory.category))
+                rows = result.all()
+            await asyncio.to_thread(self.load, rows)
+            logger.info("Search index built from %d items in %.1fs", len(rows), time.perf_counter() - start)
+        except Exception:
+            logger.exception("Failed to build the search index")
+            # The next search starts another attempt
+            self.task = None
+
+    def add_token(self, token: str):
+        if token in self.name_postings or token in self.category_postings:
+            return
+        bisect.insort(self.vocabulary, token)
+        for trigram in trigrams(token):
+            self.token_trigrams.setdefault(trigram, []).append(token)
+
+    def add(self, inventory_id: int, name: str, category: str):
+        if not self.ready:
+            return
+        name_tokens, category_tokens = tuple(set(tokenize(name))), tuple(set(tokenize(category)))
+        self.items[inventory_id] = (name.lower(), category, name_tokens, category_tokens)
+        self.max_id = max(self.max_id, inventory_id)
+        for tokens, postings in ((name_tokens, self.name_postings), (category_tokens, self.category_postings)):
+            for token in tokens:
+                self.add_token(token)
+                postings.setdefault(token, []).append(inventory_id)
+
+    def remove(self, inventory_id: int):
+        self.items.pop(inventory_id, None)
+
+    def load(self, rows):
+        """
+        Build the index from (inventory_id, name, category) rows, all at once.
+        """
+        words, categories = {}, {}
+        for inventory_id, name, category in rows:
+            if category not in categories:
+                categories[category] = (category, tuple(set(tokenize(category))))
+            category, category_tokens = categories[category]
+            # Interned, so each distinct word is stored once
+            name_tokens = tuple(words.setdefault(token, token) for token in set(tokenize(name)))
+            self.items[inventory_id] = (name.lower(), category, name_tokens, category_tokens)
+            for token in name_tokens:
+                self.name_postings.setdefault(token, []).append(inventory_id)
+            for token in category_tokens:
+                self.category_postings.setdefault(token, []).append(inventory_id)
+            self.max_id = max(self.max_id, inventory_id)
+        self.vocabulary = sorted(self.name_postings.keys() | self.category_postings.keys())
+        for token in self.vocabulary:
+            for trigram in trigrams(token):
+                self.token_trigrams.setdefault(trigram, []).append(token)
+        self.ready = True
+
+    async def sync(self, session) -> bool:
+        """
+        Add the items created since the last sync, at most every `sync_interval`.
+        Returns False, starting the build if needed, while the index isn't ready.
+        """
+        if not self.ready:
+            self.start()
+            return False
+        now = time.monotonic()
+        if now - self.synced_at >= self.sync_interval:
+            self.synced_at = now
+            result = await session.execute(
+                select(Inventory.inventory_id, Inventory.name, Inventory.category).where(Inventory.inventory_id > self.max_id)
+            )
+            for row in result:
+                self.add(*row)
+        return True
+
+    def prefix_tokens(self, token: str) -> list[tuple[str, float]]:
+        """
+        Vocabulary tokens starting with `token`, the exact match and the shortest completions first.
+        """
+        start = bisect.bisect_left(self.vocabulary, token)
+        end = bisect.bisect_left(self.vocabulary, token + "\U0010ffff", start)
+        # The token itself sorts first, the rest of a huge range is cut before sorting by length
+        matches = sorted(self.vocabulary[start:min(end, start + MAX_PREFIX_TOKENS)], key=len)
+        return [(match, prefix_weight(token, match)) for match in matches]
+
+    def fuzzy_tokens(self, token: str) -> list[tuple[str, float]]:
+        """
+        Vocabulary tokens whose trigram similarity to `token` reaches min_similarity.
+        """
+        wanted = trigrams(token)
+        # Reaching the similarity takes at least `needed` shared trigrams, so a match has
+        # one of the len(wanted) - needed + 1 rarest: only those lists are read
+        needed = max(1, math.ceil(self.min_similarity * len(wanted)))
+        lists = sorted((self.token_trigrams.get(trigram, ()) for trigram in wanted), key=len)
+        candidates = set().union(*lists[:len(wanted) - needed + 1])
+        matches = []
+        for candidate in candidates:
+            other = trigrams(candidate)
+            shared = len(wanted & other)
+            similarity = shared / (len(wanted) + len(other) - shared)
+            if similarity >= self.min_similarity:
+                matches.append((candidate, FUZZY_WEIGHT * similarity))
+        matches.sort(key=lambda match: -match[1])
+        return matches[:MAX_FUZZY_TOKENS]
+
+    def match(self, token: str, limit: int, category: str = None) -> dict:
+        """
+        Best weight per item for one query token, prefix matches first, then typo-tolerant
+        ones when prefixes find fewer than `limit` items. Stops at MAX_CANDIDATES items,
+        counting only those in `category` when given.
+        """
+        scores = {}
+        items = self.items
+
+        def collect(matches):
+            for match, weight in matches:
+                for postings, factor in ((self.name_postings, 1.0), (self.category_postings, CATEGORY_WEIGHT)):
+                    score = weight * factor
+                    for inventory_id in postings.get(match, ()):
+                        if category is not None and items.get(inventory_id, (None, None))[1] != category:
+                            continue
+                        if scores.get(inventory_id, 0) < score:
+                            scores[inventory_id] = score
+                            if len(scores) >= MAX_CANDIDATES:
+                                return
+
+        collect(self.prefix_tokens(token))
+        if len(scores) < limit and len(token) >= 3:
+            collect(self.fuzzy_tokens(token))
+        return scores
+
+    def narrow(self, scores: dict, token: str) -> dict:
+        """
+        Keep the candidates also matching `token`, adding its weight. Each distinct word
+        of the candidates is weighed once.
+        """
+        fuzzy = dict(self.fuzzy_tokens(token)) if len(token) >= 3 else {}
+        weights = {}
+
+        def weight(word):
+            value = weights.get(word)
+            if value is None:
+                value = weights[word] = prefix_weight(token, word) if word.startswith(token) else fuzzy.get(word, 0)
+            return value
+
+        narrowed = {}
+        for inventory_id, score in scores.items():
+            item = self.items.get(inventory_id)
+            if item is None:
+                continue
+            best = max(
+                max((weight(word) for word in item[2]), default=0),
+                max((weight(word) for word in item[3]), default=0) * CATEGORY_WEIGHT,
+            )
+            if best:
+                narrowed[inventory_id] = score + best
+        return narrowed
+
+    def search(self, q: str, limit: int, category: str = None) -> list[tuple[int, float]]:
+        """
+        Ranked (inventory_id, score) pairs. Every query token has to match the name or
+        the category, the last one typically being a prefix still being typed.
+        Candidates come from the longest token, usually the most selective, and are
+        narrowed down by the others.
+        """
+        tokens = tokenize(q)
+        if not tokens:
+            return []
+        tokens.sort(key=len, reverse=True)
+        # Filtered while collecting, so other categories can't use up MAX_CANDIDATES
+        scores = self.match(tokens[0], limit, category)
+        for token in tokens[1:]:
+            scores = self.narrow(scores, token)
+        prefix = q.strip().lower()
+        ranked = []
+        for inventory_id, score in scores.items():
+            item = self.items.get(inventory_id)
+            if item is None:
+                continue
+            score /= len(tokens)
+            if item[0].startswith(prefix):
+                score += NAME_PREFIX_BONUS
+            ranked.append((-score, len(item[0]), inventory_id))
+        return [(inventory_id, -score) for score, _, inventory_id in heapq.nsmallest(limit, ranked)]
+
+    def stats(self) -> dict:
+        return {"items": len(self.items), "tokens": len(self.vocabulary), "ready": self.ready}
+
+
+search_index = SearchIndex()
+
+
+async def search_inventory(session, q: str, limit: int, category: str = None):
+    """
+    (Inventory, score) rows best first, from the trigram indexes on Postgres and
+    from the in-memory index, then the rows by primary key, elsewhere. Name
+    prefixes are looked up in the table while the index is still building.
+    """
+    if session.get_bind().dialect.name == "postgresql":
+        return await trigram_search(session, q, limit, category)
+    if not await search_index.sync(session):
+        return await prefix_search(session, q, limit, category)
+    ranked = search_index.search(q, limit, category)
+    if not ranked:
+        return []
+    result = await session.execute(select(Inventory).where(Inventory.inventory_id.in_([i for i, _ in ranked])))
+    rows = {item.inventory_id: item for item in result.scalars()}
+    # Items deleted by another process are dropped here
+    return [(rows[inventory_id], score) for inventory_id, score in ranked if inventory_id in rows]
@@ -0,0 +1,110 @@
+import asyncio
+import base64
+import functools
+import hashlib
+import hmac
+import json
+import logging
+import secrets
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+
+from src.app.database.settings import (
+    AUTH_SECRET_KEY, AUTH_TOKEN_TTL, PASSWORD_HASH_WORKERS, SCRYPT_N, SCRYPT_R, SCRYPT_P,
+)
+
+logger = logging.getLogger(__name__)
+
+HASH_SCHEME = "scrypt"
+
+# hashlib.scrypt releases the GIL, so a thread pool hashes in parallel without blocking the event loop
+hash_executor = ThreadPoolExecutor(max_workers=PASSWORD_HASH_WORKERS, thread_name_prefix="password-hash")
+
+if AUTH_SECRET_KEY:
+    secret_key = AUTH_SECRET_KEY.encode()
+else:
+    logger.warning("AUTH_SECRET_KEY is not set, tokens will not survive a restart or work across workers")
+    secret_key = secrets.token_bytes(32)
+
+
+def b64encode(data: bytes) -> str:
+    return base64.urlsafe_b64encode(data).rstrip(b"=").decode()
+
+
+def b64decode(data: str) -> bytes:
+    return base64.urlsafe_b64decode(data + "=" * (-len(data) % 4))
+
+
+def hash_password_sync(password: str, n: int = SCRYPT_N, r: int = SCRYPT_R, p: int = SCRYPT_P) -> str:
+    salt = secrets.token_bytes(16)
+    digest = hashlib.scrypt(password.encode(), salt=salt, n=n, r=r, p=p, maxmem=256 * n * r)
+    return f"{HASH_SCHEME}${n}${r}${p}${b64encode(salt)}${b64encode(digest)}"
+
+
+@functools.cache
+def dummy_hash() -> str:
+    # Verified against for unknown users, so they take as long as a wrong password
+    return hash_password_sync(secrets.token_urlsafe(16))
+
+
+def verify_password_sync(password: str, stored: Optional[str]) -> bool:
+    """
+    Without a stored password (unknown user) the work is done anyway and False returned.
+    """
+    if stored is None:
+        verify_password_sync(password, dummy_hash())
+        return False
+    if not stored.startswith(HASH_SCHEME + "$"):
+        # Rows written before hashing was introduced hold the plain password
+        return hmac.compare_digest(password.encode(), stored.encode())
+    try:
+        _, n, r, p, salt, digest = stored.split("$")
+        n, r, p = int(n), int(r), int(p)
+        candidate = hashlib.scrypt(password.encode(), salt=b64decode(salt), n=n, r=r, p=p, maxmem=256 * n * r)
+        expected = b64decode(digest)
+    except ValueError:
+        # Malformed field count, integers or base64 (binascii.Error), or parameters scrypt rejects
+        logger.warning("Malformed password hash, rejecting the login")
+        return False
+    return hmac.compare_digest(candidate, expected)
+
+
+def needs_rehash(stored: str) -> bool:
+    return not stored.startswith(f"{HASH_SCHEME}${SCRYPT_N}${SCRYPT_R}${SCRYPT_P}$")
+
+
+async def hash_password(password: str) -> str:
+    return await asyncio.get_running_loop().run_in_executor(hash_executor, hash_password_sync, password)
+
+
+async def verify_password(password: str, stored: Optional[str]) -> bool:
+    return await asyncio.get_running_loop().run_in_executor(hash_executor, verify_password_sync, password, stored)
+
+
+def create_token(user_id: int, role: str, name: str, ttl: int = AUTH_TOKEN_TTL) -> str:
+    """
+    Stateless HMAC-SHA256 signed token carrying the claims needed to authorize requests.
+    """
+    claims = {"sub": user_id, "role": role, "name": name, "exp": int(time.time()) + ttl}
+    payload = b64encode(json.dumps(claims, separators=(",", ":")).encode())
+    signature = b64encode(hmac.new(secret_key, payload.encode(), hashlib.sha256).digest())
+    return f"{payload}.{signature}"
+
+
+def decode_token(token: str) -> Optional[dict]:
+    """
+    Returns the claims of a valid, unexpired token, None otherwise.
+    """
+    try:
+        payload, signature = token.split(".")
+        expected = b64encode(hmac.new(secret_key, payload.encode(), hashlib.sha256).digest())
+        # Compared as bytes, compare_digest rejects non-ASCII str with TypeError
+        if not hmac.compare_digest(signature.encode(), expected.encode()):
+            return None
+        claims = json.loads(b64decode(payload))
+    except ValueError:
+        return None
+    if claims.get("exp", 0) < time.time():
+        return None
+    return claims
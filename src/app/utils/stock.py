@@ -0,0 +1,124 @@
+import asyncio
+import random
+
+from fastapi import HTTPException
+from sqlalchemy import Integer, case, column, select, update, values
+from sqlalchemy.exc import DBAPIError, OperationalError
+
+from src.app.database.connectivity import async_session
+from src.app.models.inventory import Inventory
+from src.app.utils.cache import inventory_cache
+from src.app.utils.ledger import record_movements
+from src.app.utils.search import search_index
+
+MAX_ATTEMPTS = 5
+BASE_DELAY = 0.01
+
+# serialization_failure and deadlock_detected
+RETRYABLE_SQLSTATES = {"40001", "40P01"}
+
+
+# Returned for every updated row so callers can detect low stock without another query
+STOCK_COLUMNS = (Inventory.quantity, Inventory.threshold, Inventory.name, Inventory.category)
+
+
+async def create_item(values: dict) -> Inventory:
+    """
+    Insert an inventory item together with its opening stock movement, then add it
+    to the search index and bump the inventory ETags.
+    """
+    async with async_session() as session:
+        db_item = Inventory(**values)
+        session.add(db_item)
+        await session.flush()
+        await record_movements(session, "opening", [(db_item.inventory_id, db_item.quantity, None)])
+        await session.commit()
+        await session.refresh(db_item)
+    search_index.add(db_item.inventory_id, db_item.name, db_item.category)
+    await inventory_cache.invalidate(db_item.inventory_id)
+    return db_item
+
+
+async def reserve_stock(session, inventory_id: int, quantity: int):
+    """
+    Decrement stock with a single conditional UPDATE so concurrent orders can't oversell.
+    Returns the updated (quantity, threshold, name, category) row.
+    """
+    # A negative quantity would pass the stock check and add stock instead
+    if quantity <= 0:
+        raise HTTPException(status_code=400, detail="Quantity must be positive.")
+    result = await session.execute(
+        update(Inventory)
+        .where(Inventory.inventory_id == inventory_id, Inventory.quantity >= quantity)
+        .values(quantity=Inventory.quantity - quantity)
+        .returning(*STOCK_COLUMNS)
+        .execution_options(synchronize_session=False)
+    )
+    remaining = result.one_or_none()
+    if remaining is None:
+        # Only the failure path pays for a second lookup
+        if await session.get(Inventory, inventory_id) is None:
+            raise HTTPException(status_code=404, detail="Inventory item not found.")
+        raise HTTPException(status_code=400, detail="Insufficient inventory quantity.")
+    return remaining
+
+
+async def apply_stock_deltas(session, deltas: dict[int, int]) -> dict:
+    """
+    Apply signed quantity changes to many items in one statement.
+    Rows that would go below zero are left untouched.
+    Returns the updated (quantity, threshold, name, category) rows keyed by inventory id.
+    """
+    if not deltas:
+        return {}
+    if session.get_bind().dialect.name == "postgresql":
+        v = values(column("inventory_id", Integer), column("delta", Integer), name="v").data(list(deltas.items()))
+        statement = (
+            update(Inventory)
+            .where(Inventory.inventory_id == v.c.inventory_id, Inventory.quantity + v.c.delta >= 0)
+            .values(quantity=Inventory.quantity + v.c.delta)
+        )
+    else:
+        # Backends without UPDATE ... FROM (VALUES ...) get the same single statement through a CASE
+        delta = case(deltas, value=Inventory.inventory_id)
+        statement = (
+            update(Inventory)
+            .where(Inventory.inventory_id.in_(deltas), Inventory.quantity + delta >= 0)
+            .values(quantity=Inventory.quantity + delta)
+        )
+    result = await session.execute(
+        statement.returning(Inventory.inventory_id, *STOCK_COLUMNS).execution_options(synchronize_session=False)
+    )
+    return {row.inventory_id: row for row in result}
+
+
+async def explain_stock_failures(session, inventory_ids) -> dict[int, str]:
+    """
+    Reason each of the given items could not be updated, in one query.
+    """
+    result = await session.execute(select(Inventory.inventory_id).where(Inventory.inventory_id.in_(inventory_ids)))
+    existing = set(result.scalars().all())
+    return {
+        inventory_id: "Insufficient inventory quantity." if inventory_id in existing else "Inventory item not found."
+        for inventory_id in inventory_ids
+    }
+
+
+def is_retryable(exc: Exception) -> bool:
+    if isinstance(exc, OperationalError):
+        return True
+    return getattr(getattr(exc, "orig", None), "sqlstate", None) in RETRYABLE_SQLSTATES
+
+
+async def run_with_retry(operation, attempts: int = MAX_ATTEMPTS):
+    """
+    Run `operation` (an async callable owning its own transaction) and retry it with
+    exponential backoff and jitter on lock timeouts, deadlocks and serialization failures.
+    """
+    for attempt in range(attempts):
+        try:
+            return await operation()
+        except DBAPIError as e:
+            if attempt == attempts - 1 or not is_retryable(e):
+                raise
+            await asyncio.sleep(BASE_DELAY * 2 ** attempt * random.uniform(0.5, 1.5))
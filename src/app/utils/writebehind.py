@@ -0,0 +1,161 @@
+import asyncio
+import logging
+
+from sqlalchemy import insert
+
+from src.app.database.connectivity import async_session
+from src.app.database.settings import NOTIFY_WRITE_BATCH_SIZE, NOTIFY_WRITE_LINGER_MS, NOTIFY_WRITE_QUEUE_SIZE
+from src.app.models.notification import Notification
+from src.app.utils.notify import publish_notifications
+
+logger = logging.getLogger(__name__)
+
+# Queued by stop() so the worker writes what's left and exits
+STOP = None
+
+
+class Write:
+    """
+    The rows of one write() call, and a future resolved once they are all committed.
+    """
+    def __init__(self, size: int, durable: bool):
+        self.results = [None] * size
+        self.remaining = size
+        self.future = asyncio.get_running_loop().create_future() if durable else None
+
+    def fail(self, error: Exception):
+        if self.future is not None and not self.future.done():
+            self.future.set_exception(error)
+
+    def done(self, index: int, notification):
+        self.results[index] = notification
+        self.remaining -= 1
+        if self.remaining == 0 and self.future is not None and not self.future.done():
+            self.future.set_result(self.results)
+
+
+class NotificationWriter:
+    """
+    Write-behind buffer for Notification inserts. Callers queue rows and a single
+    background worker writes them as multi-row INSERTs, one transaction per batch,
+    once `batch_size` rows are waiting or the first has waited `linger` seconds.
+    Writers wait for room when `queue_size` rows are already queued.
+    """
+    def __init__(self, queue_size: int = NOTIFY_WRITE_QUEUE_SIZE, batch_size: int = NOTIFY_WRITE_BATCH_SIZE,
+                 linger: float = NOTIFY_WRITE_LINGER_MS / 1000):
+        self.queue = asyncio.Queue(maxsize=queue_size)
+        self.batch_size = batch_size
+        self.linger = linger
+        self.full = asyncio.Event()
+        self.task = None
+        self.written = 0
+        self.batches = 0
+        self.failed = 0
+
+    async def write(self, rows: list[dict], durable: bool = False):
+        """
+        Queue notification rows (Notification column values). With `durable`, wait until
+        they are committed and return the created notifications in the same order;
+        a failed insert is raised here. Otherwise returns as soon as the rows are queued.
+
+        Writes larger than the batch size may span batches, and so transactions.
+        """
+        if not rows:
+            return [] if durable else None
+        write = Write(len(rows), durable)
+        if self.task is not None and self.task.done():
+            self.restart()
+        if self.task is None:
+            # No worker running (scripts, or during shutdown), write straight through
+            await self.flush([(row, write, index) for index, row in enumerate(rows)])
+        else:
+            for index, row in enumerate(rows):
+                await self.queue.put((row, write, index))
+            if self.queue.qsize() >= self.batch_size:
+                self.full.set()
+        if write.future is not None:
+            return await write.future
+
+    def start(self):
+        if self.task is None:
+            self.task = asyncio.create_task(self.run())
+
+    def restart(self):
+        """
+        Replace a worker that died, so queued rows don't wait forever for it.
+        """
+        if not self.task.cancelled() and self.task.exception() is not None:
+            logger.error("Notification writer stopped unexpectedly, restarting it", exc_info=self.task.exception())
+        self.task = None
+        self.start()
+
+    async def stop(self):
+        if self.task is None:
+            return
+        await self.queue.put(STOP)
+        self.full.set()
+        await self.task
+        self.task = None
+        # Rows queued behind the stop marker
+        while not self.queue.empty():
+            await self.flush(self.drain(self.queue.get_nowait()))
+
+    def drain(self, first) -> list:
+        batch = [first]
+        while len(batch) < self.batch_size and not self.queue.empty():
+            batch.append(self.queue.get_nowait())
+        return batch
+
+    async def run(self):
+        while True:
+            first = await self.queue.get()
+            if first is not STOP and self.queue.qsize() + 1 < self.batch_size:
+                self.full.clear()
+                try:
+                    await asyncio.wait_for(self.full.wait(), self.linger)
+                except TimeoutError:
+                    pass
+            batch = self.drain(first)
+            await self.flush([entry for entry in batch if entry is not STOP])
+            if STOP in batch:
+                return
+
+    async def flush(self, batch: list):
+        if not batch:
+            return
+        try:
+            async with async_session() as session:
+                result = await session.scalars(
+                    insert(Notification).returning(Notification, sort_by_parameter_order=True),
+                    [row for row, _, _ in batch],
+                )
+                notifications = result.all()
+                await session.commit()
+        except Exception as error:
+            if len(batch) > 1:
+                # One bad row, e.g. for a deleted user, fails the whole INSERT. Writing the
+                # rows one by one fails only that row's caller, not the others coalesced with it
+                logger.warning("Failed to write %d notifications at once, retrying them one by one", len(batch))
+                for entry in batch:
+                    await self.flush([entry])
+                return
+            logger.exception("Failed to write a notification")
+            self.failed += 1
+            batch[0][1].fail(error)
+            return
+
+        self.written += len(batch)
+        self.batches += 1
+        for (_, write, index), notification in zip(batch, notifications):
+            write.done(index, notification)
+        try:
+            await publish_notifications("created", notifications)
+        except Exception:
+            # The rows are committed, open streams get them from the replay when they reconnect
+            logger.exception("Failed to publish %d notifications", len(notifications))
+
+    def stats(self) -> dict:
+        return {"queued": self.queue.qsize(), "written": self.written, "batches": self.batches, "failed": self.failed}
+
+
+notification_writer = NotificationWriter()
@@ -0,0 +1,8 @@
+"""
+Tests run against a local SQLite database unless DATABASE_URL is set, with
+per-client rate limiting off since every request comes from the same client.
+"""
+import os
+
+os.environ.setdefault("DATABASE_URL", "sqlite+aiosqlite:///./test.sqlite3")
+os.environ.setdefault("RATE_LIMIT_PER_SECOND", "0")
@@ -0,0 +1,69 @@
+import asyncio
+
+import pytest
+
+from src.app.utils import admission
+from src.app.utils.admission import NORMAL, PriorityGate, RateLimiter, Shed, client_ip
+
+
+def test_slot_handed_over_at_timeout_is_returned(monkeypatch):
+    gate = PriorityGate(capacity=1, reserved=0, queue_size=10, timeout=1)
+
+    async def wait_for(future, timeout):
+        # The holder releases, handing its slot to the waiter, just as the wait times out
+        gate.release()
+        assert future.done()
+        raise TimeoutError
+
+    async def run():
+        await gate.acquire(NORMAL)
+        monkeypatch.setattr(admission.asyncio, "wait_for", wait_for)
+        with pytest.raises(Shed):
+            await gate.acquire(NORMAL)
+
+    asyncio.run(run())
+    assert gate.in_use == 0
+
+
+def test_shed_waiters_leave_no_slot_behind():
+    async def run():
+        gate = PriorityGate(capacity=2, reserved=0, queue_size=100, timeout=0.002)
+
+        async def request():
+            try:
+                await gate.acquire(NORMAL)
+            except Shed:
+                return
+            await asyncio.sleep(0.002)
+            gate.release()
+
+        await asyncio.gather(*(request() for _ in range(500)))
+        return gate.in_use
+
+    assert asyncio.run(run()) == 0
+
+
+def test_anonymous_clients_are_only_limited_when_enabled():
+    limiter = RateLimiter(rate=1, burst=1, anonymous=False)
+    assert [limiter.take("ip:10.0.0.1") for _ in range(5)] == [0.0] * 5
+    assert limiter.take("user:7") == 0.0
+    assert limiter.take("user:7") > 0
+
+    limiter = RateLimiter(rate=1, burst=1, anonymous=True)
+    assert limiter.take("ip:10.0.0.1") == 0.0
+    assert limiter.take("ip:10.0.0.1") > 0
+
+
+@pytest.mark.parametrize("peer, forwarded, expected", [
+    ("10.0.0.1", None, "10.0.0.1"),
+    # Only trusted proxies get to name the client
+    ("203.0.113.9", b"198.51.100.1", "203.0.113.9"),
+    ("10.0.0.1", b"198.51.100.1", "198.51.100.1"),
+    # Hops prepended by the client itself are ignored, the nearest untrusted hop counts
+    ("10.0.0.1", b"1.2.3.4, 198.51.100.1, 10.0.0.2", "198.51.100.1"),
+    ("10.0.0.1", b"10.0.0.2", "10.0.0.1"),
+])
+def test_client_ip_behind_trusted_proxies(peer, forwarded, expected):
+    headers = [(b"x-forwarded-for", forwarded)] if forwarded else []
+    scope = {"headers": headers, "client": (peer, 1234)}
+    assert client_ip(scope, trusted_proxies={"10.0.0.1", "10.0.0.2"}) == expected
@@ -0,0 +1,37 @@
+import asyncio
+from datetime import date
+
+from sqlalchemy import func, select
+from sqlmodel import SQLModel
+
+from src.app.database.connectivity import async_session, engine
+from src.app.models.order import Order
+# Registers the tables order references
+from src.app.models import inventory, user  # noqa: F401
+from src.app.utils.archive import OrderArchiver, archive_orders
+
+
+def test_archival_is_off_by_default():
+    assert OrderArchiver().enabled is False
+
+
+def test_archival_refuses_to_run_without_a_cross_process_lock(tmp_path, monkeypatch):
+    monkeypatch.setattr("src.app.utils.archive.ORDER_ARCHIVE_DIR", str(tmp_path))
+
+    async def run():
+        async with engine.begin() as conn:
+            await conn.run_sync(SQLModel.metadata.drop_all)
+            await conn.run_sync(SQLModel.metadata.create_all)
+        async with async_session() as session:
+            session.add(Order(user_id=1, inventory_id=1, quantity=1, order_date=date(2000, 1, 5)))
+            await session.commit()
+        result = await archive_orders(12, "csv.gz")
+        async with async_session() as session:
+            kept = (await session.execute(select(func.count()).select_from(Order))).scalar_one()
+        await engine.dispose()
+        return result, kept
+
+    result, kept = asyncio.run(run())
+    assert result["archived"] == {}
+    assert "no lock shared between processes" in result["skipped"]
+    assert kept == 1
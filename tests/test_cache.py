@@ -0,0 +1,39 @@
+import asyncio
+
+from src.app.utils.cache import EntityCache, MemoryBackend
+
+
+def test_value_loaded_before_an_invalidation_is_not_stored():
+    cache = EntityCache("item", MemoryBackend())
+
+    async def run():
+        async def stale_loader():
+            # A writer commits and invalidates while this reader is loading
+            await cache.invalidate(1)
+            return {"quantity": 5}
+
+        loaded = await cache.get_or_load(1, stale_loader)
+
+        async def fresh_loader():
+            return {"quantity": 4}
+
+        return loaded, await cache.get_or_load(1, fresh_loader)
+
+    loaded, fresh = asyncio.run(run())
+    assert loaded == {"quantity": 5}
+    assert fresh == {"quantity": 4}
+    assert cache.misses == 2
+
+
+def test_loaded_value_is_stored():
+    cache = EntityCache("item", MemoryBackend())
+
+    async def run():
+        async def loader():
+            return {"quantity": 5}
+
+        await cache.get_or_load(1, loader)
+        return await cache.get_or_load(1, loader)
+
+    assert asyncio.run(run()) == {"quantity": 5}
+    assert (cache.hits, cache.misses) == (1, 1)
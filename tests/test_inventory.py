@@ -0,0 +1,38 @@
+import asyncio
+
+import httpx
+from sqlmodel import SQLModel
+
+from src.app.database.connectivity import async_session, engine
+from src.app.routers.main_routes import app as legacy_app
+from src.app.utils.cache import inventory_cache
+from src.app.utils.ledger import stock_as_of, utcnow
+from src.app.utils.search import SearchIndex
+from src.app.utils import stock
+
+
+def test_legacy_create_records_opening_stock(monkeypatch):
+    index = SearchIndex()
+    index.load([])
+    monkeypatch.setattr(stock, "search_index", index)
+
+    async def run():
+        async with engine.begin() as conn:
+            await conn.run_sync(SQLModel.metadata.drop_all)
+            await conn.run_sync(SQLModel.metadata.create_all)
+        version = await inventory_cache.version()
+        transport = httpx.ASGITransport(app=legacy_app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            response = await client.post("/inventory", json={"name": "Whole Milk", "category": "Dairy", "quantity": 12, "threshold": 2})
+        inventory_id = response.json()["inventory_id"]
+        async with async_session() as session:
+            as_of = await stock_as_of(session, inventory_id, utcnow())
+        changed = await inventory_cache.version() != version
+        await engine.dispose()
+        return response.status_code, inventory_id, as_of, changed
+
+    status, inventory_id, as_of, changed = asyncio.run(run())
+    assert status == 201
+    assert as_of["quantity"] == 12
+    assert changed
+    assert [item_id for item_id, _ in index.search("milk", 10)] == [inventory_id]
@@ -0,0 +1,44 @@
+import asyncio
+import sys
+
+import httpx
+from sqlmodel import SQLModel
+
+from main import app
+from src.app.database.connectivity import engine
+from src.app.utils.search import MAX_CANDIDATES, SearchIndex
+
+
+def test_category_filter_applies_before_the_candidate_cap():
+    index = SearchIndex()
+    crowded = MAX_CANDIDATES * 2
+    index.load(
+        [(i, f"chocolate bar {i}", "Snacks") for i in range(1, crowded + 1)]
+        + [(crowded + i, f"chocolate milk {i}", "Dairy") for i in range(1, 4)]
+    )
+    found = index.search("chocolate", 10, "Dairy")
+    assert sorted(inventory_id for inventory_id, _ in found) == [crowded + 1, crowded + 2, crowded + 3]
+
+
+def test_imported_items_are_searchable_right_away(monkeypatch):
+    index = SearchIndex(sync_interval=3600)
+    index.load([])
+    index.synced_at = float("inf")
+    # The routers package exports the router under the module's name
+    monkeypatch.setattr(sys.modules["src.app.routers.inventory"], "search_index", index)
+
+    async def run():
+        async with engine.begin() as conn:
+            await conn.run_sync(SQLModel.metadata.drop_all)
+            await conn.run_sync(SQLModel.metadata.create_all)
+        body = "name,category,quantity,threshold\nWhole Milk,Dairy,10,2\nDark Chocolate,Snacks,5,1\n"
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            response = await client.post("/inventory/import", content=body, headers={"content-type": "text/csv"})
+        await engine.dispose()
+        return response
+
+    response = asyncio.run(run())
+    assert response.json()["inserted"] == 2
+    assert len(index.search("milk", 10)) == 1
+    assert len(index.search("choc", 10)) == 1
@@ -0,0 +1,131 @@
+import asyncio
+
+import httpx
+import pytest
+from sqlmodel import SQLModel, select
+
+from main import app
+from src.app.database.connectivity import async_session, engine
+from src.app.models.user import User
+from src.app.utils.admission import client_key
+from src.app.utils.security import (
+    create_token, decode_token, hash_password_sync, needs_rehash, verify_password_sync,
+)
+
+
+def test_valid_token():
+    claims = decode_token(create_token(7, "admin", "Ada"))
+    assert claims["sub"] == 7
+    assert claims["role"] == "admin"
+
+
+def test_expired_token():
+    assert decode_token(create_token(7, "admin", "Ada", ttl=-1)) is None
+
+
+@pytest.mark.parametrize("token", [
+    "",
+    "a",
+    "a.b.c",
+    "a.é",
+    "é.é",
+    "a.\x00",
+    "!!!.???",
+    "e30.",
+])
+def test_malformed_token(token):
+    assert decode_token(token) is None
+
+
+def test_tampered_token():
+    payload, signature = create_token(7, "user", "Ada").split(".")
+    assert decode_token(f"{payload}x.{signature}") is None
+    assert decode_token(f"{payload}.{signature[:-1]}é") is None
+
+
+def test_client_key_ignores_malformed_token():
+    scope = {"headers": [(b"authorization", "Bearer a.é".encode("latin-1"))], "client": ("10.0.0.1", 1234)}
+    assert client_key(scope) == "ip:10.0.0.1"
+
+
+def test_client_key_uses_token_subject():
+    scope = {"headers": [(b"authorization", f"Bearer {create_token(7, 'user', 'Ada')}".encode())], "client": ("10.0.0.1", 1234)}
+    assert client_key(scope) == "user:7"
+
+
+@pytest.mark.parametrize("stored", [
+    "scrypt$",
+    "scrypt$16384$8$1$c2FsdA",
+    "scrypt$n$8$1$c2FsdA$ZGlnZXN0",
+    "scrypt$16384$8$1$!!!$ZGlnZXN0",
+    "scrypt$16384$8$1$c2FsdA$a",
+    "scrypt$3$8$1$c2FsdA$ZGlnZXN0",
+])
+def test_malformed_hash_is_rejected(stored):
+    assert verify_password_sync("secret password", stored) is False
+
+
+def test_unknown_user_is_rejected():
+    assert verify_password_sync("secret password", None) is False
+
+
+def test_hash_round_trip():
+    stored = hash_password_sync("secret password")
+    assert verify_password_sync("secret password", stored)
+    assert not verify_password_sync("wrong password", stored)
+    assert not needs_rehash(stored)
+
+
+async def add_user(password: str) -> None:
+    async with engine.begin() as conn:
+        await conn.run_sync(SQLModel.metadata.drop_all)
+        await conn.run_sync(SQLModel.metadata.create_all)
+    async with async_session() as session:
+        session.add(User(name="Ada", email="ada@example.com", password=password, role="admin"))
+        await session.commit()
+
+
+async def login(password: str) -> tuple[int, str]:
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        response = await client.post("/user/login", params={"email": "ada@example.com", "password": password})
+    async with async_session() as session:
+        stored = (await session.execute(select(User.password))).scalar_one()
+    return response.status_code, stored
+
+
+def test_plain_text_password_is_upgraded_on_login():
+    async def run():
+        await add_user("secret password")
+        wrong = await login("wrong password")
+        right = await login("secret password")
+        again = await login("secret password")
+        await engine.dispose()
+        return wrong, right, again
+
+    wrong, right, again = asyncio.run(run())
+    # A failed login leaves the row alone
+    assert wrong == (401, "secret password")
+    assert right[0] == 200 and right[1].startswith("scrypt$") and not needs_rehash(right[1])
+    assert again == (200, right[1])
+
+
+def test_outdated_parameters_are_upgraded_on_login():
+    async def run():
+        await add_user(hash_password_sync("secret password", n=2 ** 10))
+        result = await login("secret password")
+        await engine.dispose()
+        return result
+
+    status, stored = asyncio.run(run())
+    assert status == 200 and not needs_rehash(stored)
+
+
+def test_malformed_stored_hash_fails_login_cleanly():
+    async def run():
+        await add_user("scrypt$not$a$hash")
+        result = await login("secret password")
+        await engine.dispose()
+        return result
+
+    assert asyncio.run(run()) == (401, "scrypt$not$a$hash")
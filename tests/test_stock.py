@@ -0,0 +1,46 @@
+import asyncio
+
+from fastapi import HTTPException
+from sqlmodel import SQLModel
+
+from src.app.database.connectivity import async_session, engine
+from src.app.models.inventory import Inventory
+from src.app.utils.stock import reserve_stock
+
+
+def test_concurrent_reservations_do_not_oversell():
+    stock, attempts = 20, 60
+
+    async def run():
+        async with engine.begin() as conn:
+            await conn.run_sync(SQLModel.metadata.drop_all)
+            await conn.run_sync(SQLModel.metadata.create_all)
+        async with async_session() as session:
+            item = Inventory(name="hot item", category="test", quantity=stock, threshold=0)
+            session.add(item)
+            await session.commit()
+            inventory_id = item.inventory_id
+
+        async def reserve():
+            async with async_session() as session:
+                try:
+                    remaining = await reserve_stock(session, inventory_id, 1)
+                except HTTPException as error:
+                    assert error.status_code == 400
+                    return None
+                await session.commit()
+                return remaining.quantity
+
+        results = await asyncio.gather(*(reserve() for _ in range(attempts)))
+        async with async_session() as session:
+            left = (await session.get(Inventory, inventory_id)).quantity
+        await engine.dispose()
+        return results, left
+
+    results, left = asyncio.run(run())
+    sold = [remaining for remaining in results if remaining is not None]
+    assert left == 0
+    assert len(sold) == stock
+    assert len(sold) + results.count(None) == attempts
+    # Every success saw its own decrement, and none went below zero
+    assert sorted(sold) == list(range(stock))
@@ -0,0 +1,75 @@
+import asyncio
+
+from sqlalchemy.exc import IntegrityError
+from sqlmodel import SQLModel
+
+from src.app.database.connectivity import engine
+# Registers the table notification.user_id references
+from src.app.models import user  # noqa: F401
+from src.app.utils import writebehind
+from src.app.utils.writebehind import NotificationWriter
+
+
+async def create_tables():
+    async with engine.begin() as conn:
+        await conn.run_sync(SQLModel.metadata.drop_all)
+        await conn.run_sync(SQLModel.metadata.create_all)
+
+
+def test_publish_failure_does_not_stop_the_worker(monkeypatch):
+    async def failing_publish(kind, notifications):
+        raise ConnectionError("broker down")
+
+    async def run():
+        await create_tables()
+        monkeypatch.setattr(writebehind, "publish_notifications", failing_publish)
+        writer = NotificationWriter(linger=0.001)
+        writer.start()
+        first = await asyncio.wait_for(writer.write([{"user_id": 1, "message": "a", "status": "unread"}], durable=True), 5)
+        second = await asyncio.wait_for(writer.write([{"user_id": 1, "message": "b", "status": "unread"}], durable=True), 5)
+        await writer.stop()
+        await engine.dispose()
+        return first, second
+
+    first, second = asyncio.run(run())
+    assert [n.message for n in first + second] == ["a", "b"]
+
+
+def test_dead_worker_is_restarted():
+    async def run():
+        await create_tables()
+        writer = NotificationWriter(linger=0.001)
+
+        async def crash():
+            raise RuntimeError("worker bug")
+
+        writer.task = asyncio.create_task(crash())
+        await asyncio.sleep(0)
+        written = await asyncio.wait_for(writer.write([{"user_id": 1, "message": "a", "status": "unread"}], durable=True), 5)
+        await writer.stop()
+        await engine.dispose()
+        return written
+
+    assert [n.message for n in asyncio.run(run())] == ["a"]
+
+
+def test_bad_row_only_fails_its_own_write():
+    async def run():
+        await create_tables()
+        writer = NotificationWriter(linger=1, batch_size=3)
+        writer.start()
+        # Queued together, so they are coalesced into one INSERT
+        results = await asyncio.wait_for(asyncio.gather(
+            writer.write([{"user_id": 1, "message": "a", "status": "unread"}], durable=True),
+            writer.write([{"user_id": 1, "message": None, "status": "unread"}], durable=True),
+            writer.write([{"user_id": 1, "message": "b", "status": "unread"}], durable=True),
+            return_exceptions=True,
+        ), 5)
+        await writer.stop()
+        await engine.dispose()
+        return writer, results
+
+    writer, (first, bad, second) = asyncio.run(run())
+    assert [n.message for n in first + second] == ["a", "b"]
+    assert isinstance(bad, IntegrityError)
+    assert (writer.written, writer.failed) == (2, 1)